@@ -0,0 +1,374 @@
+"""
+Cross-engine FIM parity and timing benchmark.
+
+Runs the RoadRunner/CVODE path (`check_mm_fim_roadrunner.py`) and the
+production Node path (`services/fim.ts`, driven by `fim_service_report.ts`)
+over a fixed model set. Both engines print the same report layout, so the
+harness parses the two outputs and records, per model:
+
+- eigenvalue, condition-number, correlation and FIM deltas between engines
+- wall time and peak RSS for each engine (best of ``--repeat`` runs)
+
+Results are written as JSON tagged with the current git commit, so numbers can
+be tracked across commits (``--history`` appends one line per run).
+
+Usage examples::
+
+    # Default model set; SBML is exported from the BNGL into artifacts/temp
+    python scripts/bench_fim_engines.py --out artifacts/fim_engine_benchmark.json
+
+    # Custom model set, three timing repeats, fail if eigenvalues drift > 5%
+    python scripts/bench_fim_engines.py --manifest fim_models.json --repeat 3 \
+        --tolerance 0.05 --history artifacts/fim_engine_history.jsonl
+
+Manifest entries use the fields of `BenchmarkModel` (paths relative to the
+repository root). `bngl` may be null for SBML-only models, which then run on
+RoadRunner alone; `sbml` may be null when it should be exported from `bngl`.
+
+Requirements:
+    pip install libroadrunner numpy   (plus Node.js on PATH and `npm install`)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+
+ROOT = Path(__file__).resolve().parent.parent
+ROADRUNNER_SCRIPT = ROOT / 'scripts' / 'check_mm_fim_roadrunner.py'
+NODE_DRIVER = ROOT / 'scripts' / 'fim_service_report.ts'
+SBML_EXPORT_DIR = ROOT / 'artifacts' / 'temp'
+
+
+@dataclass(frozen=True)
+class BenchmarkModel:
+    name: str
+    bngl: str | None = None
+    sbml: str | None = None
+    parameters: Tuple[str, ...] = ()
+    steps: int = 500
+    t_end: float = 50.0
+
+
+DEFAULT_MODELS: Tuple[BenchmarkModel, ...] = (
+    BenchmarkModel(
+        name='michaelis_menten',
+        bngl='example-models/michaelis-menten-kinetics.bngl',
+        parameters=('k_on', 'k_off', 'k_cat'),
+        steps=500,
+        t_end=50.0,
+    ),
+)
+
+
+@dataclass(frozen=True)
+class EngineRun:
+    returncode: int
+    stdout: str
+    stderr: str
+    wall_time: float
+    peak_rss_mb: float | None
+
+
+def load_manifest(path: Path) -> List[BenchmarkModel]:
+    entries = json.loads(path.read_text(encoding='utf-8'))
+    return [
+        BenchmarkModel(**{**entry, 'parameters': tuple(entry.get('parameters', ()))})
+        for entry in entries
+    ]
+
+
+def node_command(*args: str) -> List[str]:
+    # `node --import tsx` rather than `npx tsx` keeps npx start-up out of the timings.
+    return ['node', '--import', 'tsx', str(NODE_DRIVER), *args]
+
+
+def resolve_sbml(model: BenchmarkModel) -> Tuple[Path | None, str | None]:
+    """SBML path for the RoadRunner run, exporting it from the BNGL model when needed."""
+    if model.sbml:
+        path = ROOT / model.sbml
+        return (path, None) if path.exists() else (None, f'SBML file not found: {model.sbml}')
+    if not model.bngl:
+        return None, 'model has neither sbml nor bngl'
+    path = SBML_EXPORT_DIR / f'{Path(model.bngl).stem}.xml'
+    bngl_path = ROOT / model.bngl
+    if path.exists() and bngl_path.exists() and path.stat().st_mtime >= bngl_path.stat().st_mtime:
+        return path, None
+    try:
+        proc = subprocess.run(
+            node_command(str(bngl_path), '--export-sbml', str(path), '--no-fim'),
+            cwd=ROOT, capture_output=True, text=True, encoding='utf-8',
+        )
+    except OSError as exc:
+        return None, f'SBML export failed: {exc}'
+    if proc.returncode != 0 or not path.exists():
+        lines = [line.strip() for line in proc.stderr.splitlines() if line.strip()]
+        reason = next((line for line in lines if 'Error' in line), lines[-1] if lines else f'exit {proc.returncode}')
+        return None, f'SBML export from {model.bngl} failed: {reason}'
+    return path, None
+
+
+def run_engine(cmd: Sequence[str]) -> EngineRun:
+    """Run one engine process, capturing output, wall time and (on POSIX) its own peak RSS."""
+    with tempfile.TemporaryFile('w+', encoding='utf-8') as out, tempfile.TemporaryFile('w+', encoding='utf-8') as err:
+        start = time.perf_counter()
+        proc = subprocess.Popen(list(cmd), cwd=ROOT, stdout=out, stderr=err, encoding='utf-8')
+        peak_rss_mb = None
+        if hasattr(os, 'wait4'):
+            _, status, usage = os.wait4(proc.pid, 0)
+            returncode = os.waitstatus_to_exitcode(status)
+            proc.returncode = returncode
+            # ru_maxrss is reported in bytes on macOS and in KiB elsewhere.
+            peak_rss_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+        else:
+            returncode = proc.wait()
+        wall_time = time.perf_counter() - start
+        out.seek(0)
+        err.seek(0)
+        return EngineRun(returncode, out.read(), err.read(), wall_time, peak_rss_mb)
+
+
+def run_repeated(cmd: Sequence[str], repeat: int) -> EngineRun:
+    """Best wall time / largest RSS over `repeat` runs; output is taken from the first run."""
+    runs = [run_engine(cmd) for _ in range(max(1, repeat))]
+    first = runs[0]
+    rss_values = [run.peak_rss_mb for run in runs if run.peak_rss_mb is not None]
+    return EngineRun(
+        returncode=max(run.returncode for run in runs),
+        stdout=first.stdout,
+        stderr=first.stderr,
+        wall_time=min(run.wall_time for run in runs),
+        peak_rss_mb=max(rss_values) if rss_values else None,
+    )
+
+
+def _read_matrix(lines: List[str], header: str) -> List[List[float]]:
+    try:
+        start = lines.index(header) + 1
+    except ValueError:
+        return []
+    rows: List[List[float]] = []
+    for line in lines[start:]:
+        if not line.strip():
+            break
+        rows.append([float(token) for token in line.split()])
+    return rows
+
+
+def parse_fim_report(text: str) -> Dict[str, Any]:
+    """Parse the shared text report printed by both FIM scripts."""
+    lines = [line.rstrip() for line in text.splitlines()]
+    report: Dict[str, Any] = {
+        'eigenvalues': [float(value) for value in re.findall(r'λ\d+:\s*(\S+)', text)],
+        'condition_number': None,
+        'regularized_condition': None,
+        'identifiable': [],
+        'unidentifiable': [],
+        'correlations': _read_matrix(lines, 'Correlation matrix:'),
+        'fim_matrix': _read_matrix(lines, 'FIM matrix:'),
+    }
+    for idx, line in enumerate(lines):
+        if line.startswith('Condition number') and idx + 1 < len(lines):
+            raw, regularized = (float(part) for part in lines[idx + 1].split('/'))
+            report['condition_number'] = raw
+            report['regularized_condition'] = regularized
+        for key, label in (('identifiable', 'Identifiable parameters:'), ('unidentifiable', 'Unidentifiable parameters:')):
+            if line.startswith(label):
+                names = line[len(label):].strip()
+                report[key] = [] if names == '(none)' else [name.strip() for name in names.split(',')]
+    return report
+
+
+def _relative_delta(ref: float, test: float) -> float | None:
+    if not (math.isfinite(ref) and math.isfinite(test)):
+        return 0.0 if ref == test else None
+    scale = max(abs(ref), abs(test))
+    return abs(ref - test) / scale if scale > 0 else 0.0
+
+
+def _max_abs_delta(ref: List[List[float]], test: List[List[float]]) -> float | None:
+    if not ref or len(ref) != len(test):
+        return None
+    return max(abs(a - b) for row_a, row_b in zip(ref, test) for a, b in zip(row_a, row_b))
+
+
+def compare_reports(reference: Dict[str, Any], candidate: Dict[str, Any]) -> Dict[str, Any]:
+    """Deltas of `candidate` (RoadRunner) against `reference` (Node `services/fim.ts`)."""
+    eig_deltas = [
+        _relative_delta(a, b) for a, b in zip(reference['eigenvalues'], candidate['eigenvalues'])
+    ]
+    fim_scale = max((abs(v) for row in reference['fim_matrix'] for v in row), default=0.0)
+    fim_delta = _max_abs_delta(reference['fim_matrix'], candidate['fim_matrix'])
+    cond_ref = reference['condition_number']
+    cond_test = candidate['condition_number']
+    log_ratio = None
+    if cond_ref and cond_test and math.isfinite(cond_ref) and math.isfinite(cond_test) and cond_ref > 0 and cond_test > 0:
+        log_ratio = math.log10(cond_test / cond_ref)
+    return {
+        'eigenvalue_count_match': len(reference['eigenvalues']) == len(candidate['eigenvalues']),
+        'eigenvalue_rel_deltas': eig_deltas,
+        'max_eigenvalue_rel_delta': max((d for d in eig_deltas if d is not None), default=None),
+        'condition_rel_delta': (
+            _relative_delta(cond_ref, cond_test) if cond_ref is not None and cond_test is not None else None
+        ),
+        'condition_log10_ratio': log_ratio,
+        'regularized_condition_rel_delta': (
+            _relative_delta(reference['regularized_condition'], candidate['regularized_condition'])
+            if reference['regularized_condition'] is not None and candidate['regularized_condition'] is not None
+            else None
+        ),
+        'correlation_max_abs_delta': _max_abs_delta(reference['correlations'], candidate['correlations']),
+        'fim_max_rel_delta': fim_delta / fim_scale if fim_delta is not None and fim_scale > 0 else None,
+        'identifiable_match': sorted(reference['identifiable']) == sorted(candidate['identifiable']),
+    }
+
+
+def _engine_record(run: EngineRun) -> Dict[str, Any]:
+    record: Dict[str, Any] = {
+        'returncode': run.returncode,
+        'wall_time': run.wall_time,
+        'peak_rss_mb': run.peak_rss_mb,
+    }
+    if run.returncode != 0:
+        record['stderr_tail'] = run.stderr.strip().splitlines()[-5:]
+    return record
+
+
+def benchmark_model(model: BenchmarkModel, integrator: str, repeat: int) -> Dict[str, Any]:
+    record: Dict[str, Any] = {'model': asdict(model), 'engines': {}, 'status': 'ok'}
+    sbml_path, error = resolve_sbml(model)
+    if sbml_path is None:
+        record['status'] = 'missing_sbml'
+        record['error'] = error
+        return record
+    record['sbml_path'] = str(sbml_path.relative_to(ROOT)) if sbml_path.is_relative_to(ROOT) else str(sbml_path)
+
+    rr_cmd = [
+        sys.executable, str(ROADRUNNER_SCRIPT), str(sbml_path),
+        '--steps', str(model.steps), '--t-end', str(model.t_end), '--integrator', integrator,
+    ]
+    if model.parameters:
+        rr_cmd += ['--parameters', *model.parameters]
+    rr_run = run_repeated(rr_cmd, repeat)
+    record['engines']['roadrunner'] = _engine_record(rr_run)
+    rr_report = parse_fim_report(rr_run.stdout) if rr_run.returncode == 0 else None
+
+    node_report = None
+    if model.bngl:
+        node_cmd = node_command(
+            str(ROOT / model.bngl), '--steps', str(model.steps), '--t-end', str(model.t_end),
+        )
+        if model.parameters:
+            node_cmd += ['--parameters', *model.parameters]
+        node_run = run_repeated(node_cmd, repeat)
+        record['engines']['node_fim_service'] = _engine_record(node_run)
+        node_report = parse_fim_report(node_run.stdout) if node_run.returncode == 0 else None
+
+    if rr_report is None or (model.bngl and node_report is None):
+        record['status'] = 'engine_error'
+    if rr_report is not None:
+        record['roadrunner_eigenvalues'] = rr_report['eigenvalues']
+    if rr_report is not None and node_report is not None:
+        record['node_eigenvalues'] = node_report['eigenvalues']
+        record['deltas'] = compare_reports(node_report, rr_report)
+    return record
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _node_version() -> str | None:
+    try:
+        return subprocess.run(['node', '--version'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_summary(records: Sequence[Dict[str, Any]]) -> None:
+    def fmt(value: Any, spec: str) -> str:
+        return format(value, spec) if isinstance(value, (int, float)) else '-'
+
+    print(f"{'Model':<24} {'Status':<13} {'max Δλ':>10} {'Δcorr':>10} {'RR [s]':>8} {'Node [s]':>8} {'RR MiB':>8} {'Node MiB':>8}")
+    for rec in records:
+        deltas = rec.get('deltas', {})
+        rr = rec['engines'].get('roadrunner', {})
+        node = rec['engines'].get('node_fim_service', {})
+        print(
+            f"{rec['model']['name']:<24} {rec['status']:<13} "
+            f"{fmt(deltas.get('max_eigenvalue_rel_delta'), '.2e'):>10} "
+            f"{fmt(deltas.get('correlation_max_abs_delta'), '.2e'):>10} "
+            f"{fmt(rr.get('wall_time'), '.2f'):>8} {fmt(node.get('wall_time'), '.2f'):>8} "
+            f"{fmt(rr.get('peak_rss_mb'), '.1f'):>8} {fmt(node.get('peak_rss_mb'), '.1f'):>8}"
+        )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Benchmark RoadRunner vs Node services/fim.ts FIM results and timings.')
+    parser.add_argument('--manifest', type=Path, help='JSON list of models (default: built-in Michaelis–Menten set).')
+    parser.add_argument('--integrator', default='cvode', help='RoadRunner integrator (default: cvode).')
+    parser.add_argument('--repeat', type=int, default=1, help='Timing repeats per engine; best wall time is kept (default: 1).')
+    parser.add_argument('--out', type=Path, default=ROOT / 'artifacts' / 'fim_engine_benchmark.json', help='Result JSON path.')
+    parser.add_argument('--history', type=Path, help='Also append the run as one JSON line to this file.')
+    parser.add_argument('--tolerance', type=float, help='Exit non-zero if any eigenvalue relative delta exceeds this.')
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    models = load_manifest(args.manifest) if args.manifest else list(DEFAULT_MODELS)
+
+    records = [benchmark_model(model, args.integrator, args.repeat) for model in models]
+    result = {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'commit': _git_commit(),
+        'host': {
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'node': _node_version(),
+            'cpu_count': os.cpu_count(),
+        },
+        'integrator': args.integrator,
+        'repeat': args.repeat,
+        'models': records,
+    }
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(result, indent=2), encoding='utf-8')
+    if args.history:
+        args.history.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.history, 'a', encoding='utf-8') as handle:
+            handle.write(json.dumps(result) + '\n')
+
+    print_summary(records)
+    print(f'\nResults written to: {args.out}')
+
+    failed = any(rec['status'] != 'ok' for rec in records)
+    if args.tolerance is not None:
+        failed = failed or any(
+            (rec.get('deltas', {}).get('max_eigenvalue_rel_delta') or 0.0) > args.tolerance
+            for rec in records
+        )
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
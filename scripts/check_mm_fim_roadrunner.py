@@ -6,10 +6,42 @@ side-by-side.
 
 Key capabilities:
 - Automatically discovers observables exported as assignment-rule parameters
+- Indexes species, global parameter and assignment-rule ids with a streaming
+  parser and caches the index next to the SBML file (``<file>.index.json``)
 - Configures the CVODE integrator with RoadRunner's API for reproducible output
 - Uses central finite differences over the full time course to assemble J and F
 - Provides CLI options for custom parameter subsets, time horizons, and step
   counts
+- Optionally spreads the perturbation runs across a process pool (``--workers``)
+- Optionally screens parameters with one-sided runs first and only spends the
+  second perturbation on sensitive ones (``--screen-threshold``)
+- Restricts output to explicit observation times (``--times-csv``) and a subset
+  of observables (``--observables``) so integration output and J only hold the
+  rows that match experimental data
+- Alternatively derives J from one forward-sensitivity solve
+  (``--method sensitivities``) instead of 2p + 1 integrations
+- For steady-state observations, solves once for the steady state and gets
+  sensitivities from the implicit function theorem (``--steady-state``)
+- Checkpoints every finished perturbation column (``--checkpoint``) so killed
+  sweeps pick up where they stopped (``--resume``)
+- Caches simulated trajectories on disk (``--cache-dir``) so repeat studies only
+  integrate perturbations they have not seen before
+- Streams F = J^T J from time-chunked blocks of a disk-backed J
+  (``--stream-fim`` / ``--keep-jacobian``) so memory stays flat for long runs;
+  forward sensitivities fold each block into F without building J at all
+- Decomposes F from an SVD of the R factor of a block-wise QR of J, or, with
+  ``--svd-rank``, resolves only the leading modes for models with thousands of
+  parameters (F stays exact; condition numbers and covariance are not reported)
+- Caches compiled models by SBML content hash (``--model-cache-dir``) so repeat
+  runs skip RoadRunner's parse and LLVM compile
+- Archives J, F, eigenpairs, covariance and correlations to an uncompressed
+  ``.npz`` with a JSON metadata sidecar (``--out``); archives reload memory-mapped
+  and two runs can be compared with the ``diff`` subcommand
+- Records per-phase and per-perturbation wall time, integrator settings and
+  peak RSS (``--profile`` / ``--trace-json``); CVODE's internal counters are
+  not exposed by RoadRunner, which the trace states explicitly
+- Exposes a reentrant library API (`FIMSession`) that pools compiled RoadRunner
+  instances; the CLI is a thin wrapper around it
 
 Usage examples::
 
@@ -20,24 +52,81 @@ Usage examples::
     python scripts/check_mm_fim_roadrunner.py model.xml --parameters k_on k_cat \
         --steps 1000
 
+    # Spread the 2p perturbation simulations over 8 worker processes
+    python scripts/check_mm_fim_roadrunner.py model.xml --workers 8
+
+    # Use CVODES forward sensitivities (independent of --rel-eps)
+    python scripts/check_mm_fim_roadrunner.py model.xml --method sensitivities
+
+    # Observables measured at steady state only: one steady-state solve, no time course
+    python scripts/check_mm_fim_roadrunner.py model.xml --steady-state
+
+    # Only the sampled time points and measured observables of a sparse data set
+    python scripts/check_mm_fim_roadrunner.py model.xml --times-csv data.csv --observables obs_P
+
+    # Long sweep that can be killed and continued
+    python scripts/check_mm_fim_roadrunner.py model.xml --workers 8 --checkpoint run1/ --resume
+
+    # Reuse trajectories across runs (e.g. when sweeping --rel-eps)
+    python scripts/check_mm_fim_roadrunner.py model.xml --cache-dir .fim-cache
+
+    # Accumulate F chunk-wise and keep J as a memory-mapped .npy for later use
+    python scripts/check_mm_fim_roadrunner.py model.xml --keep-jacobian J.npy
+
+    # Reuse the compiled model on later runs (and in pool workers)
+    python scripts/check_mm_fim_roadrunner.py model.xml --model-cache-dir .rr-cache
+
+    # Archive a run, then check a later run against it
+    python scripts/check_mm_fim_roadrunner.py model.xml --out baseline.npz
+    python scripts/check_mm_fim_roadrunner.py diff baseline.npz candidate.npz --rtol 1e-4
+
+    # Print a phase breakdown and save the full machine-readable trace
+    python scripts/check_mm_fim_roadrunner.py model.xml --profile --trace-json trace.json
+
 Requirements:
     pip install libroadrunner numpy
+
+Library use::
+
+    session = FIMSession(Path('model.xml'), SimulationConfig(steps=1000), pool_size=4)
+    decomposition = session.fim(options=JacobianOptions(method='sensitivities'))
+    summary = session.identifiability(decomposition=decomposition)
 """
 
 from __future__ import annotations
 
 import argparse
+import csv
+import hashlib
+import json
+import os
+import queue
+import struct
+import sys
+import tempfile
+import threading
+import time
 import xml.etree.ElementTree as ET
-from dataclasses import dataclass
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Sequence, Tuple, cast
+from typing import Any, Dict, Iterator, List, Sequence, Tuple, cast
 
 import numpy as np
 import roadrunner
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
 
-SPECIES_ID_BY_NAME: Dict[str, str] = {}
-TIMECOURSE_SELECTIONS: List[str] = []
+# Per-process state for Jacobian pool workers (see `_init_jacobian_worker`).
+_WORKER_RR: roadrunner.RoadRunner | None = None
+_WORKER_CONTEXT: ModelContext | None = None
+_WORKER_JACOBIAN: np.ndarray | None = None
 
 
 @dataclass(frozen=True)
@@ -48,10 +137,46 @@ class SimulationConfig:
     rel_tol: float = 1e-10
     abs_tol: float = 1e-12
     integrator: str = 'cvode'
+    times: Tuple[float, ...] | None = None  # explicit observation times; replace the uniform grid
+
+    def __post_init__(self) -> None:
+        if self.times is not None:
+            times = np.asarray(self.times, dtype=float)
+            if times.size == 0 or np.any(np.diff(times) <= 0) or times[0] < self.start:
+                raise ValueError('Observation times must be strictly increasing and not before the start time.')
 
     @property
     def points(self) -> int:
-        return self.steps + 1
+        return len(self.times) if self.times is not None else self.steps + 1
+
+    @property
+    def observation_times(self) -> np.ndarray:
+        if self.times is not None:
+            return np.asarray(self.times, dtype=float)
+        return np.linspace(self.start, self.end, self.points)
+
+
+@dataclass(frozen=True)
+class JacobianOptions:
+    method: str = 'fd'  # 'fd' (central differences), 'sensitivities' or 'steady_state'
+    rel_eps: float = 1e-4
+    workers: int = 1
+    chunk_times: int = 256  # time points per streamed FIM block
+    screen_threshold: float = 0.0  # relative one-sided sensitivity below which 'fd' skips the minus run (0 = off)
+
+
+@dataclass(frozen=True)
+class ModelContext:
+    """Per-model simulation state shared by every run of one SBML export.
+
+    Picklable, so pool workers can rebuild an identical setup in their own process.
+    """
+    species_map: Dict[str, str] = field(default_factory=dict)
+    selections: Tuple[str, ...] = ()
+    cache: TrajectoryCache | None = None
+    model_cache: CompiledModelCache | None = None
+    sbml_digest: str = ''
+    tracer: Tracer | None = None
 
 
 @dataclass(frozen=True)
@@ -63,6 +188,7 @@ class FIMDecomposition:
     correlations: np.ndarray
     condition_number: float
     regularized_condition: float
+    truncated: bool = False  # only the leading modes were resolved (--svd-rank)
 
 
 @dataclass(frozen=True)
@@ -84,6 +210,263 @@ class CorrelationPair:
     corr: float
 
 
+# Integrator settings recorded by `solver_statistics` (real RoadRunner integrator keys).
+SOLVER_SETTING_KEYS = ('relative_tolerance', 'absolute_tolerance', 'maximum_num_steps', 'stiff')
+# RoadRunner's Python API only exposes integrator *settings*; CVODE's run counters
+# (steps, RHS evaluations, error-test failures) are not reachable, so traces say so.
+SOLVER_COUNTERS_NOTE = (
+    'CVODE step / RHS-evaluation / error-test-failure counters are not exposed by '
+    "RoadRunner's Python API and are not recorded; wall time per run is the cost proxy."
+)
+
+
+class Tracer:
+    """Thread-safe recorder of timed phases for `--profile` / `--trace-json`.
+
+    Events carry a wall-clock start (`ts`, epoch seconds), a duration (`dur`) and
+    the recording process, so traces gathered in pool workers can be merged. A
+    pickled copy starts empty; workers ship their events back via `drain`.
+    """
+
+    def __init__(self) -> None:
+        self.events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__()
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+        event: Dict[str, Any] = {'name': name, 'ts': time.time(), 'pid': os.getpid(), **attrs}
+        t0 = time.perf_counter()
+        try:
+            yield event
+        finally:
+            event['dur'] = time.perf_counter() - t0
+            with self._lock:
+                self.events.append(event)
+
+    def extend(self, events: Sequence[Dict[str, Any]]) -> None:
+        with self._lock:
+            self.events.extend(events)
+
+    def drain(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            events, self.events = self.events, []
+        return events
+
+    def phase_summary(self) -> Dict[str, Dict[str, float]]:
+        summary: Dict[str, Dict[str, float]] = {}
+        with self._lock:
+            events = list(self.events)
+        for event in events:
+            entry = summary.setdefault(event['name'], {'count': 0, 'total': 0.0, 'max': 0.0})
+            entry['count'] += 1
+            entry['total'] += event['dur']
+            entry['max'] = max(entry['max'], event['dur'])
+        return summary
+
+    def report(self, **metadata: Any) -> Dict[str, Any]:
+        with self._lock:
+            events = sorted(self.events, key=lambda event: event['ts'])
+        return {
+            'metadata': metadata,
+            'solver_counters': {'available': False, 'note': SOLVER_COUNTERS_NOTE},
+            'peak_rss_mb': peak_rss_mb(),
+            'phases': self.phase_summary(),
+            'events': events,
+        }
+
+
+@contextmanager
+def trace_span(tracer: Tracer | None, name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+    """`Tracer.span` that degrades to a no-op when tracing is disabled."""
+    if tracer is None:
+        yield {}
+        return
+    with tracer.span(name, **attrs) as event:
+        yield event
+
+
+def peak_rss_mb() -> Dict[str, float | None]:
+    """Peak resident set size of this process and its reaped children, in MiB."""
+    if resource is None:
+        return {'self': None, 'children': None}
+    # ru_maxrss is reported in bytes on macOS and in KiB elsewhere.
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return {
+        'self': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        'children': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale,
+    }
+
+
+def solver_statistics(rr: roadrunner.RoadRunner) -> Dict[str, Any]:
+    """Integrator name and the settings that governed the most recent integration.
+
+    Run counters are not available through RoadRunner (see `SOLVER_COUNTERS_NOTE`).
+    """
+    integrator = rr.getIntegrator()
+    stats: Dict[str, Any] = {'integrator': integrator.getName()}
+    for key in SOLVER_SETTING_KEYS:
+        try:
+            value = integrator.getValue(key)
+        except (AttributeError, RuntimeError, TypeError, ValueError):
+            continue
+        stats[key] = value if isinstance(value, bool) else float(value)
+    return stats
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 of a file's bytes, read in chunks so large exports stay cheap."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TrajectoryCache:
+    """Content-addressed on-disk store of simulated trajectories.
+
+    Entries are keyed by the SBML digest, the `SimulationConfig`, the selections
+    and the effective parameter overrides. Each entry is a `.npy` array that is
+    loaded memory-mapped plus a JSON sidecar holding its column names. Hits
+    refresh the file mtime, and the least recently used entries are evicted once
+    the directory exceeds `max_bytes`.
+    """
+
+    def __init__(self, root: Path, sbml_digest: str, max_bytes: int) -> None:
+        self.root = root
+        self.sbml_digest = sbml_digest
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def key(self, config: SimulationConfig, selections: Sequence[str], overrides: Dict[str, float]) -> str:
+        payload = {
+            'sbml': self.sbml_digest,
+            'config': asdict(config),
+            'selections': list(selections),
+            'overrides': sorted((pid, float(val)) for pid, val in overrides.items()),
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def load(self, key: str) -> np.ndarray | None:
+        data_path = self.root / f'{key}.npy'
+        try:
+            colnames = json.loads((self.root / f'{key}.json').read_text(encoding='utf-8'))
+            data = np.load(data_path, mmap_mode='r')
+            os.utime(data_path)
+        except (OSError, ValueError):
+            return None
+        data.colnames = colnames  # mimic RoadRunner's NamedArray
+        return data
+
+    def store(self, key: str, data: Any) -> None:
+        colnames = list(getattr(data, 'colnames', []))
+        # Write to per-process temporaries first so concurrent workers never see partial files.
+        suffix = f'.{os.getpid()}.{threading.get_ident()}.tmp'
+        data_tmp = self.root / f'{key}.npy{suffix}'
+        meta_tmp = self.root / f'{key}.json{suffix}'
+        with open(data_tmp, 'wb') as handle:
+            np.save(handle, np.asarray(data, dtype=float))
+        meta_tmp.write_text(json.dumps(colnames), encoding='utf-8')
+        os.replace(meta_tmp, self.root / f'{key}.json')
+        os.replace(data_tmp, self.root / f'{key}.npy')
+        self.evict()
+
+    def evict(self) -> None:
+        evict_lru(self.root, '*.npy', self.max_bytes, companion_suffixes=('.json',))
+
+
+class CompiledModelCache:
+    """Compiled RoadRunner models saved with `saveState`, keyed by SBML content hash.
+
+    Loading a saved state skips SBML parsing and LLVM compilation. Keys include
+    the RoadRunner version because the state format is not stable across
+    releases. Least recently loaded states are evicted beyond `max_bytes`.
+    """
+
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def state_path(self, sbml_digest: str) -> Path:
+        version = str(getattr(roadrunner, '__version__', 'unknown')).replace(os.sep, '_')
+        return self.root / f'{sbml_digest}-{version}.rrstate'
+
+    def load(self, sbml_path: Path, sbml_digest: str | None = None) -> roadrunner.RoadRunner:
+        state_path = self.state_path(sbml_digest or file_digest(sbml_path))
+        if state_path.exists():
+            rr = roadrunner.RoadRunner()
+            try:
+                rr.loadState(str(state_path))
+                os.utime(state_path)
+                return rr
+            except (OSError, RuntimeError):
+                # Corrupt or incompatible state: drop it and recompile below.
+                try:
+                    state_path.unlink()
+                except FileNotFoundError:
+                    pass
+
+        rr = roadrunner.RoadRunner(str(sbml_path))
+        tmp_path = state_path.with_name(f'{state_path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        try:
+            rr.saveState(str(tmp_path))
+            os.replace(tmp_path, state_path)
+        except (OSError, RuntimeError):
+            tmp_path.unlink(missing_ok=True)
+        else:
+            self.evict()
+        return rr
+
+    def evict(self) -> None:
+        evict_lru(self.root, '*.rrstate', self.max_bytes)
+
+
+def evict_lru(
+    root: Path,
+    pattern: str,
+    max_bytes: int,
+    companion_suffixes: Sequence[str] = (),
+) -> None:
+    """Delete the oldest (by mtime) files matching `pattern` until they fit in `max_bytes`."""
+    entries = []
+    total = 0
+    for path in root.glob(pattern):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+        total += stat.st_size
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        for stale in (path, *(path.with_suffix(suffix) for suffix in companion_suffixes)):
+            try:
+                stale.unlink()
+            except FileNotFoundError:
+                pass
+        total -= size
+
+
+def compile_model(
+    sbml_path: Path,
+    model_cache: CompiledModelCache | None = None,
+    sbml_digest: str = '',
+) -> roadrunner.RoadRunner:
+    """Load an SBML model, going through the compiled-model cache when one is configured."""
+    if model_cache is None:
+        return roadrunner.RoadRunner(str(sbml_path))
+    return model_cache.load(sbml_path, sbml_digest or None)
+
+
 def configure_integrator(rr: roadrunner.RoadRunner, config: SimulationConfig) -> None:
     """Configure the requested integrator and harmonise settings across modes."""
     desired = config.integrator.lower()
@@ -119,17 +502,26 @@ def infer_observables(rr: roadrunner.RoadRunner) -> List[str]:
     return observables
 
 
+def infer_kinetic_parameters(rr: roadrunner.RoadRunner) -> List[str]:
+    """Default differentiation targets: non-observable parameters prefixed with k_."""
+    kinetic_candidates = [pid for pid in rr.model.getGlobalParameterIds() if not pid.startswith('obs_')]
+    param_names = [pid for pid in kinetic_candidates if pid.startswith('k_')]
+    if not param_names:
+        raise RuntimeError('Could not infer kinetic parameters. Specify them via --parameters.')
+    return param_names
+
+
 def snapshot_parameters(rr: roadrunner.RoadRunner, ids: Sequence[str]) -> Dict[str, float]:
     return {pid: float(cast(float, rr.getValue(pid))) for pid in ids}
 
 
-def normalise_initial_conditions(rr: roadrunner.RoadRunner) -> None:
+def normalise_initial_conditions(rr: roadrunner.RoadRunner, species_map: Dict[str, str]) -> None:
     """Reset floating species to BNGL seed-state values prior to each simulation."""
-    if not SPECIES_ID_BY_NAME:
+    if not species_map:
         return
 
     def set_init(name: str, value: float) -> None:
-        sid = SPECIES_ID_BY_NAME.get(name)
+        sid = species_map.get(name)
         if sid is not None:
             try:
                 rr.setValue(f'init({sid})', value)
@@ -151,43 +543,513 @@ def normalise_initial_conditions(rr: roadrunner.RoadRunner) -> None:
     set_init('E(s!1).S(e!1)', 0.0)
 
 
-def load_species_name_map(sbml_path: Path) -> Dict[str, str]:
-    """Build a lookup from SBML species names to IDs, retaining IDs as fallbacks."""
-    mapping: Dict[str, str] = {}
+@dataclass(frozen=True)
+class SBMLIndex:
+    """Ids collected from an SBML document by `index_sbml`."""
+
+    species: Dict[str, str] = field(default_factory=dict)  # id -> name (id when unnamed)
+    parameters: Tuple[str, ...] = ()  # global parameters only
+    assignment_rules: Tuple[str, ...] = ()  # assignment-rule variables
+
+    def species_name_map(self) -> Dict[str, str]:
+        """Lookup from species names to IDs, retaining IDs as fallbacks."""
+        mapping: Dict[str, str] = {}
+        for sid, name in self.species.items():
+            mapping[name] = sid
+        mapping.update((sid, sid) for sid in self.species)
+        return mapping
+
+
+# Bump when the fields collected by `index_sbml` change, to invalidate sidecar indexes.
+SBML_INDEX_VERSION = 1
+
+
+def index_sbml(sbml_path: Path) -> SBMLIndex:
+    """Collect species, global parameter and assignment-rule ids in one streaming pass.
+
+    Uses `iterparse` and drops every element once it is finished, so memory stays
+    flat even for multi-hundred-MB exports. Unparseable files yield an empty index.
+    """
+    species: Dict[str, str] = {}
+    parameters: List[str] = []
+    rules: List[str] = []
+    stack: List[ET.Element] = []
+    path: List[str] = ['', '']  # local tag names of the open elements, padded for parent lookups
+    local_names: Dict[str, str] = {}
     try:
-        tree = ET.parse(sbml_path)
+        for event, elem in ET.iterparse(sbml_path, events=('start', 'end')):
+            if event == 'end':
+                stack.pop()
+                path.pop()
+                elem.clear()
+                if stack:
+                    del stack[-1][:]  # finished siblings are never revisited
+                continue
+            tag = local_names.get(elem.tag)
+            if tag is None:
+                tag = local_names[elem.tag] = elem.tag.rsplit('}', 1)[-1]
+            parent, grandparent = path[-1], path[-2]
+            stack.append(elem)
+            path.append(tag)
+            if tag == 'species' and parent == 'listOfSpecies':
+                sid = elem.attrib.get('id')
+                if sid:
+                    species[sid] = elem.attrib.get('name', sid)
+            elif tag == 'parameter' and parent == 'listOfParameters' and grandparent == 'model':
+                sid = elem.attrib.get('id')
+                if sid:
+                    parameters.append(sid)
+            elif tag == 'assignmentRule' and elem.attrib.get('variable'):
+                rules.append(elem.attrib['variable'])
     except ET.ParseError:
-        return mapping
+        return SBMLIndex()
+    return SBMLIndex(species, tuple(parameters), tuple(rules))
 
-    root = tree.getroot()
-    if not root.tag.startswith('{'):
-        return mapping
-    ns = {'sbml': root.tag.split('}', 1)[0][1:]}
-    for species in root.findall('.//sbml:listOfSpecies/sbml:species', ns):
-        sid = species.attrib.get('id')
-        if not sid:
+
+def load_sbml_index(sbml_path: Path, sbml_digest: str | None = None) -> SBMLIndex:
+    """`index_sbml` with a JSON sidecar cache next to the SBML file.
+
+    The sidecar (``<file>.index.json``) is trusted while the file's mtime and size
+    are unchanged; otherwise it is reused only if the content hash still matches.
+    Unwritable directories simply skip the cache.
+    """
+    sbml_path = Path(sbml_path)
+    sidecar = sbml_path.with_name(f'{sbml_path.name}.index.json')
+    stat = sbml_path.stat()
+    stamp = {'version': SBML_INDEX_VERSION, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+    try:
+        cached = json.loads(sidecar.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        cached = None
+
+    if isinstance(cached, dict) and cached.get('version') == SBML_INDEX_VERSION:
+        fresh = cached.get('mtime_ns') == stamp['mtime_ns'] and cached.get('size') == stamp['size']
+        if fresh or cached.get('digest') == (sbml_digest or file_digest(sbml_path)):
+            index = SBMLIndex(
+                dict(cached['species']), tuple(cached['parameters']), tuple(cached['assignment_rules'])
+            )
+            if not fresh:
+                _write_sbml_index(sidecar, {**cached, **stamp})
+            return index
+
+    index = index_sbml(sbml_path)
+    if index.species or index.parameters:
+        record = {**stamp, 'digest': sbml_digest or file_digest(sbml_path), **asdict(index)}
+        _write_sbml_index(sidecar, record)
+    return index
+
+
+def _write_sbml_index(sidecar: Path, record: Dict[str, Any]) -> None:
+    tmp = sidecar.with_name(f'{sidecar.name}.{os.getpid()}.tmp')
+    try:
+        tmp.write_text(json.dumps(record), encoding='utf-8')
+        os.replace(tmp, sidecar)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+
+
+def load_species_name_map(sbml_path: Path) -> Dict[str, str]:
+    """Build a lookup from SBML species names to IDs, retaining IDs as fallbacks."""
+    return load_sbml_index(sbml_path).species_name_map()
+
+
+class _LabelledArray(np.ndarray):
+    """Plain array carrying `colnames`, like RoadRunner's NamedArray."""
+
+    colnames: List[str]
+
+
+def _simulate_at_times(rr: roadrunner.RoadRunner, config: SimulationConfig, selections: Sequence[str]) -> Any:
+    """Integrate from `config.start` but return only the rows at `config.times`."""
+    times = [float(t) for t in cast(Tuple[float, ...], config.times)]
+    lead = times[0] > config.start
+    if lead:
+        times.insert(0, config.start)  # RoadRunner starts integrating at the first output time
+    kwargs: Dict[str, Any] = {'times': times}
+    if selections:
+        kwargs['selections'] = list(selections)
+    result = rr.simulate(**kwargs)
+    if not lead:
+        return result
+    trimmed = np.asarray(result)[1:].view(_LabelledArray)
+    trimmed.colnames = list(result.colnames)
+    return trimmed
+
+
+def load_observation_times(path: Path) -> Tuple[float, ...]:
+    """Sorted, de-duplicated sampling times from a CSV.
+
+    Uses the column named ``time`` when there is a header row, otherwise the first
+    column; blank or non-numeric cells are skipped.
+    """
+    with open(path, newline='', encoding='utf-8') as handle:
+        rows = [row for row in csv.reader(handle) if row]
+    if not rows:
+        raise ValueError(f'No observation times in {path}')
+    column = 0
+    try:
+        float(rows[0][0])
+    except ValueError:
+        header = [cell.strip().lower() for cell in rows[0]]
+        column = header.index('time') if 'time' in header else 0
+        rows = rows[1:]
+    times = set()
+    for row in rows:
+        try:
+            times.add(float(row[column]))
+        except (IndexError, ValueError):
             continue
-        name = species.attrib.get('name', sid)
-        mapping[name] = sid
-        mapping[sid] = sid  # allow direct ID lookup as a fallback
-    return mapping
+    if not times:
+        raise ValueError(f'No observation times in {path}')
+    return tuple(sorted(times))
 
 
 def simulate_model(
     rr: roadrunner.RoadRunner,
     config: SimulationConfig,
     param_overrides: Dict[str, float] | None = None,
+    context: ModelContext | None = None,
+    trace_attrs: Dict[str, Any] | None = None,
 ) -> Any:
-    rr.resetAll()
-    if TIMECOURSE_SELECTIONS:
-        rr.timeCourseSelections = TIMECOURSE_SELECTIONS
-        rr.selections = TIMECOURSE_SELECTIONS
-    normalise_initial_conditions(rr)
-    if param_overrides:
-        rr.setValues(param_overrides)
-    if TIMECOURSE_SELECTIONS:
-        return rr.simulate(config.start, config.end, config.points, TIMECOURSE_SELECTIONS)
-    return rr.simulate(config.start, config.end, config.points)
+    context = context or ModelContext()
+    selections = list(context.selections)
+    cache = context.cache
+    tracer = context.tracer
+    with trace_span(tracer, 'reset'):
+        rr.resetAll()
+        if selections:
+            rr.timeCourseSelections = selections
+            rr.selections = selections
+    with trace_span(tracer, 'normalise_initial_conditions'):
+        normalise_initial_conditions(rr, context.species_map)
+
+    cache_key = None
+    if cache is not None:
+        # Key on overrides that actually change the model so parameter subsets share entries.
+        effective = {
+            pid: val for pid, val in (param_overrides or {}).items()
+            if float(cast(float, rr.getValue(pid))) != val
+        }
+        cache_key = cache.key(config, selections, effective)
+        cached = cache.load(cache_key)
+        if cached is not None:
+            with trace_span(tracer, 'simulate', cache_hit=True, **(trace_attrs or {})):
+                return cached
+
+    with trace_span(tracer, 'simulate', cache_hit=False, **(trace_attrs or {})) as event:
+        if param_overrides:
+            rr.setValues(param_overrides)
+        if config.times is not None:
+            result = _simulate_at_times(rr, config, selections)
+        elif selections:
+            result = rr.simulate(config.start, config.end, config.points, selections)
+        else:
+            result = rr.simulate(config.start, config.end, config.points)
+        if tracer is not None:
+            event['output_rows'] = int(np.shape(result)[0])
+            event.update(solver_statistics(rr))
+
+    if cache is not None and cache_key is not None:
+        cache.store(cache_key, result)
+    return result
+
+
+def perturbed_parameters(
+    base_params: Dict[str, float],
+    pname: str,
+    rel_eps: float,
+) -> Tuple[Dict[str, float], Dict[str, float], float]:
+    """Plus / minus parameter sets and the step size for a central difference in `pname`."""
+    base_val = base_params[pname]
+    # Mirror Node script: relative perturbation with lower bound 1e-8.
+    eps = max(1e-8, abs(base_val) * rel_eps, 1e-8)
+
+    plus_params = dict(base_params)
+    plus_params[pname] = base_val + eps
+
+    minus_params = dict(base_params)
+    minus_params[pname] = max(0.0, base_val - eps)
+    return plus_params, minus_params, eps
+
+
+def perturbed_observables(
+    rr: roadrunner.RoadRunner,
+    config: SimulationConfig,
+    pname: str,
+    base_params: Dict[str, float],
+    obs_columns: Sequence[int],
+    rel_eps: float,
+    context: ModelContext | None = None,
+) -> np.ndarray:
+    """Observables of the plus-perturbed run, flattened like a Jacobian column (screening stage)."""
+    plus_params, _, _ = perturbed_parameters(base_params, pname, rel_eps)
+    plus_data = np.asarray(
+        simulate_model(
+            rr, config, plus_params, context, {'parameter': pname, 'direction': 'plus', 'stage': 'screen'}
+        )
+    )
+    return plus_data[:, obs_columns].reshape(-1)
+
+
+def jacobian_column(
+    rr: roadrunner.RoadRunner,
+    config: SimulationConfig,
+    pname: str,
+    base_params: Dict[str, float],
+    obs_columns: Sequence[int],
+    rel_eps: float,
+    context: ModelContext | None = None,
+    plus_observables: np.ndarray | None = None,
+) -> np.ndarray:
+    """Central-difference derivatives of all observables with respect to one parameter.
+
+    The result is flattened time-major (observables vary fastest), matching the
+    row layout of the Jacobian assembled by `build_jacobian`. Passing the
+    flattened `plus_observables` from a screening run skips the plus simulation.
+    """
+    plus_params, minus_params, eps = perturbed_parameters(base_params, pname, rel_eps)
+
+    if plus_observables is None:
+        plus_data = np.asarray(
+            simulate_model(rr, config, plus_params, context, {'parameter': pname, 'direction': 'plus'})
+        )
+        plus_obs = plus_data[:, obs_columns]
+    else:
+        plus_obs = np.asarray(plus_observables).reshape(-1, len(obs_columns))
+    minus_data = np.asarray(
+        simulate_model(rr, config, minus_params, context, {'parameter': pname, 'direction': 'minus'})
+    )
+
+    denom = plus_params[pname] - minus_params[pname] or eps
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        deriv = (plus_obs - minus_data[:, obs_columns]) / denom
+    deriv[~np.isfinite(deriv)] = 0.0
+    return deriv.reshape(-1)
+
+
+def screen_columns(
+    J: np.ndarray,
+    baseline: np.ndarray,
+    param_names: Sequence[str],
+    base_params: Dict[str, float],
+    rel_eps: float,
+    threshold: float,
+) -> np.ndarray:
+    """Decide which parameters get central differences after the screening stage.
+
+    Column j of `J` holds the flattened plus-run observables of parameter j. The
+    one-sided, parameter-scaled sensitivity norm ``|theta_j| * ||dy/dtheta_j||``
+    is compared against `threshold` times the largest norm; columns that fall
+    below it are zeroed (no information) and reported as False.
+    """
+    norms = np.zeros(len(param_names))
+    for j, pname in enumerate(param_names):
+        plus_params, _, eps = perturbed_parameters(base_params, pname, rel_eps)
+        step = plus_params[pname] - base_params[pname] or eps
+        diff = np.asarray(J[:, j]) - baseline
+        scale = abs(base_params[pname]) or eps
+        norms[j] = float(np.linalg.norm(diff[np.isfinite(diff)])) / step * scale
+    keep = norms >= threshold * norms.max() if norms.size and norms.max() > 0 else np.zeros(norms.size, dtype=bool)
+    for j in np.flatnonzero(~keep):
+        J[:, j] = 0.0
+    return keep
+
+
+def _init_jacobian_worker(
+    sbml_path: str,
+    config: SimulationConfig,
+    context: ModelContext,
+    buffer_path: str,
+) -> None:
+    """Compile a private RoadRunner instance and attach to the shared Jacobian buffer."""
+    global _WORKER_RR, _WORKER_CONTEXT, _WORKER_JACOBIAN
+    _WORKER_CONTEXT = context
+    if context.tracer is not None:
+        context.tracer.drain()  # forked workers inherit the parent's events; keep only their own
+    with trace_span(context.tracer, 'model_load'):
+        _WORKER_RR = compile_model(Path(sbml_path), context.model_cache, context.sbml_digest)
+    configure_integrator(_WORKER_RR, config)
+    if context.selections:
+        _WORKER_RR.timeCourseSelections = list(context.selections)
+    _WORKER_JACOBIAN = np.load(buffer_path, mmap_mode='r+')
+
+
+def _jacobian_column_task(
+    column: int,
+    pname: str,
+    config: SimulationConfig,
+    base_params: Dict[str, float],
+    obs_columns: Sequence[int],
+    rel_eps: float,
+    stage: str = 'central',
+) -> Tuple[int, List[Dict[str, Any]]]:
+    """Fill one buffer column: plus-run observables ('screen') or central differences.
+
+    In the 'reuse' stage the column already holds the screening run, which stands
+    in for the plus simulation.
+    """
+    if _WORKER_RR is None or _WORKER_JACOBIAN is None or _WORKER_CONTEXT is None:
+        raise RuntimeError('Jacobian worker used before initialisation.')
+    if stage == 'screen':
+        values = perturbed_observables(
+            _WORKER_RR, config, pname, base_params, obs_columns, rel_eps, _WORKER_CONTEXT
+        )
+    else:
+        plus_observables = np.array(_WORKER_JACOBIAN[:, column]) if stage == 'reuse' else None
+        values = jacobian_column(
+            _WORKER_RR, config, pname, base_params, obs_columns, rel_eps, _WORKER_CONTEXT, plus_observables
+        )
+    _WORKER_JACOBIAN[:, column] = values
+    _WORKER_JACOBIAN.flush()
+    tracer = _WORKER_CONTEXT.tracer
+    return column, tracer.drain() if tracer is not None else []
+
+
+def open_jacobian_file(path: Path, shape: Tuple[int, int]) -> np.ndarray:
+    """Create a memory-mapped `.npy` Jacobian.
+
+    Column-major layout keeps each perturbation column contiguous on disk.
+    """
+    return np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=shape, fortran_order=True)
+
+
+class JacobianCheckpoint:
+    """Resumable finite-difference sweep: memory-mapped J plus a progress manifest.
+
+    ``jacobian.npy`` holds the columns; ``progress.json`` records a fingerprint of
+    the inputs (model hash, config, parameters, observables, step sizes), the
+    state of every finished column ('plus' once its screening run is stored,
+    'done' once final) and, with screening, which parameters were kept. A column
+    is only marked after its data has been flushed, so a killed run loses at
+    most the columns in flight.
+    """
+
+    def __init__(self, root: Path, fingerprint: Dict[str, Any]) -> None:
+        self.root = Path(root)
+        self.jacobian_path = self.root / 'jacobian.npy'
+        self.manifest_path = self.root / 'progress.json'
+        # Round-trip through JSON so it compares equal to the stored copy.
+        self.fingerprint = json.loads(json.dumps(fingerprint, sort_keys=True))
+        self.columns: Dict[str, str] = {}
+        self.kept: List[str] | None = None
+        self._shape: Tuple[int, int] = (0, 0)
+
+    def open(self, shape: Tuple[int, int], resume: bool = False) -> np.ndarray:
+        """Return J, reusing the stored columns when `resume` and the inputs match."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._shape = shape
+        if resume:
+            try:
+                manifest = json.loads(self.manifest_path.read_text(encoding='utf-8'))
+                J = np.load(self.jacobian_path, mmap_mode='r+')
+            except (OSError, ValueError):
+                manifest, J = None, None
+            if manifest is not None and J is not None:
+                if manifest.get('fingerprint') == self.fingerprint and J.shape == shape:
+                    self.columns = dict(manifest.get('columns', {}))
+                    self.kept = manifest.get('kept')
+                    return J
+        self.columns, self.kept = {}, None
+        J = open_jacobian_file(self.jacobian_path, shape)
+        self._write()
+        return J
+
+    def state(self, pname: str) -> str | None:
+        return self.columns.get(pname)
+
+    def mark(self, pnames: Sequence[str], state: str) -> None:
+        self.columns.update((pname, state) for pname in pnames)
+        self._write()
+
+    def record_screening(self, kept: Sequence[str], screened_out: Sequence[str]) -> None:
+        self.kept = list(kept)
+        self.mark(screened_out, 'done')
+
+    def _write(self) -> None:
+        manifest = {
+            'fingerprint': self.fingerprint,
+            'shape': list(self._shape),
+            'columns': self.columns,
+            'kept': self.kept,
+        }
+        tmp = self.manifest_path.with_name(f'{self.manifest_path.name}.{os.getpid()}.tmp')
+        tmp.write_text(json.dumps(manifest, indent=2), encoding='utf-8')
+        os.replace(tmp, self.manifest_path)
+
+
+def _screen_and_record(
+    J: np.ndarray,
+    baseline: np.ndarray,
+    param_names: Sequence[str],
+    base_params: Dict[str, float],
+    rel_eps: float,
+    screen_threshold: float,
+    context: ModelContext,
+    checkpoint: JacobianCheckpoint | None,
+) -> np.ndarray:
+    """Screening decision, reused from the checkpoint when a resumed run already made it."""
+    if checkpoint is not None and checkpoint.kept is not None:
+        return np.array([pname in checkpoint.kept for pname in param_names], dtype=bool)
+    with trace_span(context.tracer, 'screening', threshold=screen_threshold) as event:
+        keep = screen_columns(J, baseline, param_names, base_params, rel_eps, screen_threshold)
+        event['screened_out'] = [param_names[j] for j in np.flatnonzero(~keep)]
+    if isinstance(J, np.memmap):
+        J.flush()
+    if checkpoint is not None:
+        checkpoint.record_screening(
+            [param_names[j] for j in np.flatnonzero(keep)], [param_names[j] for j in np.flatnonzero(~keep)]
+        )
+    return keep
+
+
+def _build_jacobian_parallel(
+    sbml_path: Path,
+    config: SimulationConfig,
+    context: ModelContext,
+    param_names: Sequence[str],
+    base_params: Dict[str, float],
+    obs_columns: Sequence[int],
+    rel_eps: float,
+    buffer_path: Path,
+    workers: int,
+    baseline: np.ndarray | None = None,
+    screen_threshold: float = 0.0,
+    checkpoint: JacobianCheckpoint | None = None,
+) -> None:
+    """Fill the Jacobian file at `buffer_path` from a pool of worker processes."""
+    initargs = (str(sbml_path), config, context, str(buffer_path))
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(param_names)),
+        initializer=_init_jacobian_worker,
+        initargs=initargs,
+    ) as pool:
+
+        def run_stage(columns: Sequence[int], stage: str, skip: Sequence[str]) -> None:
+            futures = {
+                pool.submit(
+                    _jacobian_column_task, j, param_names[j], config, base_params, obs_columns, rel_eps, stage
+                ): j
+                for j in columns
+                if checkpoint is None or checkpoint.state(param_names[j]) not in skip
+            }
+            for future in as_completed(futures):
+                _, events = future.result()
+                if context.tracer is not None:
+                    context.tracer.extend(events)
+                if checkpoint is not None:
+                    checkpoint.mark([param_names[futures[future]]], 'plus' if stage == 'screen' else 'done')
+
+        if screen_threshold <= 0 or baseline is None:
+            run_stage(range(len(param_names)), 'central', ('done',))
+            return
+        run_stage(range(len(param_names)), 'screen', ('plus', 'done'))
+        J = np.load(buffer_path, mmap_mode='r+')
+        keep = _screen_and_record(
+            J, baseline, param_names, base_params, rel_eps, screen_threshold, context, checkpoint
+        )
+        del J
+        run_stage(np.flatnonzero(keep).tolist(), 'reuse', ('done',))
 
 
 def build_jacobian(
@@ -197,47 +1059,434 @@ def build_jacobian(
     base_params: Dict[str, float],
     observables: Sequence[str],
     rel_eps: float,
+    workers: int = 1,
+    sbml_path: Path | None = None,
+    out_path: Path | None = None,
+    context: ModelContext | None = None,
+    screen_threshold: float = 0.0,
+    checkpoint: JacobianCheckpoint | None = None,
+    resume: bool = False,
 ) -> np.ndarray:
-    baseline = simulate_model(rr, config)
-    obs_indices = {name: baseline.colnames.index(name) for name in observables}
+    """Assemble J with central differences, optionally across `workers` processes.
+
+    Parallel mode needs `sbml_path` so each worker can compile its own RoadRunner
+    instance; columns are written straight into a shared memory-mapped buffer.
+    When `out_path` is given, J is returned as a memory-mapped `.npy` file there
+    instead of an in-memory array.
+
+    A positive `screen_threshold` enables two-stage screening: every parameter
+    first gets a single plus-perturbed run, and only those whose one-sided
+    sensitivity clears the threshold (see `screen_columns`) get the matching
+    minus run. The others keep a zero column and so come out unidentifiable.
+
+    With a `checkpoint`, J lives in the checkpoint directory (instead of
+    `out_path`) and every finished column is recorded; `resume` skips the
+    columns a previous run with the same inputs already completed.
+    """
+    context = context or ModelContext()
+    baseline = simulate_model(
+        rr, config, dict(base_params), context, {'parameter': None, 'direction': 'baseline'}
+    )
+    obs_columns = [baseline.colnames.index(name) for name in observables]
+    baseline_obs = np.asarray(baseline)[:, obs_columns].reshape(-1)
 
     time_count = baseline.shape[0]
     num_obs = len(observables)
     p = len(param_names)
-    J = np.zeros((time_count * num_obs, p))
+    shape = (time_count * num_obs, p)
+
+    if workers > 1 and p > 1:
+        if sbml_path is None:
+            raise ValueError('Parallel Jacobian assembly requires the SBML path.')
+        parallel_args = (sbml_path, config, context, param_names, base_params, obs_columns, rel_eps)
+        if checkpoint is not None:
+            checkpoint.open(shape, resume).flush()
+            _build_jacobian_parallel(
+                *parallel_args, checkpoint.jacobian_path, workers, baseline_obs, screen_threshold, checkpoint
+            )
+            return np.load(checkpoint.jacobian_path, mmap_mode='r+')
+        if out_path is not None:
+            open_jacobian_file(out_path, shape).flush()
+            _build_jacobian_parallel(*parallel_args, out_path, workers, baseline_obs, screen_threshold)
+            return np.load(out_path, mmap_mode='r+')
+        with tempfile.TemporaryDirectory(prefix='fim-jacobian-') as tmp_dir:
+            buffer_path = Path(tmp_dir) / 'jacobian.npy'
+            open_jacobian_file(buffer_path, shape).flush()
+            _build_jacobian_parallel(*parallel_args, buffer_path, workers, baseline_obs, screen_threshold)
+            return np.array(np.load(buffer_path))
+
+    if checkpoint is not None:
+        J = checkpoint.open(shape, resume)
+    else:
+        J = open_jacobian_file(out_path, shape) if out_path is not None else np.zeros(shape)
+
+    def finished(j: int, state: str) -> None:
+        if checkpoint is not None:
+            J.flush()
+            checkpoint.mark([param_names[j]], state)
+
+    def pending(j: int, skip: Sequence[str]) -> bool:
+        return checkpoint is None or checkpoint.state(param_names[j]) not in skip
+
+    if screen_threshold <= 0:
+        for j, pname in enumerate(param_names):
+            if pending(j, ('done',)):
+                J[:, j] = jacobian_column(rr, config, pname, base_params, obs_columns, rel_eps, context)
+                finished(j, 'done')
+        return J
 
     for j, pname in enumerate(param_names):
-        base_val = base_params[pname]
-        # Mirror Node script: relative perturbation with lower bound 1e-8.
-        eps = max(1e-8, abs(base_val) * rel_eps, 1e-8)
+        if pending(j, ('plus', 'done')):
+            J[:, j] = perturbed_observables(rr, config, pname, base_params, obs_columns, rel_eps, context)
+            finished(j, 'plus')
+    keep = _screen_and_record(J, baseline_obs, param_names, base_params, rel_eps, screen_threshold, context, checkpoint)
+    for j in np.flatnonzero(keep):
+        if pending(j, ('done',)):
+            J[:, j] = jacobian_column(
+                rr, config, param_names[j], base_params, obs_columns, rel_eps, context, np.array(J[:, j])
+            )
+            finished(j, 'done')
+    return J
+
+
+def observable_species_weights(
+    rr: roadrunner.RoadRunner,
+    observables: Sequence[str],
+    species_ids: Sequence[str],
+    species_map: Dict[str, str] | None = None,
+) -> np.ndarray:
+    """Recover the linear species-to-observable map behind the obs_ assignment rules.
 
-        plus_params = dict(base_params)
-        plus_params[pname] = base_val + eps
+    BioNetGen exports observables as weighted sums of species, so bumping each
+    species by one unit and re-reading the rules yields the weights exactly
+    without integrating anything.
+    """
+    rr.resetAll()
+    normalise_initial_conditions(rr, species_map or {})
+    base_obs = np.array([float(rr.getValue(name)) for name in observables])
+    weights = np.zeros((len(observables), len(species_ids)))
+    for s, sid in enumerate(species_ids):
+        amount = float(rr.getValue(sid))
+        rr.setValue(sid, amount + 1.0)
+        weights[:, s] = [float(rr.getValue(name)) for name in observables]
+        rr.setValue(sid, amount)
+        weights[:, s] -= base_obs
+    return weights
+
+
+def _forward_sensitivities(
+    rr: roadrunner.RoadRunner,
+    config: SimulationConfig,
+    param_names: Sequence[str],
+    base_params: Dict[str, float],
+    observables: Sequence[str],
+    context: ModelContext,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Run one forward-sensitivity integration; returns (dx/dp, observable weights).
+
+    dx/dp is shaped (time, parameter, species) with parameters in `param_names`
+    order. RoadRunner hands the whole tensor back in one array.
+    """
+    if config.times is not None:
+        raise ValueError('Forward sensitivities need the uniform time grid; use --method fd with explicit observation times.')
+    try:
+        rr.setSensitivitySolver('forward')
+    except (AttributeError, RuntimeError) as exc:
+        raise RuntimeError(
+            'This libroadrunner build has no forward-sensitivity solver; use --method fd.'
+        ) from exc
+    solver = rr.getSensitivitySolver()
+    for key, value in (('relative_tolerance', config.rel_tol), ('absolute_tolerance', config.abs_tol)):
+        try:
+            solver.setValue(key, value)
+        except RuntimeError:
+            pass
 
-        minus_params = dict(base_params)
-        minus_params[pname] = max(0.0, base_val - eps)
+    rr.resetAll()
+    normalise_initial_conditions(rr, context.species_map)
+    rr.setValues(base_params)
+    with trace_span(context.tracer, 'sensitivity_solve', parameters=len(param_names)):
+        _, sens, rownames, colnames = rr.timeSeriesSensitivities(
+            config.start, config.end, config.points, list(param_names)
+        )
+    sens = np.asarray(sens, dtype=float)
+    row_index = {str(name): i for i, name in enumerate(rownames)}
+    sens = sens[:, [row_index[pname] for pname in param_names], :]
+    species_ids = [str(name).strip('[]') for name in colnames]
+    return sens, observable_species_weights(rr, observables, species_ids, context.species_map)
 
-        plus_data = simulate_model(rr, config, plus_params)
-        minus_data = simulate_model(rr, config, minus_params)
 
-        denom = plus_params[pname] - minus_params[pname] or eps
+def _sensitivity_row_blocks(
+    sens: np.ndarray, weights: np.ndarray, chunk_times: int
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """Yield (first time index, rows of J) for `chunk_times` time points at a time."""
+    step = max(1, chunk_times)
+    for t0 in range(0, sens.shape[0], step):
+        block = np.einsum('os,tps->top', weights, sens[t0:t0 + step]).reshape(-1, sens.shape[1])
+        block[~np.isfinite(block)] = 0.0
+        yield t0, block
 
-        for ti in range(time_count):
-            row_offset = ti * num_obs
-            for oi, obs_name in enumerate(observables):
-                idx = obs_indices[obs_name]
-                deriv = (plus_data[ti, idx] - minus_data[ti, idx]) / denom
-                J[row_offset + oi, j] = deriv if np.isfinite(deriv) else 0.0
 
+def build_jacobian_sensitivities(
+    rr: roadrunner.RoadRunner,
+    config: SimulationConfig,
+    param_names: Sequence[str],
+    base_params: Dict[str, float],
+    observables: Sequence[str],
+    out_path: Path | None = None,
+    chunk_times: int = 256,
+    context: ModelContext | None = None,
+) -> np.ndarray:
+    """Assemble J from a single forward-sensitivity integration.
+
+    RoadRunner reports dx/dp for the floating species; observables are linear in
+    the species, so dY/dp follows from the weights found by
+    `observable_species_weights`. Rows use the same time-major layout as
+    `build_jacobian`; with `out_path` they are written to a memory-mapped `.npy`
+    in blocks of `chunk_times` time points.
+    """
+    context = context or ModelContext()
+    sens, weights = _forward_sensitivities(rr, config, param_names, base_params, observables, context)
+    num_obs = len(observables)
+    shape = (sens.shape[0] * num_obs, len(param_names))
+    J = open_jacobian_file(out_path, shape) if out_path is not None else np.empty(shape)
+    for t0, block in _sensitivity_row_blocks(sens, weights, chunk_times):
+        J[t0 * num_obs:t0 * num_obs + block.shape[0]] = block
     return J
 
 
-def compute_fim(J: np.ndarray) -> FIMDecomposition:
-    F = J.T @ J
+def accumulate_fim_sensitivities(
+    rr: roadrunner.RoadRunner,
+    config: SimulationConfig,
+    param_names: Sequence[str],
+    base_params: Dict[str, float],
+    observables: Sequence[str],
+    chunk_times: int = 256,
+    context: ModelContext | None = None,
+) -> np.ndarray:
+    """Form F = J^T J from forward sensitivities without materialising J.
+
+    Each block of `chunk_times` time points is projected onto the observables
+    and folded into F, so only one block of J rows exists at a time. The
+    sensitivity tensor RoadRunner returns is still held in full.
+    """
+    context = context or ModelContext()
+    sens, weights = _forward_sensitivities(rr, config, param_names, base_params, observables, context)
+    F = np.zeros((len(param_names), len(param_names)))
+    for _, block in _sensitivity_row_blocks(sens, weights, chunk_times):
+        F += block.T @ block
+    return F
+
+
+def conservation_laws(rr: roadrunner.RoadRunner) -> np.ndarray:
+    """Rows spanning the left null space of the stoichiometry matrix (conserved moieties)."""
+    N = np.asarray(rr.getFullStoichiometryMatrix(), dtype=float)
+    if N.size == 0:
+        return np.zeros((0, N.shape[0]))
+    U, singular, _ = np.linalg.svd(N)
+    tol = max(N.shape) * np.finfo(float).eps * singular[0]
+    rank = int(np.sum(singular > tol))
+    return U[:, rank:].T
+
+
+def build_jacobian_steady_state(
+    rr: roadrunner.RoadRunner,
+    config: SimulationConfig,
+    param_names: Sequence[str],
+    base_params: Dict[str, float],
+    observables: Sequence[str],
+    rel_eps: float,
+    out_path: Path | None = None,
+    context: ModelContext | None = None,
+) -> np.ndarray:
+    """Steady-state observable sensitivities via the implicit function theorem.
+
+    Solves once for x* with f(x*, p) = 0, then obtains dx*/dp from the linear
+    system [df/dx; L] dx*/dp = [-df/dp; dT/dp], where the rows of L are the
+    network's conservation laws and T = L x0 are the moiety totals fixed by the
+    initial state. dT/dp is non-zero for parameters that seed initial amounts
+    (E_0, S_0). df/dp and dx0/dp come from central differences of the rate vector
+    at fixed x* and of the seeded initial amounts, so no parameter needs an
+    integration. The result has one row per observable, i.e. a single
+    observation "time point"; with `out_path` it is written to a memory-mapped
+    `.npy` like the other builders.
+    """
+    context = context or ModelContext()
+    laws = conservation_laws(rr)
+
+    def initial_amounts(params: Dict[str, float]) -> np.ndarray:
+        rr.resetAll()
+        rr.setValues(params)
+        normalise_initial_conditions(rr, context.species_map)
+        return np.array([float(rr.getValue(f'init({sid})')) for sid in species_ids])
+
+    species_ids = list(rr.model.getFloatingSpeciesIds())
+    restore_moieties = bool(laws.shape[0]) and not rr.conservedMoietyAnalysis
+    if restore_moieties:
+        # RoadRunner's Newton solver needs the reduced system when moieties are conserved.
+        rr.conservedMoietyAnalysis = True
+    try:
+        dtdp = np.zeros((laws.shape[0], len(param_names)))
+        if laws.shape[0]:
+            for j, pname in enumerate(param_names):
+                base_val = base_params[pname]
+                eps = max(1e-8, abs(base_val) * rel_eps, 1e-8)
+                upper, lower = base_val + eps, max(0.0, base_val - eps)
+                plus_init = initial_amounts({**base_params, pname: upper})
+                minus_init = initial_amounts({**base_params, pname: lower})
+                dtdp[:, j] = laws @ (plus_init - minus_init) / ((upper - lower) or eps)
+
+        initial_amounts(base_params)
+        with trace_span(context.tracer, 'steady_state_solve'):
+            residual = rr.steadyState()
+        if residual is not None and not np.isfinite(residual):
+            raise RuntimeError(f'Steady-state solve did not converge (residual {residual}).')
+
+        with trace_span(context.tracer, 'steady_state_linearisation'):
+            dfdx = np.asarray(rr.getFullJacobian(), dtype=float)
+            dfdp = np.zeros((len(species_ids), len(param_names)))
+            for j, pname in enumerate(param_names):
+                base_val = base_params[pname]
+                eps = max(1e-8, abs(base_val) * rel_eps, 1e-8)
+                upper, lower = base_val + eps, max(0.0, base_val - eps)
+                rr.setValue(pname, upper)
+                plus_rates = np.asarray(rr.model.getFloatingSpeciesAmountRates(), dtype=float)
+                rr.setValue(pname, lower)
+                minus_rates = np.asarray(rr.model.getFloatingSpeciesAmountRates(), dtype=float)
+                rr.setValue(pname, base_val)
+                dfdp[:, j] = (plus_rates - minus_rates) / ((upper - lower) or eps)
+
+            system = np.vstack([dfdx, laws])
+            rhs = np.vstack([-dfdp, dtdp])
+            dxdp, *_ = np.linalg.lstsq(system, rhs, rcond=None)
+
+        weights = observable_species_weights(rr, observables, species_ids, context.species_map)
+    finally:
+        if restore_moieties:
+            rr.conservedMoietyAnalysis = False
+
+    dydp = weights @ dxdp
+    dydp[~np.isfinite(dydp)] = 0.0
+    if out_path is None:
+        return dydp
+    J = open_jacobian_file(out_path, dydp.shape)
+    J[:] = dydp
+    return J
+
+
+def accumulate_fim(J: np.ndarray, chunk_rows: int = 65536) -> np.ndarray:
+    """Form F = J^T J from row blocks so at most `chunk_rows` rows of J are resident.
+
+    Rows are time-major, so passing a multiple of the observable count makes each
+    block a contiguous slice of the time course.
+    """
+    p = J.shape[1]
+    F = np.zeros((p, p))
+    step = max(1, chunk_rows)
+    for start in range(0, J.shape[0], step):
+        block = np.asarray(J[start:start + step], dtype=float)
+        F += block.T @ block
+    return F
+
+
+def _streamed_qr(J: np.ndarray, chunk_rows: int = 65536) -> Tuple[np.ndarray, np.ndarray]:
+    """One pass over row blocks of J: the R factor of J = QR, and F = J^T J.
+
+    Each block is stacked under the running R and re-factorised, so at most
+    `chunk_rows` rows of J plus a p×p R are resident however tall J is.
+    """
+    p = J.shape[1]
+    R = np.zeros((0, p))
+    F = np.zeros((p, p))
+    step = max(1, chunk_rows)
+    for start in range(0, J.shape[0], step):
+        block = np.asarray(J[start:start + step], dtype=float)
+        F += block.T @ block
+        R = np.linalg.qr(np.vstack([R, block]), mode='r')
+    return R, F
+
+
+def compute_fim(
+    J: np.ndarray, rank: int | None = None, seed: int = 0, chunk_rows: int = 65536
+) -> FIMDecomposition:
+    """Decompose F = J^T J through an SVD of the R factor of J.
+
+    J and R share singular values and right singular vectors, and those square
+    to the eigenpairs of F, which avoids the precision loss of diagonalising F.
+    R is built from row blocks (see `_streamed_qr`), so a tall or memory-mapped
+    J is never loaded whole.
+
+    Passing `rank` switches to a randomized truncated SVD that only resolves the
+    leading `rank` modes, for Jacobians with thousands of parameter columns. F
+    is still exact, but condition numbers, covariance and correlations need the
+    whole spectrum and come back as NaN (`truncated` is set).
+    """
+    m, p = J.shape
+    if rank is not None and rank < min(m, p):
+        F = accumulate_fim(J, chunk_rows)
+        eigenvalues, eigenvectors = _randomized_svd_spectrum(J, rank, seed)
+        return _decomposition_from_spectrum(F, eigenvalues, eigenvectors, truncated=True)
+    R, F = _streamed_qr(J, chunk_rows)
+    # full_matrices keeps all p right singular vectors when J has fewer rows than columns.
+    _, singular, vt = np.linalg.svd(R, full_matrices=True)
+    eigenvalues = np.zeros(p)
+    eigenvalues[:singular.size] = singular ** 2
+    return _decomposition_from_spectrum(F, eigenvalues, vt.T)
+
+
+def _randomized_svd_spectrum(
+    J: np.ndarray,
+    rank: int,
+    seed: int,
+    oversample: int = 10,
+    power_iterations: int = 2,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Leading eigenpairs of J^T J via the Halko–Martinsson–Tropp range finder."""
+    rng = np.random.default_rng(seed)
+    width = min(rank + oversample, min(J.shape))
+    Q, _ = np.linalg.qr(J @ rng.standard_normal((J.shape[1], width)))
+    for _ in range(power_iterations):
+        Z, _ = np.linalg.qr(J.T @ Q)
+        Q, _ = np.linalg.qr(J @ Z)
+    _, singular, vt = np.linalg.svd(Q.T @ J, full_matrices=False)
+    return singular[:rank] ** 2, vt[:rank].T
+
+
+def decompose_fim(F: np.ndarray) -> FIMDecomposition:
+    """Decompose an already accumulated F (e.g. from `accumulate_fim`)."""
     eigenvalues, eigenvectors = np.linalg.eigh(F)
     order = np.argsort(eigenvalues)[::-1]
-    eigenvalues = eigenvalues[order]
-    eigenvectors = eigenvectors[:, order]
+    return _decomposition_from_spectrum(F, eigenvalues[order], eigenvectors[:, order])
+
+
+def _decomposition_from_spectrum(
+    F: np.ndarray,
+    eigenvalues: np.ndarray,
+    eigenvectors: np.ndarray,
+    truncated: bool = False,
+) -> FIMDecomposition:
+    """Derive covariance, correlations and condition numbers from descending eigenpairs.
+
+    Eigenvector signs are fixed so the largest loading is positive, making the
+    eigh and SVD paths agree. A `truncated` spectrum says nothing about the
+    smallest modes, so those quantities are NaN rather than misleading.
+    """
+    pivots = np.argmax(np.abs(eigenvectors), axis=0)
+    signs = np.where(eigenvectors[pivots, np.arange(eigenvectors.shape[1])] < 0, -1.0, 1.0)
+    eigenvectors = eigenvectors * signs
+
+    if truncated:
+        unavailable = np.full(F.shape, np.nan)
+        return FIMDecomposition(
+            fim_matrix=F,
+            eigenvalues=eigenvalues,
+            eigenvectors=eigenvectors,
+            covariance=unavailable,
+            correlations=unavailable.copy(),
+            condition_number=float('nan'),
+            regularized_condition=float('nan'),
+            truncated=True,
+        )
 
     max_eig = eigenvalues[0]
     min_eig = eigenvalues[-1]
@@ -246,19 +1495,14 @@ def compute_fim(J: np.ndarray) -> FIMDecomposition:
     regularized_condition = max_eig / max(min_eig, rel_eps)
 
     eig_threshold = max(1e-12, max_eig * 1e-12)
-    p = J.shape[1]
-    cov = np.zeros((p, p))
-    for k in range(p):
-        lam = eigenvalues[k]
-        if lam > eig_threshold:
-            cov += np.outer(eigenvectors[:, k], eigenvectors[:, k]) / lam
+    keep = eigenvalues > eig_threshold
+    kept_vectors = eigenvectors[:, keep]
+    cov = (kept_vectors / eigenvalues[keep]) @ kept_vectors.T
 
-    correlations = np.zeros_like(cov)
-    for i in range(p):
-        for j in range(p):
-            var_i = cov[i, i]
-            var_j = cov[j, j]
-            correlations[i, j] = cov[i, j] / np.sqrt(var_i * var_j) if var_i > 0 and var_j > 0 else 0.0
+    std = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+    scale = np.outer(std, std)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        correlations = np.where(scale > 0, cov / scale, 0.0)
 
     return FIMDecomposition(
         fim_matrix=F,
@@ -280,45 +1524,292 @@ def analyse_identifiability(
     eig_threshold = max(1e-12, max_eig * 1e-12)
     contrib_threshold = max_eig * 1e-6
 
-    identifiable: List[str] = []
-    unidentifiable: List[str] = []
-
-    for i, pname in enumerate(param_names):
-        contribution = sum(
-            (eigenvectors[i, k] ** 2) * eigenvalues[k]
-            for k in range(len(param_names))
-            if eigenvalues[k] > eig_threshold
-        )
-        target = identifiable if contribution > contrib_threshold else unidentifiable
-        target.append(pname)
+    keep = eigenvalues > eig_threshold
+    contributions = (eigenvectors[:, keep] ** 2) @ eigenvalues[keep]
+    is_identifiable = contributions > contrib_threshold
+    identifiable = [pname for pname, flag in zip(param_names, is_identifiable) if flag]
+    unidentifiable = [pname for pname, flag in zip(param_names, is_identifiable) if not flag]
 
     null_tol = max(1e-12, abs(max_eig) * 1e-4)
     nullspace: List[NullspaceCombination] = []
-    for k in range(len(param_names) - 1, -1, -1):
+    for k in range(eigenvalues.size - 1, -1, -1):
         lam = eigenvalues[k]
         if lam > null_tol:
             break
         vec = eigenvectors[:, k]
-        max_abs = np.max(np.abs(vec))
-        threshold = max_abs * 0.1
-        components = [
-            (param_names[i], float(vec[i]))
-            for i in range(len(param_names))
-            if np.isfinite(vec[i]) and abs(vec[i]) >= threshold
-        ]
-        components.sort(key=lambda item: abs(item[1]), reverse=True)
+        magnitude = np.abs(vec)
+        threshold = np.max(magnitude) * 0.1
+        selected = np.flatnonzero(np.isfinite(vec) & (magnitude >= threshold))
+        selected = selected[np.argsort(-magnitude[selected], kind='stable')]
+        components = [(param_names[i], float(vec[i])) for i in selected]
         nullspace.append(NullspaceCombination(float(lam), components))
 
     return IdentifiabilitySummary(identifiable, unidentifiable, nullspace)
 
 
 def top_correlated_pairs(correlations: np.ndarray, param_names: Sequence[str], limit: int = 3) -> List[CorrelationPair]:
-    pairs: List[CorrelationPair] = []
-    for i in range(len(param_names)):
-        for j in range(i + 1, len(param_names)):
-            pairs.append(CorrelationPair((param_names[i], param_names[j]), float(correlations[i, j])))
-    pairs.sort(key=lambda entry: abs(entry.corr), reverse=True)
-    return pairs[:limit]
+    p = len(param_names)
+    pair_count = p * (p - 1) // 2
+    limit = min(limit, pair_count)
+    if limit <= 0:
+        return []
+    # Score only the strict upper triangle; everything else sorts below any real pair.
+    upper = np.triu(np.ones((p, p), dtype=bool), 1) & np.isfinite(correlations)
+    scores = np.where(upper, np.abs(correlations), -1.0).ravel()
+    flat = np.sort(np.argpartition(-scores, limit - 1)[:limit])
+    flat = flat[np.argsort(-scores[flat], kind='stable')]
+    flat = flat[scores[flat] >= 0]
+    rows, cols = np.divmod(flat, p)
+    return [
+        CorrelationPair((param_names[i], param_names[j]), float(correlations[i, j]))
+        for i, j in zip(rows, cols)
+    ]
+
+
+class FIMSession:
+    """Reentrant FIM driver for one SBML model.
+
+    A session owns a pool of compiled RoadRunner instances together with the
+    species map, timecourse selections and integrator configuration. Every call
+    checks out its own instance, so `jacobian`, `fim` and `identifiability` may be
+    used from several threads, and independent sessions can share a process.
+    """
+
+    def __init__(
+        self,
+        sbml_path: Path,
+        config: SimulationConfig = SimulationConfig(),
+        parameters: Sequence[str] | None = None,
+        pool_size: int = 1,
+        observables: Sequence[str] | None = None,
+        cache_dir: Path | None = None,
+        cache_max_bytes: int = 1 << 30,
+        model_cache: CompiledModelCache | None = None,
+        tracer: Tracer | None = None,
+    ) -> None:
+        self.sbml_path = Path(sbml_path)
+        if not self.sbml_path.exists():
+            raise FileNotFoundError(f'SBML file not found: {self.sbml_path}')
+        self.config = config
+        self.pool_size = max(1, pool_size)
+        self._idle: queue.LifoQueue[roadrunner.RoadRunner] = queue.LifoQueue()
+        self._compiled = 1
+        self._lock = threading.Lock()
+        self.sbml_digest = file_digest(self.sbml_path) if (cache_dir or model_cache) else ''
+        self.model_cache = model_cache
+        self.tracer = tracer
+        with trace_span(tracer, 'sbml_index'):
+            self.sbml_index = load_sbml_index(self.sbml_path, self.sbml_digest or None)
+
+        rr = self._compile()
+        available = infer_observables(rr)
+        if observables:
+            unknown = [name for name in observables if name not in available]
+            if unknown:
+                raise ValueError(f'Unknown observables: {", ".join(unknown)} (available: {", ".join(available)})')
+        # Selections hold only the observables in use, so trajectories and J carry no unused columns.
+        self.observables: Tuple[str, ...] = tuple(observables or available)
+        cache = None
+        if cache_dir is not None:
+            cache = TrajectoryCache(cache_dir, self.sbml_digest, cache_max_bytes)
+        self.context = ModelContext(
+            species_map=self.sbml_index.species_name_map(),
+            selections=('time', *self.observables),
+            cache=cache,
+            model_cache=model_cache,
+            sbml_digest=self.sbml_digest,
+            tracer=tracer,
+        )
+        rr.timeCourseSelections = list(self.context.selections)
+        self.param_names: Tuple[str, ...] = tuple(parameters or infer_kinetic_parameters(rr))
+        self.base_params = snapshot_parameters(rr, self.param_names)
+        self._idle.put(rr)
+
+    def _compile(self) -> roadrunner.RoadRunner:
+        with trace_span(self.tracer, 'model_load', cached=self.model_cache is not None):
+            rr = compile_model(self.sbml_path, self.model_cache, self.sbml_digest)
+        configure_integrator(rr, self.config)
+        return rr
+
+    def _acquire(self) -> roadrunner.RoadRunner:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            grow = self._compiled < self.pool_size
+            if grow:
+                self._compiled += 1
+        if not grow:
+            return self._idle.get()
+        try:
+            rr = self._compile()
+        except Exception:
+            with self._lock:
+                self._compiled -= 1
+            raise
+        rr.timeCourseSelections = list(self.context.selections)
+        return rr
+
+    @contextmanager
+    def runner(self) -> Iterator[roadrunner.RoadRunner]:
+        """Check out a compiled RoadRunner instance for the duration of the block."""
+        rr = self._acquire()
+        try:
+            yield rr
+        finally:
+            self._idle.put(rr)
+
+    def _base_params(self, param_names: Sequence[str]) -> Dict[str, float]:
+        known = dict(self.base_params)
+        missing = [pid for pid in param_names if pid not in known]
+        if missing:
+            with self.runner() as rr:
+                rr.resetAll()
+                known.update(snapshot_parameters(rr, missing))
+        return {pid: known[pid] for pid in param_names}
+
+    def simulate(self, param_overrides: Dict[str, float] | None = None) -> Any:
+        with self.runner() as rr:
+            return simulate_model(rr, self.config, param_overrides, self.context)
+
+    def jacobian(
+        self,
+        param_names: Sequence[str] | None = None,
+        options: JacobianOptions = JacobianOptions(),
+        out_path: Path | None = None,
+        base_params: Dict[str, float] | None = None,
+        checkpoint_dir: Path | None = None,
+        resume: bool = False,
+    ) -> np.ndarray:
+        """Assemble J at the model's nominal parameters, or at `base_params` where given.
+
+        `checkpoint_dir` makes an fd sweep resumable (see `JacobianCheckpoint`); J
+        is then the memory-mapped ``jacobian.npy`` in that directory.
+        """
+        names = list(param_names or self.param_names)
+        base_params = {**self._base_params(names), **(base_params or {})}
+        checkpoint = None
+        if checkpoint_dir is not None:
+            if options.method != 'fd':
+                raise ValueError('Checkpointing applies to finite-difference sweeps (method fd).')
+            checkpoint = JacobianCheckpoint(checkpoint_dir, {
+                'sbml': self.sbml_digest or file_digest(self.sbml_path),
+                'config': asdict(self.config),
+                'parameters': names,
+                'base_params': base_params,
+                'observables': list(self.observables),
+                'rel_eps': options.rel_eps,
+                'screen_threshold': options.screen_threshold,
+            })
+        with self.runner() as rr, trace_span(self.tracer, 'jacobian_assembly', method=options.method):
+            if options.method == 'sensitivities':
+                return build_jacobian_sensitivities(
+                    rr, self.config, names, base_params, self.observables,
+                    out_path=out_path, chunk_times=options.chunk_times, context=self.context,
+                )
+            if options.method == 'steady_state':
+                return build_jacobian_steady_state(
+                    rr, self.config, names, base_params, self.observables, options.rel_eps,
+                    out_path=out_path, context=self.context,
+                )
+            if options.method != 'fd':
+                raise ValueError(f'Unknown Jacobian method: {options.method}')
+            workers = options.workers if options.workers > 0 else (os.cpu_count() or 1)
+            return build_jacobian(
+                rr, self.config, names, base_params, self.observables, options.rel_eps,
+                workers=workers, sbml_path=self.sbml_path, out_path=out_path, context=self.context,
+                screen_threshold=options.screen_threshold, checkpoint=checkpoint, resume=resume,
+            )
+
+    def fim(
+        self,
+        param_names: Sequence[str] | None = None,
+        options: JacobianOptions = JacobianOptions(),
+        stream: bool = False,
+        keep_jacobian: Path | None = None,
+        rank: int | None = None,
+        checkpoint_dir: Path | None = None,
+        resume: bool = False,
+    ) -> FIMDecomposition:
+        """Compute the FIM decomposition, streaming F from a disk-backed J if requested."""
+        return self.fim_with_jacobian(
+            param_names, options, stream, keep_jacobian, rank, checkpoint_dir, resume
+        )[0]
+
+    def fim_with_jacobian(
+        self,
+        param_names: Sequence[str] | None = None,
+        options: JacobianOptions = JacobianOptions(),
+        stream: bool = False,
+        keep_jacobian: Path | None = None,
+        rank: int | None = None,
+        checkpoint_dir: Path | None = None,
+        resume: bool = False,
+    ) -> Tuple[FIMDecomposition, np.ndarray | None]:
+        """`fim` that also returns J (None when it was never kept).
+
+        Streaming forward sensitivities fold each time block straight into F, so J
+        is never built. Finite differences produce J a whole column per run, so
+        streaming keeps J in a memory-mapped file and reads it back in row blocks.
+        """
+        checkpointing = {'checkpoint_dir': checkpoint_dir, 'resume': resume}
+        if not stream and keep_jacobian is None:
+            J = self.jacobian(param_names, options, **checkpointing)
+            with trace_span(self.tracer, 'decomposition', method='svd' if rank is None else 'randomized_svd'):
+                return compute_fim(J, rank=rank, chunk_rows=options.chunk_times * len(self.observables)), J
+        if options.method == 'sensitivities' and keep_jacobian is None and checkpoint_dir is None:
+            names = list(param_names or self.param_names)
+            with self.runner() as rr, trace_span(self.tracer, 'accumulate_fim', method='sensitivities'):
+                F = accumulate_fim_sensitivities(
+                    rr, self.config, names, self._base_params(names), self.observables,
+                    chunk_times=options.chunk_times, context=self.context,
+                )
+            with trace_span(self.tracer, 'decomposition', method='eigh'):
+                return decompose_fim(F), None
+        kept: np.ndarray | None = None
+        with tempfile.TemporaryDirectory(prefix='fim-stream-') as tmp_dir:
+            jacobian_path = keep_jacobian or Path(tmp_dir) / 'jacobian.npy'
+            J = self.jacobian(param_names, options, out_path=jacobian_path, **checkpointing)
+            with trace_span(self.tracer, 'accumulate_fim'):
+                F = accumulate_fim(J, chunk_rows=options.chunk_times * len(self.observables))
+            if keep_jacobian is not None or checkpoint_dir is not None:
+                kept = J
+            del J
+        with trace_span(self.tracer, 'decomposition', method='eigh'):
+            return decompose_fim(F), kept
+
+    def identifiability(
+        self,
+        param_names: Sequence[str] | None = None,
+        decomposition: FIMDecomposition | None = None,
+    ) -> IdentifiabilitySummary:
+        names = list(param_names or self.param_names)
+        if decomposition is None:
+            decomposition = self.fim(names)
+        with trace_span(self.tracer, 'identifiability'):
+            return analyse_identifiability(decomposition.eigenvalues, decomposition.eigenvectors, names)
+
+
+def print_profile(tracer: Tracer, limit: int = 5) -> None:
+    print('Profile (wall time per phase):')
+    print(f"  {'phase':<30} {'count':>6} {'total [s]':>10} {'max [s]':>10}")
+    for name, entry in sorted(tracer.phase_summary().items(), key=lambda item: -item[1]['total']):
+        print(f"  {name:<30} {entry['count']:>6} {entry['total']:>10.4f} {entry['max']:>10.4f}")
+    print()
+
+    runs = [event for event in tracer.events if event['name'] == 'simulate' and event.get('parameter')]
+    if runs:
+        print('Most expensive perturbation runs:')
+        for event in sorted(runs, key=lambda item: -item['dur'])[:limit]:
+            print(f"  {event['parameter']} ({event['direction']}): {event['dur']:.4f} s")
+        print(f'  Note: {SOLVER_COUNTERS_NOTE}')
+        print()
+
+    rss = peak_rss_mb()
+    if rss['self'] is not None:
+        print(f"Peak RSS: {rss['self']:.1f} MiB (workers: {rss['children']:.1f} MiB)")
+        print()
 
 
 def print_matrix(matrix: np.ndarray, format_str: str = '.3e') -> None:
@@ -326,24 +1817,194 @@ def print_matrix(matrix: np.ndarray, format_str: str = '.3e') -> None:
         print('  ', ' '.join(f'{val:{format_str}}'.rjust(12) for val in row))
 
 
+# Bump when the archive layout changes; `load_archive` refuses newer versions.
+ARCHIVE_VERSION = 1
+ARCHIVE_ARRAYS = ('fim', 'eigenvalues', 'eigenvectors', 'covariance', 'correlations', 'jacobian')
+
+
+def archive_paths(path: Path) -> Tuple[Path, Path]:
+    """The ``.npz`` archive and its ``.json`` metadata sidecar for `path`."""
+    path = Path(path)
+    if path.suffix != '.npz':
+        path = path.with_name(f'{path.name}.npz')
+    return path, path.with_suffix('.json')
+
+
+def write_archive(
+    path: Path,
+    decomposition: FIMDecomposition,
+    jacobian: np.ndarray | None,
+    metadata: Dict[str, Any],
+) -> Tuple[Path, Path]:
+    """Save the FIM arrays to an uncompressed ``.npz`` plus a JSON sidecar.
+
+    Members are stored (not deflated) so `load_archive` can memory-map them.
+    """
+    npz_path, sidecar = archive_paths(path)
+    arrays = {
+        'fim': decomposition.fim_matrix,
+        'eigenvalues': decomposition.eigenvalues,
+        'eigenvectors': decomposition.eigenvectors,
+        'covariance': decomposition.covariance,
+        'correlations': decomposition.correlations,
+    }
+    if jacobian is not None:
+        arrays['jacobian'] = jacobian
+    np.savez(npz_path, **arrays)
+    record = {
+        'version': ARCHIVE_VERSION,
+        **metadata,
+        'condition_number': decomposition.condition_number,
+        'regularized_condition': decomposition.regularized_condition,
+        'arrays': {name: list(np.shape(value)) for name, value in arrays.items()},
+    }
+    sidecar.write_text(json.dumps(record, indent=2, allow_nan=True), encoding='utf-8')
+    return npz_path, sidecar
+
+
+def load_archive(path: Path) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """Memory-map every array of an archive written by `write_archive`.
+
+    Stored members are located through their zip local headers and mapped in
+    place, so reloading costs no copies however large J is. Compressed members
+    (archives rewritten by other tools) fall back to a regular read.
+    """
+    npz_path, sidecar = archive_paths(path)
+    metadata = json.loads(sidecar.read_text(encoding='utf-8'))
+    if metadata.get('version', 0) > ARCHIVE_VERSION:
+        raise ValueError(f'{npz_path} was written by a newer archive version ({metadata["version"]}).')
+    arrays: Dict[str, np.ndarray] = {}
+    with zipfile.ZipFile(npz_path) as archive, open(npz_path, 'rb') as handle:
+        for info in archive.infolist():
+            name = info.filename[:-4] if info.filename.endswith('.npy') else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                with archive.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member)
+                continue
+            handle.seek(info.header_offset + 26)
+            name_len, extra_len = struct.unpack('<HH', handle.read(4))
+            handle.seek(info.header_offset + 30 + name_len + extra_len)
+            version = np.lib.format.read_magic(handle)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(handle)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(handle)
+            if int(np.prod(shape)) == 0:
+                arrays[name] = np.empty(shape, dtype=dtype)
+                continue
+            arrays[name] = np.memmap(
+                npz_path, dtype=dtype, mode='r', offset=handle.tell(), shape=shape,
+                order='F' if fortran_order else 'C',
+            )
+    return arrays, metadata
+
+
+def diff_archives(
+    reference: Tuple[Dict[str, np.ndarray], Dict[str, Any]],
+    candidate: Tuple[Dict[str, np.ndarray], Dict[str, Any]],
+    rtol: float = 1e-6,
+    atol: float = 1e-12,
+) -> List[Tuple[str, bool, str]]:
+    """Compare two loaded archives; returns ``(item, ok, detail)`` rows.
+
+    Arrays pass when ``|a - b| <= atol + rtol * max|a|`` elementwise, which keeps
+    tiny entries of well-scaled matrices from failing on round-off. Eigenvector
+    signs are aligned column by column before comparing.
+    """
+    ref_arrays, ref_meta = reference
+    new_arrays, new_meta = candidate
+    rows: List[Tuple[str, bool, str]] = []
+    for key in ('parameters', 'observables', 'identifiable', 'unidentifiable'):
+        same = ref_meta.get(key) == new_meta.get(key)
+        rows.append((key, same, '' if same else f'{ref_meta.get(key)} != {new_meta.get(key)}'))
+    for key in ('condition_number', 'regularized_condition'):
+        a, b = float(ref_meta.get(key, np.nan)), float(new_meta.get(key, np.nan))
+        same = (a == b) or bool(np.isclose(a, b, rtol=rtol, atol=atol))
+        rows.append((key, same, f'{a:.6e} vs {b:.6e}'))
+
+    for name in ARCHIVE_ARRAYS:
+        if name not in ref_arrays or name not in new_arrays:
+            if name in ref_arrays or name in new_arrays:
+                rows.append((name, True, 'only in one archive (skipped)'))
+            continue
+        a = np.asarray(ref_arrays[name], dtype=float)
+        b = np.asarray(new_arrays[name], dtype=float)
+        if a.shape != b.shape:
+            rows.append((name, False, f'shape {a.shape} vs {b.shape}'))
+            continue
+        if name == 'eigenvectors' and a.size:
+            b = b * np.where(np.sum(a * b, axis=0) < 0, -1.0, 1.0)
+        delta = np.abs(a - b)
+        scale = float(np.max(np.abs(a))) if a.size else 0.0
+        worst = float(np.max(delta)) if delta.size else 0.0
+        ok = bool(np.all(delta <= atol + rtol * scale))
+        rows.append((name, ok, f'max |diff| = {worst:.3e} (scale {scale:.3e})'))
+    return rows
+
+
+def diff_main(argv: Sequence[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog='check_mm_fim_roadrunner.py diff', description='Compare two FIM archives written with --out.'
+    )
+    parser.add_argument('reference', type=Path, help='Reference archive (.npz).')
+    parser.add_argument('candidate', type=Path, help='Archive to check against the reference.')
+    parser.add_argument('--rtol', type=float, default=1e-6, help='Relative tolerance, scaled by the largest reference entry (default: 1e-6).')
+    parser.add_argument('--atol', type=float, default=1e-12, help='Absolute tolerance (default: 1e-12).')
+    args = parser.parse_args(argv)
+
+    rows = diff_archives(load_archive(args.reference), load_archive(args.candidate), args.rtol, args.atol)
+    width = max(len(item) for item, _, _ in rows)
+    for item, ok, detail in rows:
+        print(f"  {item:<{width}}  {'ok' if ok else 'DIFF':<4}  {detail}")
+    failures = sum(not ok for _, ok, _ in rows)
+    print(f'\n{len(rows) - failures}/{len(rows)} checks passed (rtol={args.rtol:g}, atol={args.atol:g})')
+    return 1 if failures else 0
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description='Compute a Michaelis–Menten FIM with libRoadRunner.')
     parser.add_argument('sbml_file', type=Path, help='Path to SBML model exported from BioNetGen.')
     parser.add_argument('--parameters', nargs='+', help='Parameter IDs to differentiate (default: kinetic params detected).')
+    parser.add_argument('--observables', nargs='+', help='Observable IDs to include in J (default: every obs_ parameter).')
     parser.add_argument('--steps', type=int, default=500, help='Number of uniform integration steps (default: 500).')
     parser.add_argument('--t-end', type=float, default=50.0, help='Simulation end time (default: 50).')
+    parser.add_argument('--times-csv', type=Path, help="Observation times from a CSV (a 'time' column, else the first column); replaces the uniform grid.")
     parser.add_argument('--rel-eps', type=float, default=1e-4, help='Relative perturbation size for finite differences (default: 1e-4).')
     parser.add_argument('--abs-tol', type=float, default=1e-12, help='CVODE absolute tolerance (default: 1e-12).')
     parser.add_argument('--rel-tol', type=float, default=1e-10, help='CVODE relative tolerance (default: 1e-10).')
     parser.add_argument('--integrator', type=str, default='cvode', help="RoadRunner integrator to use (e.g. 'cvode', 'rk4').")
-    return parser.parse_args()
+    parser.add_argument('--method', choices=('fd', 'sensitivities'), default='fd', help='Jacobian source: central finite differences or forward sensitivities (default: fd).')
+    parser.add_argument('--screen-threshold', type=float, default=0.0, help='Two-stage fd: one-sided screening run per parameter; only parameters whose relative sensitivity norm reaches this fraction of the largest get central differences, the rest are reported unidentifiable (default: 0 = off).')
+    parser.add_argument('--steady-state', action='store_true', help='Observe at steady state: one steady-state solve plus implicit-function-theorem sensitivities.')
+    parser.add_argument('--cache-dir', type=Path, help='Directory for the on-disk trajectory cache (default: disabled).')
+    parser.add_argument('--cache-max-mb', type=float, default=1024.0, help='Trajectory cache size cap in MiB before LRU eviction (default: 1024).')
+    parser.add_argument('--model-cache-dir', type=Path, help='Directory for compiled RoadRunner model states (default: disabled).')
+    parser.add_argument('--model-cache-max-mb', type=float, default=2048.0, help='Compiled-model cache size cap in MiB before LRU eviction (default: 2048).')
+    parser.add_argument('--stream-fim', action='store_true', help='Accumulate F in time chunks: fd keeps J in a temporary memory-mapped file, sensitivities never build J (RoadRunner still returns the full sensitivity tensor).')
+    parser.add_argument('--keep-jacobian', type=Path, help='Write J to this memory-mapped .npy file (implies --stream-fim).')
+    parser.add_argument('--checkpoint', type=Path, help='Directory holding a memory-mapped J and progress manifest; each finished perturbation column is recorded (fd only).')
+    parser.add_argument('--resume', action='store_true', help='With --checkpoint, skip the columns a previous run with the same inputs completed.')
+    parser.add_argument('--out', type=Path, help='Archive J, F, eigenpairs, covariance and correlations to this uncompressed .npz plus a .json metadata sidecar; compare archives with the `diff` subcommand.')
+    parser.add_argument('--chunk-times', type=int, default=256, help='Time points per streamed FIM block (default: 256).')
+    parser.add_argument('--svd-rank', type=int, help='Resolve only the leading K FIM modes with a randomized SVD of J (for very wide models); F stays exact, but condition numbers, covariance and correlations are not reported.')
+    parser.add_argument('--profile', action='store_true', help='Print wall time per phase, the slowest perturbation runs and peak RSS.')
+    parser.add_argument('--trace-json', type=Path, help='Write the full per-phase / per-perturbation trace to this JSON file.')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes for perturbation runs (default: 1 = serial; 0 = all cores).')
+    args = parser.parse_args()
+    if args.resume and args.checkpoint is None:
+        parser.error('--resume requires --checkpoint')
+    if args.checkpoint is not None and args.keep_jacobian is not None:
+        parser.error('--checkpoint already keeps J (as jacobian.npy); drop --keep-jacobian')
+    if args.checkpoint is not None and (args.steady_state or args.method != 'fd'):
+        parser.error('--checkpoint applies to finite-difference sweeps (--method fd without --steady-state)')
+    return args
 
 
 def main() -> None:
+    if len(sys.argv) > 1 and sys.argv[1] == 'diff':
+        sys.exit(diff_main(sys.argv[2:]))
     args = parse_args()
     sbml_path: Path = args.sbml_file
-    if not sbml_path.exists():
-        raise FileNotFoundError(f'SBML file not found: {sbml_path}')
 
     config = SimulationConfig(
         end=args.t_end,
@@ -351,33 +2012,49 @@ def main() -> None:
         rel_tol=args.rel_tol,
         abs_tol=args.abs_tol,
         integrator=args.integrator,
+        times=load_observation_times(args.times_csv) if args.times_csv is not None else None,
     )
 
     print('Computing FIM for Michaelis–Menten model using RoadRunner...\n')
     print(f'Loading model from: {sbml_path}\n')
 
-    rr = roadrunner.RoadRunner(str(sbml_path))
-    global SPECIES_ID_BY_NAME
-    SPECIES_ID_BY_NAME = load_species_name_map(sbml_path)
-    configure_integrator(rr, config)
-    observables = infer_observables(rr)
-    global TIMECOURSE_SELECTIONS
-    TIMECOURSE_SELECTIONS = ['time', *observables]
-    rr.timeCourseSelections = TIMECOURSE_SELECTIONS
-
-    if args.parameters:
-        param_names = args.parameters
-    else:
-        kinetic_candidates = [pid for pid in rr.model.getGlobalParameterIds() if not pid.startswith('obs_')]
-        param_names = [pid for pid in kinetic_candidates if pid.startswith('k_')]
-        if not param_names:
-            raise RuntimeError('Could not infer kinetic parameters. Specify them via --parameters.')
-
-    base_params = snapshot_parameters(rr, param_names)
-
-    J = build_jacobian(rr, config, param_names, base_params, observables, args.rel_eps)
-    fim_stats = compute_fim(J)
-    ident_stats = analyse_identifiability(fim_stats.eigenvalues, fim_stats.eigenvectors, param_names)
+    tracer = Tracer() if (args.profile or args.trace_json) else None
+    session = FIMSession(
+        sbml_path,
+        config,
+        parameters=args.parameters,
+        observables=args.observables,
+        cache_dir=args.cache_dir,
+        cache_max_bytes=int(args.cache_max_mb * 1024 * 1024),
+        model_cache=(
+            CompiledModelCache(args.model_cache_dir, int(args.model_cache_max_mb * 1024 * 1024))
+            if args.model_cache_dir is not None else None
+        ),
+        tracer=tracer,
+    )
+    param_names = list(session.param_names)
+    options = JacobianOptions(
+        method='steady_state' if args.steady_state else args.method,
+        rel_eps=args.rel_eps,
+        workers=args.workers,
+        chunk_times=args.chunk_times,
+        screen_threshold=args.screen_threshold,
+    )
+    if options.method == 'sensitivities' and (args.stream_fim or args.keep_jacobian is not None):
+        print(
+            'Note: --method sensitivities holds the full (time x parameter x species) sensitivity tensor '
+            'that RoadRunner returns; streaming only bounds the J / F side.',
+            file=sys.stderr,
+        )
+    fim_stats, jacobian = session.fim_with_jacobian(
+        options=options,
+        stream=args.stream_fim,
+        keep_jacobian=args.keep_jacobian,
+        rank=args.svd_rank,
+        checkpoint_dir=args.checkpoint,
+        resume=args.resume,
+    )
+    ident_stats = session.identifiability(param_names, fim_stats)
     corr_pairs = top_correlated_pairs(fim_stats.correlations, param_names)
 
     print('FIM eigenvalues (descending):')
@@ -386,13 +2063,18 @@ def main() -> None:
     print()
 
     print('Condition number (raw / regularized):')
-    print(f'  {fim_stats.condition_number:.6e} / {fim_stats.regularized_condition:.6e}')
+    if fim_stats.truncated:
+        print(f'  unavailable (--svd-rank {args.svd_rank} resolves only the leading modes)')
+    else:
+        print(f'  {fim_stats.condition_number:.6e} / {fim_stats.regularized_condition:.6e}')
     print()
 
     identifiable = ', '.join(ident_stats.identifiable_params) or '(none)'
     unidentifiable = ', '.join(ident_stats.unidentifiable_params) or '(none)'
     print(f'Identifiable parameters: {identifiable}')
     print(f'Unidentifiable parameters: {unidentifiable}')
+    if fim_stats.truncated:
+        print('  (near-null combinations lie outside the leading modes and are not resolved)')
     print()
 
     if ident_stats.nullspace_combinations:
@@ -410,13 +2092,48 @@ def main() -> None:
         print()
 
     print('Correlation matrix:')
-    print_matrix(fim_stats.correlations)
+    if fim_stats.truncated:
+        print('  unavailable (covariance needs the full spectrum; rerun without --svd-rank)')
+    else:
+        print_matrix(fim_stats.correlations)
     print()
 
     print('FIM matrix:')
     print_matrix(fim_stats.fim_matrix)
     print()
 
+    if args.out is not None:
+        npz_path, sidecar = write_archive(args.out, fim_stats, jacobian, {
+            'sbml': str(sbml_path),
+            'sbml_digest': session.sbml_digest or file_digest(sbml_path),
+            'config': asdict(config),
+            'options': asdict(options),
+            'parameters': param_names,
+            'observables': list(session.observables),
+            'identifiable': ident_stats.identifiable_params,
+            'unidentifiable': ident_stats.unidentifiable_params,
+            'nullspace': [
+                {'eigenvalue': combo.eigenvalue, 'components': [list(item) for item in combo.components]}
+                for combo in ident_stats.nullspace_combinations
+            ],
+            'roadrunner_version': getattr(roadrunner, '__version__', 'unknown'),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        })
+        print(f'Archive written to: {npz_path} (+ {sidecar.name})\n')
+
+    if tracer is not None:
+        if args.profile:
+            print_profile(tracer)
+        if args.trace_json:
+            trace = tracer.report(
+                sbml=str(sbml_path),
+                config=asdict(config),
+                options=asdict(options),
+                parameters=param_names,
+            )
+            args.trace_json.write_text(json.dumps(trace, indent=2), encoding='utf-8')
+            print(f'Trace written to: {args.trace_json}\n')
+
     print('Comparison notes:')
     print('- Run `node scripts/check_michaelis_menten_fim.mjs` to compare')
     print('- Small numerical differences expected due to solver differences (CVODE vs RK4)')
@@ -4,6 +4,7 @@ Structural comparison of BNG2.pl vs BNG Playground GraphML exports.
 
 Usage:
     python compare_graphml.py <bng2_file.graphml> <playground_file.graphml>
+    python compare_graphml.py --batch <bng2_dir> <playground_dir> [--jobs N] [--json report.json]
 
 Extracts semantic graph structure (nodes, edges, types, styles) from both
 yED-compatible GraphML files and reports differences at each layer:
@@ -11,15 +12,53 @@ yED-compatible GraphML files and reports differences at each layer:
   2. Node attributes (shape, color, label, outline)
   3. Edge attributes (direction, color, arrows, line style)
   4. Label/naming conventions
+
+Nodes are matched by Weisfeiler–Lehman neighbourhood hashes before falling
+back to labels (``--match label`` restores label-only matching), so renamed or
+unlabeled nodes of isomorphic graphs still pair up.
+
+Each diff also carries an approximate graph edit distance (label, style,
+node and edge costs) from a bipartite assignment of the unmatched nodes,
+solved with SciPy's ``linear_sum_assignment`` when available and a greedy
+NumPy pass otherwise. Batch mode ranks failing pairs by it.
+
+``--cache-dir`` stores each pair's diff record under the SHA-256 of both
+files plus the comparer version, so re-runs only parse pairs whose bytes
+changed.
+
+Requirements:
+    pip install lxml numpy   (scipy optional, for exact residual assignment)
+
+Batch mode pairs files across two directory trees by model name (relative
+path without extension), compares the pairs in a process pool and writes one
+JSON diff record per pair plus an aggregate pass/fail summary. The exit code
+is 1 when any pair differs or a reference file has no test counterpart.
+Single-pair mode is a report: it exits 0 whenever the comparison completes,
+differences or not.
 """
 
+import argparse
+import hashlib
+import json
+import os
 import sys
 import re
+import tempfile
+import time
+from sys import intern
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
 from lxml import etree
-from collections import defaultdict
-from dataclasses import dataclass, field
+from collections import defaultdict, deque
+from dataclasses import asdict, dataclass, field
 from typing import Optional
 
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # pragma: no cover - scipy is optional
+    linear_sum_assignment = None
+
 
 # ── Namespaces ──────────────────────────────────────────────────────────────
 NS = {
@@ -28,7 +67,20 @@ NS = {
 }
 
 
-@dataclass
+G_NODE = f"{{{NS['g']}}}node"
+G_EDGE = f"{{{NS['g']}}}edge"
+Y_SHAPE_NODE = f"{{{NS['y']}}}ShapeNode"
+Y_GROUP_NODE = f"{{{NS['y']}}}GroupNode"
+Y_POLY_LINE_EDGE = f"{{{NS['y']}}}PolyLineEdge"
+Y_FILL = f"{{{NS['y']}}}Fill"
+Y_BORDER_STYLE = f"{{{NS['y']}}}BorderStyle"
+Y_SHAPE = f"{{{NS['y']}}}Shape"
+Y_NODE_LABEL = f"{{{NS['y']}}}NodeLabel"
+Y_LINE_STYLE = f"{{{NS['y']}}}LineStyle"
+Y_ARROWS = f"{{{NS['y']}}}Arrows"
+
+
+@dataclass(slots=True)
 class GNode:
     raw_id: str
     label: str = ""
@@ -42,7 +94,7 @@ class GNode:
     is_group: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class GEdge:
     raw_id: str
     source: str
@@ -54,6 +106,10 @@ class GEdge:
     target_arrow: str = ""
 
 
+NODE_STYLE_FIELDS = ("label", "shape", "fill", "outline_color", "outline_style",
+                     "outline_width", "font_size", "font_style")
+
+
 @dataclass
 class ParsedGraph:
     nodes: dict = field(default_factory=dict)  # label -> GNode
@@ -61,73 +117,114 @@ class ParsedGraph:
     node_by_id: dict = field(default_factory=dict)  # raw_id -> GNode
 
 
+def _read_node_realizer(gn: GNode, realizer):
+    """Copy fill/border/shape/label from a y:ShapeNode or y:GroupNode (first of each child)."""
+    seen = set()
+    for child in realizer:
+        tag = child.tag
+        if tag in seen:
+            continue
+        seen.add(tag)
+        if tag == Y_FILL:
+            gn.fill = intern((child.get("color") or "").upper())
+        elif tag == Y_BORDER_STYLE:
+            gn.outline_color = intern((child.get("color") or "").upper())
+            gn.outline_style = intern(child.get("type") or "")
+            gn.outline_width = intern(child.get("width") or "")
+        elif tag == Y_SHAPE:
+            gn.shape = intern(child.get("type") or "")
+        elif tag == Y_NODE_LABEL:
+            gn.label = (child.text or "").strip()
+            gn.font_size = intern(child.get("fontSize") or "")
+            gn.font_style = intern(child.get("fontStyle") or "")
+
+
+def _read_edge_realizer(ge: GEdge, poly):
+    """Copy line style and arrows from a y:PolyLineEdge (first of each child)."""
+    seen = set()
+    for child in poly:
+        if child.tag in seen:
+            continue
+        seen.add(child.tag)
+        if child.tag == Y_LINE_STYLE:
+            ge.line_color = intern((child.get("color") or "").upper())
+            ge.line_style = intern(child.get("type") or "")
+            ge.line_width = intern(child.get("width") or "")
+        elif child.tag == Y_ARROWS:
+            ge.source_arrow = intern(child.get("source") or "")
+            ge.target_arrow = intern(child.get("target") or "")
+
+
 def parse_graphml(path: str) -> ParsedGraph:
-    """Parse a yED GraphML file into semantic structures."""
-    tree = etree.parse(path)
-    root = tree.getroot()
+    """Parse a yED GraphML file into semantic structures.
+
+    Streams the document with ``iterparse``, only stopping on node/edge
+    elements and their yFiles realizers, and frees every finished element so
+    memory stays flat however large the graph is; repeated style values are
+    interned so the records themselves stay small. Realizer styles are taken
+    from the innermost enclosing node, so a group node never picks up the
+    ShapeNode of one of its children.
+    """
     graph = ParsedGraph()
+    order = []       # nodes in document order (registered once labels are known)
+    open_nodes = []  # [GNode, realizer tag read so far] for each enclosing node
+    edge = None
+    edge_styled = False
+
+    events = etree.iterparse(
+        path, events=("start", "end"), huge_tree=True,
+        tag=(G_NODE, G_EDGE, Y_SHAPE_NODE, Y_GROUP_NODE, Y_POLY_LINE_EDGE),
+    )
+    for event, el in events:
+        tag = el.tag
+        if event == "start":
+            if tag == G_NODE:
+                gn = GNode(raw_id=el.get("id", ""))
+                order.append(gn)
+                open_nodes.append([gn, None])
+            elif tag == G_EDGE:
+                edge = GEdge(raw_id=el.get("id", ""), source=el.get("source", ""), target=el.get("target", ""))
+                edge_styled = False
+            continue
+
+        if tag == Y_SHAPE_NODE or tag == Y_GROUP_NODE:
+            # The first ShapeNode wins; otherwise the first GroupNode (a closed/open
+            # ProxyAutoBoundsNode carries two of them).
+            if open_nodes:
+                entry = open_nodes[-1]
+                gn = entry[0]
+                if tag == Y_GROUP_NODE:
+                    gn.is_group = True
+                if entry[1] is None or (entry[1] == Y_GROUP_NODE and tag == Y_SHAPE_NODE):
+                    if entry[1] is not None:
+                        for name in NODE_STYLE_FIELDS:
+                            setattr(gn, name, "")
+                    _read_node_realizer(gn, el)
+                    entry[1] = tag
+            continue
+        if tag == Y_POLY_LINE_EDGE:
+            if edge is not None and not edge_styled:
+                _read_edge_realizer(edge, el)
+                edge_styled = True
+            continue
 
-    # Find all nodes (including nested group children)
-    for node_el in root.iter("{http://graphml.graphdrawing.org/xmlns}node"):
-        raw_id = node_el.get("id", "")
-        gn = GNode(raw_id=raw_id)
-
-        # Try ShapeNode first
-        shape_node = node_el.find(".//y:ShapeNode", NS)
-        group_node = node_el.find(".//y:GroupNode", NS)
-        target = shape_node if shape_node is not None else group_node
-
-        if target is not None:
-            fill = target.find("y:Fill", NS)
-            if fill is not None:
-                gn.fill = (fill.get("color") or "").upper()
-
-            border = target.find("y:BorderStyle", NS)
-            if border is not None:
-                gn.outline_color = (border.get("color") or "").upper()
-                gn.outline_style = border.get("type") or ""
-                gn.outline_width = border.get("width") or ""
-
-            shape = target.find("y:Shape", NS)
-            if shape is not None:
-                gn.shape = shape.get("type") or ""
-
-            label = target.find("y:NodeLabel", NS)
-            if label is not None:
-                gn.label = (label.text or "").strip()
-                gn.font_size = label.get("fontSize") or ""
-                gn.font_style = label.get("fontStyle") or ""
-
-        if group_node is not None:
-            gn.is_group = True
-
-        graph.node_by_id[raw_id] = gn
+        if tag == G_NODE:
+            open_nodes.pop()
+        elif tag == G_EDGE and edge is not None:
+            graph.edges.append(edge)
+            edge = None
+        el.clear(keep_tail=False)
+        if not open_nodes:
+            # Drop finished top-level siblings so the tree never grows.
+            while el.getprevious() is not None:
+                del el.getparent()[0]
+    del events
+
+    for gn in order:
+        graph.node_by_id[gn.raw_id] = gn
         # Use label as the canonical key if non-empty, else raw_id
-        key = gn.label if gn.label else raw_id
+        key = gn.label if gn.label else gn.raw_id
         graph.nodes[key] = gn
-
-    # Parse edges
-    for edge_el in root.iter("{http://graphml.graphdrawing.org/xmlns}edge"):
-        raw_id = edge_el.get("id", "")
-        source_id = edge_el.get("source", "")
-        target_id = edge_el.get("target", "")
-
-        ge = GEdge(raw_id=raw_id, source=source_id, target=target_id)
-
-        poly = edge_el.find(".//y:PolyLineEdge", NS)
-        if poly is not None:
-            ls = poly.find("y:LineStyle", NS)
-            if ls is not None:
-                ge.line_color = (ls.get("color") or "").upper()
-                ge.line_style = ls.get("type") or ""
-                ge.line_width = ls.get("width") or ""
-            arr = poly.find("y:Arrows", NS)
-            if arr is not None:
-                ge.source_arrow = arr.get("source") or ""
-                ge.target_arrow = arr.get("target") or ""
-
-        graph.edges.append(ge)
-
     return graph
 
 
@@ -148,145 +245,628 @@ def classify_node(node: GNode) -> str:
     return "unknown"
 
 
+_LABEL_PUNCT_RE = re.compile(r'\s*([()~!.])\s*')
+_WHITESPACE_RE = re.compile(r'\s')
+
+
 def normalize_label(label: str) -> str:
     """Normalize a label for comparison (strip whitespace around parens, etc.)."""
+    if not _WHITESPACE_RE.search(label):
+        return label
     # BNG2.pl's prettify adds spaces: "A( b )" -> normalize to "A(b)"
-    s = re.sub(r'\s*\(\s*', '(', label)
-    s = re.sub(r'\s*\)\s*', ')', s)
-    s = re.sub(r'\s*~\s*', '~', s)
-    s = re.sub(r'\s*!\s*', '!', s)
-    s = re.sub(r'\s*\.\s*', '.', s)
-    return s.strip()
+    return _LABEL_PUNCT_RE.sub(r'\1', label).strip()
+
 
+def edge_signature(graph: ParsedGraph, edge: GEdge, names: Optional[dict] = None) -> tuple:
+    """Create a normalized (source_label, target_label, color) tuple.
 
-def edge_signature(graph: ParsedGraph, edge: GEdge) -> tuple:
-    """Create a normalized (source_label, target_label, color) tuple."""
+    ``names`` maps raw ids to canonical node names (see `canonical_names`).
+    """
+    if names is not None:
+        return (names.get(edge.source, edge.source), names.get(edge.target, edge.target), edge.line_color)
     src = normalize_label(resolve_label(graph, edge.source))
     tgt = normalize_label(resolve_label(graph, edge.target))
     return (src, tgt, edge.line_color)
 
 
-def compare(ref_path: str, test_path: str):
-    """Compare reference (BNG2.pl) vs test (Playground) GraphML files."""
-    ref = parse_graphml(ref_path)
-    test = parse_graphml(test_path)
+def node_name(node: GNode) -> str:
+    """Normalized label, or the raw id for unlabeled nodes."""
+    return normalize_label(node.label) if node.label else node.raw_id
 
-    print("=" * 72)
-    print("STRUCTURAL GRAPHML COMPARISON")
-    print(f"  Reference : {ref_path}")
-    print(f"  Test      : {test_path}")
-    print("=" * 72)
 
-    # ── 1. Topology ─────────────────────────────────────────────────────
-    print("\n┌─ 1. TOPOLOGY ────────────────────────────────────────────┐")
-    print(f"  Nodes:  ref={len(ref.nodes):3d}   test={len(test.nodes):3d}")
-    print(f"  Edges:  ref={len(ref.edges):3d}   test={len(test.edges):3d}")
+# ── Structural matching ─────────────────────────────────────────────────────
+MATCH_MODES = ("structure", "label")
+WL_ITERATIONS = 4
 
-    ref_labels = {normalize_label(k) for k in ref.nodes}
-    test_labels = {normalize_label(k) for k in test.nodes}
 
-    missing = ref_labels - test_labels
-    extra = test_labels - ref_labels
-    common = ref_labels & test_labels
+@dataclass
+class NodeMatching:
+    pairs: dict = field(default_factory=dict)    # ref raw_id -> test raw_id
+    methods: dict = field(default_factory=dict)  # ref raw_id -> "exact" | "structure" | "label"
+
+
+def wl_colors(ref: ParsedGraph, test: ParsedGraph, iterations: int = WL_ITERATIONS) -> tuple:
+    """Weisfeiler–Lehman colour refinement of both graphs with a shared palette.
+
+    Initial colours are label-free (atom/rule/group), and each round folds in
+    the sorted colours of in- and out-neighbours together with the edge colour,
+    so equal colours mean isomorphic k-hop neighbourhoods (up to WL's usual
+    blind spots). Returns one ``raw_id -> colour`` dict per round for each
+    graph, stopping early once neither partition refines any further. Each
+    round is O(E log d).
+    """
+    palette = {}
+
+    def initial(graph):
+        return {rid: palette.setdefault(("init", classify_node(n), n.is_group), len(palette))
+                for rid, n in graph.node_by_id.items()}
+
+    def adjacency(graph):
+        out_adj = defaultdict(list)
+        in_adj = defaultdict(list)
+        for e in graph.edges:
+            if e.source in graph.node_by_id and e.target in graph.node_by_id:
+                out_adj[e.source].append((e.target, e.line_color))
+                in_adj[e.target].append((e.source, e.line_color))
+        return out_adj, in_adj
+
+    rounds = []
+    for graph in (ref, test):
+        rounds.append([initial(graph)])
+    adjacencies = [adjacency(ref), adjacency(test)]
+
+    for _ in range(iterations):
+        refined = False
+        for history, (out_adj, in_adj) in zip(rounds, adjacencies):
+            colors = history[-1]
+            nxt = {}
+            for rid, c in colors.items():
+                sig = (c,
+                       tuple(sorted((colors[u], col) for u, col in out_adj.get(rid, ()))),
+                       tuple(sorted((colors[u], col) for u, col in in_adj.get(rid, ()))))
+                nxt[rid] = palette.setdefault(sig, len(palette))
+            if len(set(nxt.values())) > len(set(colors.values())):
+                refined = True
+            history.append(nxt)
+        if not refined:
+            break
+    return rounds[0], rounds[1]
+
+
+def match_nodes(ref: ParsedGraph, test: ParsedGraph, mode: str = "structure") -> NodeMatching:
+    """Pair reference and test nodes.
+
+    ``structure`` mode works in three passes, each only over still-unmatched
+    nodes:
+
+    1. ``exact``: same final WL colour and same normalized label.
+    2. ``structure``: colour classes holding exactly one node on each side,
+       from the finest round down to the first. Nodes whose label still has an
+       unmatched namesake on the other side are left for pass 3, so labels win
+       when they and structure disagree. This is what pairs renamed and
+       unlabeled nodes.
+    3. ``label``: equal normalized (non-empty) labels.
+
+    ``label`` mode only runs the label pass, keyed by `node_name` (the
+    behaviour before structural matching).
+    """
+    matching = NodeMatching()
+    free_test = dict(test.node_by_id)
+
+    def pair(rid, tid, method):
+        matching.pairs[rid] = tid
+        matching.methods[rid] = method
+        del free_test[tid]
+
+    def label_pass(key, method):
+        index = defaultdict(deque)
+        for tid, tn in free_test.items():
+            k = key(tn)
+            if k:
+                index[k].append(tid)
+        for rid, rn in ref.node_by_id.items():
+            if rid in matching.pairs:
+                continue
+            bucket = index.get(key(rn))
+            if bucket:
+                pair(rid, bucket.popleft(), method)
+
+    if mode == "label":
+        label_pass(node_name, "label")
+        return matching
+
+    ref_rounds, test_rounds = wl_colors(ref, test)
+    ref_final, test_final = ref_rounds[-1], test_rounds[-1]
+    labels = {id(n): normalize_label(n.label) if n.label else ""
+              for graph in (ref, test) for n in graph.node_by_id.values()}
+    label_of = lambda n: labels[id(n)]
+
+    # 1. Structure and label agree
+    index = defaultdict(deque)
+    for tid, tn in test.node_by_id.items():
+        if tn.label:
+            index[(test_final[tid], label_of(tn))].append(tid)
+    for rid, rn in ref.node_by_id.items():
+        if rn.label:
+            bucket = index.get((ref_final[rid], label_of(rn)))
+            if bucket:
+                pair(rid, bucket.popleft(), "exact")
+
+    # 2. Unique colour classes, finest round first
+    for level in range(len(ref_rounds) - 1, 0, -1):
+        free_ref = [rid for rid in ref.node_by_id if rid not in matching.pairs]
+        if not free_ref or not free_test:
+            break
+        ref_free_labels = {label_of(ref.node_by_id[rid]) for rid in free_ref}
+        test_free_labels = {label_of(tn) for tn in free_test.values()}
+        ref_classes = defaultdict(list)
+        for rid in free_ref:
+            lab = label_of(ref.node_by_id[rid])
+            if not lab or lab not in test_free_labels:
+                ref_classes[ref_rounds[level][rid]].append(rid)
+        test_classes = defaultdict(list)
+        for tid, tn in free_test.items():
+            lab = label_of(tn)
+            if not lab or lab not in ref_free_labels:
+                test_classes[test_rounds[level][tid]].append(tid)
+        for color, rids in ref_classes.items():
+            tids = test_classes.get(color)
+            if len(rids) == 1 and tids is not None and len(tids) == 1:
+                pair(rids[0], tids[0], "structure")
+
+    # 3. Label fallback
+    label_pass(label_of, "label")
+    return matching
+
+
+def canonical_names(ref: ParsedGraph, test: ParsedGraph, matching: NodeMatching) -> tuple:
+    """``raw_id -> name`` maps for both graphs; matched test nodes take their reference's name."""
+    ref_names = {rid: node_name(n) for rid, n in ref.node_by_id.items()}
+    test_names = {tid: node_name(n) for tid, n in test.node_by_id.items()}
+    for rid, tid in matching.pairs.items():
+        test_names[tid] = ref_names[rid]
+    return ref_names, test_names
+
+
+# ── Edit distance ───────────────────────────────────────────────────────────
+# Unit costs: node/edge insertion or deletion, node relabel, one differing style attribute.
+GED_COSTS = {"node": 1.0, "edge": 1.0, "label": 1.0, "style": 0.25}
+GED_NODE_STYLE = ("shape", "fill", "outline_color", "font_size")
+GED_EDGE_STYLE = ("line_color", "line_style", "line_width", "source_arrow", "target_arrow")
+# Largest residual (unmatched ref × unmatched test) cost matrix worth assigning;
+# beyond it the leftovers are costed as plain deletions/insertions (still an upper bound).
+GED_MAX_CELLS = 4_000_000
+
+
+def _joint_codes(ref_values: list, test_values: list) -> tuple:
+    """Integer codes for two value lists over one shared vocabulary."""
+    vocab = {}
+    ref_codes = np.fromiter((vocab.setdefault(v, len(vocab)) for v in ref_values), dtype=np.int64, count=len(ref_values))
+    test_codes = np.fromiter((vocab.setdefault(v, len(vocab)) for v in test_values), dtype=np.int64, count=len(test_values))
+    return ref_codes, test_codes
+
+
+def _greedy_assignment(savings: np.ndarray) -> tuple:
+    """Greedy stand-in for `linear_sum_assignment` on a (rows × cols) savings matrix.
+
+    Only negative savings (substitution cheaper than delete + insert) are
+    candidates. They are sorted once, most negative first, and each is accepted
+    when neither its row nor its column is taken yet, so tied rows cost nothing
+    extra.
+    """
+    n_rows, n_cols = savings.shape
+    flat = np.flatnonzero(savings < 0)
+    flat = flat[np.argsort(savings.ravel()[flat], kind="stable")]
+    row_used = bytearray(n_rows)
+    col_used = bytearray(n_cols)
+    rows, cols = [], []
+    limit = min(n_rows, n_cols)
+    for r, c in zip(*(idx.tolist() for idx in np.divmod(flat, n_cols))):
+        if row_used[r] or col_used[c]:
+            continue
+        row_used[r] = col_used[c] = 1
+        rows.append(r)
+        cols.append(c)
+        if len(rows) == limit:
+            break
+    return np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)
+
+
+def _assign_residue(ref: ParsedGraph, test: ParsedGraph, rids: list, tids: list, costs: dict) -> tuple:
+    """Bipartite (Riesen–Bunke style) assignment of the unmatched nodes.
+
+    Substitution costs combine label, style and a degree-difference estimate
+    of the incident edge edits, built with broadcasting over the whole
+    residual matrix. Rows and columns are paired when substituting beats
+    deleting + inserting.
+    """
+    def degrees(graph, ids):
+        out_deg, in_deg = defaultdict(int), defaultdict(int)
+        for e in graph.edges:
+            out_deg[e.source] += 1
+            in_deg[e.target] += 1
+        return (np.array([out_deg[i] for i in ids], dtype=float), np.array([in_deg[i] for i in ids], dtype=float))
+
+    rn = [ref.node_by_id[i] for i in rids]
+    tn = [test.node_by_id[i] for i in tids]
+    r_lab, t_lab = _joint_codes([normalize_label(n.label) for n in rn], [normalize_label(n.label) for n in tn])
+    sub = costs["label"] * (r_lab[:, None] != t_lab[None, :])
+    for attr in GED_NODE_STYLE:
+        r_attr, t_attr = _joint_codes([getattr(n, attr) for n in rn], [getattr(n, attr) for n in tn])
+        sub += costs["style"] * (r_attr[:, None] != t_attr[None, :])
+    r_out, r_in = degrees(ref, rids)
+    t_out, t_in = degrees(test, tids)
+    half_edge = 0.5 * costs["edge"]
+    sub += half_edge * (np.abs(r_out[:, None] - t_out[None, :]) + np.abs(r_in[:, None] - t_in[None, :]))
+    delete = costs["node"] + half_edge * (r_out + r_in)
+    insert = costs["node"] + half_edge * (t_out + t_in)
+    savings = sub - delete[:, None] - insert[None, :]
+
+    if linear_sum_assignment is not None:
+        rows, cols = linear_sum_assignment(np.minimum(savings, 0.0))
+        keep = savings[rows, cols] < 0
+        rows, cols, method = rows[keep], cols[keep], "scipy"
+    else:
+        rows, cols = _greedy_assignment(savings)
+        method = "greedy"
+    return {rids[r]: tids[c] for r, c in zip(rows, cols)}, method
+
+
+def edit_distance(ref: ParsedGraph, test: ParsedGraph, matching: NodeMatching, costs: Optional[dict] = None) -> dict:
+    """Approximate graph edit distance from ``ref`` to ``test``.
+
+    Matched nodes stay fixed; the unmatched remainder is paired by a bipartite
+    assignment (`_assign_residue`). The returned total is the exact cost of
+    the resulting node mapping, so it is an upper bound on the true GED.
+    ``normalized`` divides by the cost of deleting ``ref`` and inserting
+    ``test`` outright, which makes scores comparable across model sizes.
+    """
+    costs = {**GED_COSTS, **(costs or {})}
+    mapping = dict(matching.pairs)
+    matched_test = set(mapping.values())
+    rids = [i for i in ref.node_by_id if i not in mapping]
+    tids = [i for i in test.node_by_id if i not in matched_test]
+    method = "none"
+    if rids and tids:
+        if len(rids) * len(tids) <= GED_MAX_CELLS:
+            assigned, method = _assign_residue(ref, test, rids, tids, costs)
+            mapping.update(assigned)
+        else:
+            method = "skipped"
+
+    # ── Nodes and node styles ──
+    n_deleted = len(ref.node_by_id) - len(mapping)
+    n_inserted = len(test.node_by_id) - len(mapping)
+    relabeled = 0
+    node_attrs = 0
+    for rid, tid in mapping.items():
+        rn, tn = ref.node_by_id[rid], test.node_by_id[tid]
+        if normalize_label(rn.label) != normalize_label(tn.label):
+            relabeled += 1
+        node_attrs += sum(getattr(rn, a) != getattr(tn, a) for a in GED_NODE_STYLE)
+
+    # ── Edges (multiset over mapped endpoints) and edge styles ──
+    test_edges = defaultdict(list)
+    for e in test.edges:
+        test_edges[(e.source, e.target)].append(e)
+    e_deleted = 0
+    edge_attrs = 0
+    for e in ref.edges:
+        key = (mapping.get(e.source), mapping.get(e.target))
+        bucket = test_edges.get(key) if None not in key else None
+        if not bucket:
+            e_deleted += 1
+            continue
+        # Prefer a parallel edge of the same colour
+        idx = next((i for i, te in enumerate(bucket) if te.line_color == e.line_color), len(bucket) - 1)
+        te = bucket.pop(idx)
+        edge_attrs += sum(getattr(e, a) != getattr(te, a) for a in GED_EDGE_STYLE)
+    e_inserted = sum(len(bucket) for bucket in test_edges.values())
+
+    node_cost = costs["node"] * (n_deleted + n_inserted) + costs["label"] * relabeled
+    edge_cost = costs["edge"] * (e_deleted + e_inserted)
+    style_cost = costs["style"] * (node_attrs + edge_attrs)
+    total = node_cost + edge_cost + style_cost
+    ceiling = (costs["node"] * (len(ref.node_by_id) + len(test.node_by_id))
+               + costs["edge"] * (len(ref.edges) + len(test.edges)))
+    return {
+        "total": total,
+        "normalized": total / ceiling if ceiling else 0.0,
+        "nodes": {"cost": node_cost, "deleted": n_deleted, "inserted": n_inserted, "relabeled": relabeled},
+        "edges": {"cost": edge_cost, "deleted": e_deleted, "inserted": e_inserted},
+        "styles": {"cost": style_cost, "node_attributes": node_attrs, "edge_attributes": edge_attrs},
+        "assignment": {"method": method, "residue": [len(rids), len(tids)], "paired": len(mapping) - len(matching.pairs)},
+    }
+
+
+# ── Structured diff ─────────────────────────────────────────────────────────
+@dataclass
+class AttrDiff:
+    attribute: str
+    ref: str
+    test: str
 
-    if missing:
-        print(f"\n  MISSING from test ({len(missing)}):")
-        for m in sorted(missing):
-            print(f"    - {m}")
-    if extra:
-        print(f"\n  EXTRA in test ({len(extra)}):")
-        for e in sorted(extra):
-            print(f"    + {e}")
-    print(f"\n  Common nodes: {len(common)}")
+    def __str__(self) -> str:
+        return f"{self.attribute}: {self.ref} vs {self.test}"
 
-    # ── 2. Node Attributes ──────────────────────────────────────────────
-    print("\n┌─ 2. NODE ATTRIBUTES ─────────────────────────────────────┐")
 
-    # Build lookup by normalized label
-    ref_by_label = {normalize_label(k): v for k, v in ref.nodes.items()}
-    test_by_label = {normalize_label(k): v for k, v in test.nodes.items()}
-
-    attr_diffs = []
-    for label in sorted(common):
-        rn = ref_by_label.get(label)
-        tn = test_by_label.get(label)
-        if not rn or not tn:
+@dataclass
+class GraphDiff:
+    """Everything `print_report` shows, as plain data (JSON-serialisable via `to_record`)."""
+    ref_path: str
+    test_path: str
+    ref_nodes: int = 0
+    test_nodes: int = 0
+    ref_edges: int = 0
+    test_edges: int = 0
+    missing_nodes: list = field(default_factory=list)   # normalized labels
+    extra_nodes: list = field(default_factory=list)
+    common_nodes: int = 0
+    renamed_nodes: list = field(default_factory=list)   # (ref name, test name) paired by structure
+    match_counts: dict = field(default_factory=dict)    # matching method -> pairs
+    node_diffs: list = field(default_factory=list)      # (label, node type, [AttrDiff])
+    missing_edges: list = field(default_factory=list)   # (src, tgt, color)
+    extra_edges: list = field(default_factory=list)
+    common_edges: int = 0
+    edge_diffs: list = field(default_factory=list)      # ((src, tgt, color), [AttrDiff])
+    style_samples: dict = field(default_factory=dict)   # "Rule"/"Atom" -> {"ref": GNode, "test": GNode}
+    edge_colors: dict = field(default_factory=dict)     # color -> (ref count, test count)
+    directions: dict = field(default_factory=dict)      # "ref"/"test" -> direction counts
+    edit_distance: dict = field(default_factory=dict)   # see `edit_distance`
+    cached: bool = False                                # loaded from a `ResultCache`
+
+    @property
+    def passed(self) -> bool:
+        return not (self.missing_nodes or self.extra_nodes or self.renamed_nodes or self.node_diffs
+                    or self.missing_edges or self.extra_edges or self.edge_diffs)
+
+    def to_record(self) -> dict:
+        """Machine-readable form of the diff (one record per compared pair)."""
+        def edge(sig):
+            return {"source": sig[0], "target": sig[1], "color": sig[2]}
+
+        return {
+            "ref": self.ref_path,
+            "test": self.test_path,
+            "passed": self.passed,
+            "topology": {
+                "ref_nodes": self.ref_nodes, "test_nodes": self.test_nodes,
+                "ref_edges": self.ref_edges, "test_edges": self.test_edges,
+                "common_nodes": self.common_nodes, "common_edges": self.common_edges,
+            },
+            "missing_nodes": self.missing_nodes,
+            "extra_nodes": self.extra_nodes,
+            "renamed_nodes": [{"ref": r, "test": t} for r, t in self.renamed_nodes],
+            "matching": self.match_counts,
+            "missing_edges": [edge(sig) for sig in self.missing_edges],
+            "extra_edges": [edge(sig) for sig in self.extra_edges],
+            "node_attribute_diffs": [
+                {"label": label, "type": ntype, "diffs": [asdict(d) for d in diffs]}
+                for label, ntype, diffs in self.node_diffs
+            ],
+            "edge_attribute_diffs": [
+                {**edge(sig), "diffs": [asdict(d) for d in diffs]} for sig, diffs in self.edge_diffs
+            ],
+            "edge_colors": {c: {"ref": r, "test": t} for c, (r, t) in self.edge_colors.items()},
+            "directions": self.directions,
+            "edit_distance": self.edit_distance,
+            "style_samples": {
+                ntype: {side: asdict(node) if node else None for side, node in samples.items()}
+                for ntype, samples in self.style_samples.items()
+            },
+        }
+
+    @classmethod
+    def from_record(cls, record: dict, ref_path: str, test_path: str) -> "GraphDiff":
+        """Rebuild a diff from `to_record` output (e.g. a cached result) for new paths."""
+        def sig(edge):
+            return (edge["source"], edge["target"], edge["color"])
+
+        topo = record["topology"]
+        return cls(
+            ref_path=ref_path, test_path=test_path,
+            ref_nodes=topo["ref_nodes"], test_nodes=topo["test_nodes"],
+            ref_edges=topo["ref_edges"], test_edges=topo["test_edges"],
+            missing_nodes=record["missing_nodes"], extra_nodes=record["extra_nodes"],
+            common_nodes=topo["common_nodes"],
+            renamed_nodes=[(r["ref"], r["test"]) for r in record["renamed_nodes"]],
+            match_counts=record["matching"],
+            node_diffs=[(d["label"], d["type"], [AttrDiff(**a) for a in d["diffs"]])
+                        for d in record["node_attribute_diffs"]],
+            missing_edges=[sig(e) for e in record["missing_edges"]],
+            extra_edges=[sig(e) for e in record["extra_edges"]],
+            common_edges=topo["common_edges"],
+            edge_diffs=[(sig(d), [AttrDiff(**a) for a in d["diffs"]]) for d in record["edge_attribute_diffs"]],
+            style_samples={
+                ntype: {side: GNode(**node) if node else None for side, node in samples.items()}
+                for ntype, samples in record["style_samples"].items()
+            },
+            edge_colors={c: (n["ref"], n["test"]) for c, n in record["edge_colors"].items()},
+            directions=record["directions"],
+            edit_distance=record["edit_distance"],
+            cached=True,
+        )
+
+
+def analyze_directions(graph: ParsedGraph) -> dict:
+    """Count atom→rule, rule→atom and other edges."""
+    counts = {"atom_to_rule": 0, "rule_to_atom": 0, "other": 0}
+    for e in graph.edges:
+        src_node = graph.node_by_id.get(e.source)
+        tgt_node = graph.node_by_id.get(e.target)
+        if not src_node or not tgt_node:
+            counts["other"] += 1
             continue
+        src_type = classify_node(src_node)
+        tgt_type = classify_node(tgt_node)
+        if src_type == "rule" and tgt_type == "atom":
+            counts["rule_to_atom"] += 1
+        elif src_type == "atom" and tgt_type == "rule":
+            counts["atom_to_rule"] += 1
+        else:
+            counts["other"] += 1
+    return counts
+
+
+def diff_graphs(
+    ref: ParsedGraph, test: ParsedGraph, ref_path: str = "", test_path: str = "", match: str = "structure"
+) -> GraphDiff:
+    """Compute the structural diff of a reference and a test graph.
+
+    Nodes are paired with `match_nodes`; matched test nodes are renamed to
+    their reference counterpart, so edges are compared on canonical names.
+    """
+    diff = GraphDiff(ref_path=ref_path, test_path=test_path,
+                     ref_nodes=len(ref.node_by_id), test_nodes=len(test.node_by_id),
+                     ref_edges=len(ref.edges), test_edges=len(test.edges))
+
+    # ── Topology ──
+    matching = match_nodes(ref, test, match)
+    ref_names, test_names = canonical_names(ref, test, matching)
+    matched_test = set(matching.pairs.values())
+    diff.missing_nodes = sorted(ref_names[rid] for rid in ref.node_by_id if rid not in matching.pairs)
+    diff.extra_nodes = sorted(node_name(tn) for tid, tn in test.node_by_id.items() if tid not in matched_test)
+    diff.common_nodes = len(matching.pairs)
+    diff.match_counts = {method: 0 for method in ("exact", "structure", "label")}
+    for method in matching.methods.values():
+        diff.match_counts[method] += 1
+    common = sorted(matching.pairs.items(), key=lambda item: ref_names[item[0]])
+    # Two unlabeled nodes differing only in raw id are not a rename
+    diff.renamed_nodes = [
+        (ref_names[rid], node_name(test.node_by_id[tid])) for rid, tid in common
+        if (ref.node_by_id[rid].label or test.node_by_id[tid].label)
+        and node_name(test.node_by_id[tid]) != ref_names[rid]
+    ]
+
+    # ── Node attributes ──
+    for rid, tid in common:
+        label = ref_names[rid]
+        rn = ref.node_by_id[rid]
+        tn = test.node_by_id[tid]
         diffs = []
         if rn.shape != tn.shape:
-            diffs.append(f"shape: {rn.shape} vs {tn.shape}")
+            diffs.append(AttrDiff("shape", rn.shape, tn.shape))
         if rn.fill.upper() != tn.fill.upper():
-            diffs.append(f"fill: {rn.fill} vs {tn.fill}")
+            diffs.append(AttrDiff("fill", rn.fill, tn.fill))
         if rn.outline_color and tn.outline_color and rn.outline_color != tn.outline_color:
-            diffs.append(f"outline: {rn.outline_color} vs {tn.outline_color}")
+            diffs.append(AttrDiff("outline", rn.outline_color, tn.outline_color))
         if rn.font_size and tn.font_size and rn.font_size != tn.font_size:
-            diffs.append(f"fontSize: {rn.font_size} vs {tn.font_size}")
+            diffs.append(AttrDiff("fontSize", rn.font_size, tn.font_size))
         if diffs:
-            attr_diffs.append((label, diffs))
-
-    if attr_diffs:
-        for label, diffs in attr_diffs[:20]:
-            ntype = classify_node(ref_by_label[label])
-            print(f"  [{ntype}] {label}:")
-            for d in diffs:
-                print(f"    ⚠ {d}")
-        if len(attr_diffs) > 20:
-            print(f"  ... and {len(attr_diffs) - 20} more")
-    else:
-        print("  ✓ All common nodes match attributes")
-
-    # ── 3. Edge Comparison ──────────────────────────────────────────────
-    print("\n┌─ 3. EDGES ───────────────────────────────────────────────┐")
+            diff.node_diffs.append((label, classify_node(rn), diffs))
 
+    # ── Edges ──
     ref_edge_sigs = defaultdict(list)
     for e in ref.edges:
-        sig = edge_signature(ref, e)
-        ref_edge_sigs[sig].append(e)
-
+        ref_edge_sigs[edge_signature(ref, e, ref_names)].append(e)
     test_edge_sigs = defaultdict(list)
     for e in test.edges:
-        sig = edge_signature(test, e)
-        test_edge_sigs[sig].append(e)
+        test_edge_sigs[edge_signature(test, e, test_names)].append(e)
 
-    ref_sig_set = set(ref_edge_sigs.keys())
-    test_sig_set = set(test_edge_sigs.keys())
-
-    missing_edges = ref_sig_set - test_sig_set
-    extra_edges = test_sig_set - ref_sig_set
+    ref_sig_set = set(ref_edge_sigs)
+    test_sig_set = set(test_edge_sigs)
     common_edges = ref_sig_set & test_sig_set
+    diff.missing_edges = sorted(ref_sig_set - test_sig_set)
+    diff.extra_edges = sorted(test_sig_set - ref_sig_set)
+    diff.common_edges = len(common_edges)
 
-    if missing_edges:
-        print(f"\n  MISSING edges ({len(missing_edges)}):")
-        for src, tgt, color in sorted(missing_edges):
-            print(f"    - {src} → {tgt}  [color={color}]")
-
-    if extra_edges:
-        print(f"\n  EXTRA edges ({len(extra_edges)}):")
-        for src, tgt, color in sorted(extra_edges):
-            print(f"    + {src} → {tgt}  [color={color}]")
-
-    print(f"\n  Common edges: {len(common_edges)}")
-
-    # Check arrow style on common edges
-    arrow_diffs = []
     for sig in sorted(common_edges):
-        re_list = ref_edge_sigs[sig]
-        te_list = test_edge_sigs[sig]
-        re0 = re_list[0]
-        te0 = te_list[0]
+        re0 = ref_edge_sigs[sig][0]
+        te0 = test_edge_sigs[sig][0]
         diffs = []
         if re0.source_arrow != te0.source_arrow:
-            diffs.append(f"sourceArrow: {re0.source_arrow} vs {te0.source_arrow}")
+            diffs.append(AttrDiff("sourceArrow", re0.source_arrow, te0.source_arrow))
         if re0.target_arrow != te0.target_arrow:
-            diffs.append(f"targetArrow: {re0.target_arrow} vs {te0.target_arrow}")
+            diffs.append(AttrDiff("targetArrow", re0.target_arrow, te0.target_arrow))
         if re0.line_width != te0.line_width:
-            diffs.append(f"width: {re0.line_width} vs {te0.line_width}")
+            diffs.append(AttrDiff("width", re0.line_width, te0.line_width))
         if diffs:
-            arrow_diffs.append((sig, diffs))
+            diff.edge_diffs.append((sig, diffs))
+
+    # ── Style defaults ──
+    for ntype_label, ntype_shape in [("Rule", "ellipse"), ("Atom", "roundrectangle")]:
+        diff.style_samples[ntype_label] = {
+            "ref": next((n for n in ref.nodes.values() if n.shape == ntype_shape), None),
+            "test": next((n for n in test.nodes.values() if n.shape == ntype_shape), None),
+        }
+
+    edge_colors_ref = defaultdict(int)
+    edge_colors_test = defaultdict(int)
+    for e in ref.edges:
+        edge_colors_ref[e.line_color] += 1
+    for e in test.edges:
+        edge_colors_test[e.line_color] += 1
+    for c in sorted(set(edge_colors_ref) | set(edge_colors_test)):
+        diff.edge_colors[c] = (edge_colors_ref.get(c, 0), edge_colors_test.get(c, 0))
+
+    # ── Directions ──
+    diff.directions = {"ref": analyze_directions(ref), "test": analyze_directions(test)}
+
+    # ── Edit distance ──
+    diff.edit_distance = edit_distance(ref, test, matching)
+    return diff
+
+
+# ── Report ──────────────────────────────────────────────────────────────────
+def print_report(diff: GraphDiff):
+    """Print the human-readable, sectioned report for one diff."""
+    print("=" * 72)
+    print("STRUCTURAL GRAPHML COMPARISON")
+    print(f"  Reference : {diff.ref_path}")
+    print(f"  Test      : {diff.test_path}")
+    print("=" * 72)
+
+    # ── 1. Topology ─────────────────────────────────────────────────────
+    print("\n┌─ 1. TOPOLOGY ────────────────────────────────────────────┐")
+    print(f"  Nodes:  ref={diff.ref_nodes:3d}   test={diff.test_nodes:3d}")
+    print(f"  Edges:  ref={diff.ref_edges:3d}   test={diff.test_edges:3d}")
+
+    if diff.missing_nodes:
+        print(f"\n  MISSING from test ({len(diff.missing_nodes)}):")
+        for m in diff.missing_nodes:
+            print(f"    - {m}")
+    if diff.extra_nodes:
+        print(f"\n  EXTRA in test ({len(diff.extra_nodes)}):")
+        for e in diff.extra_nodes:
+            print(f"    + {e}")
+    if diff.renamed_nodes:
+        print(f"\n  RENAMED in test, matched by structure ({len(diff.renamed_nodes)}):")
+        for r, t in diff.renamed_nodes:
+            print(f"    ~ {r} → {t}")
+    print(f"\n  Common nodes: {diff.common_nodes}")
+    if diff.match_counts.get("exact") or diff.match_counts.get("structure"):
+        counts = diff.match_counts
+        print(f"  Matched by structure+label={counts['exact']}  structure={counts['structure']}  "
+              f"label={counts['label']}")
 
-    if arrow_diffs:
-        print(f"\n  Arrow/style diffs on common edges ({len(arrow_diffs)}):")
-        for (src, tgt, color), diffs in arrow_diffs[:15]:
+    # ── 2. Node Attributes ──────────────────────────────────────────────
+    print("\n┌─ 2. NODE ATTRIBUTES ─────────────────────────────────────┐")
+    if diff.node_diffs:
+        for label, ntype, diffs in diff.node_diffs[:20]:
+            print(f"  [{ntype}] {label}:")
+            for d in diffs:
+                print(f"    ⚠ {d}")
+        if len(diff.node_diffs) > 20:
+            print(f"  ... and {len(diff.node_diffs) - 20} more")
+    else:
+        print("  ✓ All common nodes match attributes")
+
+    # ── 3. Edge Comparison ──────────────────────────────────────────────
+    print("\n┌─ 3. EDGES ───────────────────────────────────────────────┐")
+    if diff.missing_edges:
+        print(f"\n  MISSING edges ({len(diff.missing_edges)}):")
+        for src, tgt, color in diff.missing_edges:
+            print(f"    - {src} → {tgt}  [color={color}]")
+    if diff.extra_edges:
+        print(f"\n  EXTRA edges ({len(diff.extra_edges)}):")
+        for src, tgt, color in diff.extra_edges:
+            print(f"    + {src} → {tgt}  [color={color}]")
+
+    print(f"\n  Common edges: {diff.common_edges}")
+
+    if diff.edge_diffs:
+        print(f"\n  Arrow/style diffs on common edges ({len(diff.edge_diffs)}):")
+        for (src, tgt, color), diffs in diff.edge_diffs[:15]:
             print(f"    {src} → {tgt}:")
             for d in diffs:
                 print(f"      ⚠ {d}")
@@ -295,66 +875,297 @@ def compare(ref_path: str, test_path: str):
 
     # ── 4. Summary of style defaults ────────────────────────────────────
     print("\n┌─ 4. STYLE DEFAULTS SUMMARY ──────────────────────────────┐")
-
-    for ntype_label, ntype_shape in [("Rule", "ellipse"), ("Atom", "roundrectangle")]:
-        ref_samples = [n for n in ref.nodes.values() if n.shape == ntype_shape]
-        test_samples = [n for n in test.nodes.values() if n.shape == ntype_shape]
-        if ref_samples:
-            rs = ref_samples[0]
+    for ntype_label, samples in diff.style_samples.items():
+        rs, ts = samples["ref"], samples["test"]
+        if rs:
             print(f"\n  {ntype_label} nodes (ref sample):")
             print(f"    shape={rs.shape} fill={rs.fill} outline={rs.outline_color} "
                   f"fontSize={rs.font_size} fontStyle={rs.font_style}")
-        if test_samples:
-            ts = test_samples[0]
+        if ts:
             print(f"  {ntype_label} nodes (test sample):")
             print(f"    shape={ts.shape} fill={ts.fill} outline={ts.outline_color} "
                   f"fontSize={ts.font_size} fontStyle={ts.font_style}")
 
-    edge_colors_ref = defaultdict(int)
-    edge_colors_test = defaultdict(int)
-    for e in ref.edges:
-        edge_colors_ref[e.line_color] += 1
-    for e in test.edges:
-        edge_colors_test[e.line_color] += 1
-
     print(f"\n  Edge color distribution:")
-    all_colors = set(edge_colors_ref.keys()) | set(edge_colors_test.keys())
-    for c in sorted(all_colors):
-        print(f"    {c}: ref={edge_colors_ref.get(c, 0)} test={edge_colors_test.get(c, 0)}")
+    for c, (n_ref, n_test) in diff.edge_colors.items():
+        print(f"    {c}: ref={n_ref} test={n_test}")
 
     # ── 5. Direction analysis ───────────────────────────────────────────
     print("\n┌─ 5. EDGE DIRECTION ANALYSIS ─────────────────────────────┐")
-
-    def analyze_directions(graph, label_prefix):
-        rule_to_atom = 0
-        atom_to_rule = 0
-        other = 0
-        for e in graph.edges:
-            src_node = graph.node_by_id.get(e.source)
-            tgt_node = graph.node_by_id.get(e.target)
-            if not src_node or not tgt_node:
-                other += 1
-                continue
-            src_type = classify_node(src_node)
-            tgt_type = classify_node(tgt_node)
-            if src_type == "rule" and tgt_type == "atom":
-                rule_to_atom += 1
-            elif src_type == "atom" and tgt_type == "rule":
-                atom_to_rule += 1
-            else:
-                other += 1
+    for key, label_prefix in (("ref", "Reference"), ("test", "Test")):
+        counts = diff.directions[key]
         print(f"  {label_prefix}:")
-        print(f"    atom→rule: {atom_to_rule}  rule→atom: {rule_to_atom}  other: {other}")
-
-    analyze_directions(ref, "Reference")
-    analyze_directions(test, "Test")
+        print(f"    atom→rule: {counts['atom_to_rule']}  rule→atom: {counts['rule_to_atom']}  "
+              f"other: {counts['other']}")
+
+    # ── 6. Edit distance ────────────────────────────────────────────────
+    print("\n┌─ 6. EDIT DISTANCE (approx.) ─────────────────────────────┐")
+    ged = diff.edit_distance
+    nodes, edges, styles = ged["nodes"], ged["edges"], ged["styles"]
+    print(f"  Total: {ged['total']:.2f}   normalized: {ged['normalized']:.4f}")
+    print(f"    nodes : {nodes['cost']:8.2f}  (-{nodes['deleted']} +{nodes['inserted']} "
+          f"relabeled {nodes['relabeled']})")
+    print(f"    edges : {edges['cost']:8.2f}  (-{edges['deleted']} +{edges['inserted']})")
+    print(f"    styles: {styles['cost']:8.2f}  (node attrs {styles['node_attributes']}, "
+          f"edge attrs {styles['edge_attributes']})")
+    assignment = ged["assignment"]
+    if assignment["method"] != "none":
+        print(f"  Residue {assignment['residue'][0]}×{assignment['residue'][1]} assigned by "
+              f"{assignment['method']} ({assignment['paired']} paired)")
 
     print("\n" + "=" * 72)
     print("DONE")
 
 
+# ── Result cache ────────────────────────────────────────────────────────────
+# Bump whenever parsing, matching or scoring changes what a diff contains, so
+# stale cached results stop matching.
+COMPARER_VERSION = 2
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Diff records on disk, keyed by the content of both files.
+
+    The key hashes the SHA-256 of the reference and test bytes together with
+    `COMPARER_VERSION`, the matching mode, the residue assignment backend and
+    `GED_COSTS`, so renamed or touched but unchanged files still hit, and any
+    byte change misses. Entries are
+    written atomically, so concurrent batch runs can share a directory.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(ref_path: str, test_path: str, match: str) -> str:
+        backend = "scipy" if linear_sum_assignment is not None else "greedy"
+        payload = json.dumps(
+            [COMPARER_VERSION, match, backend, GED_COSTS, file_sha256(ref_path), file_sha256(test_path)],
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        try:
+            return json.loads((self.root / f"{key}.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, record: dict):
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(record, fh, ensure_ascii=False)
+            os.replace(tmp, self.root / f"{key}.json")
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+
+def compare_files(
+    ref_path: str, test_path: str, match: str = "structure", cache: Optional[ResultCache] = None,
+    key: Optional[str] = None,
+) -> GraphDiff:
+    """Parse and diff one reference/test pair without printing.
+
+    With a ``cache``, unchanged pairs are answered from disk without parsing.
+    A ``key`` already computed by the caller spares hashing both files again.
+    """
+    if cache is not None:
+        key = key or cache.key(ref_path, test_path, match)
+        record = cache.get(key)
+        if record is not None:
+            return GraphDiff.from_record(record, ref_path, test_path)
+    diff = diff_graphs(parse_graphml(ref_path), parse_graphml(test_path), ref_path, test_path, match)
+    if cache is not None:
+        cache.put(key, diff.to_record())
+    return diff
+
+
+def compare(
+    ref_path: str, test_path: str, match: str = "structure", cache: Optional[ResultCache] = None
+) -> GraphDiff:
+    """Compare reference (BNG2.pl) vs test (Playground) GraphML files."""
+    diff = compare_files(ref_path, test_path, match, cache)
+    print_report(diff)
+    return diff
+
+
+# ── Batch mode ──────────────────────────────────────────────────────────────
+def model_key(path: Path, root: Path) -> str:
+    """Pairing key: path relative to its directory, without extension, case-folded."""
+    return str(path.relative_to(root).with_suffix("")).replace(os.sep, "/").lower()
+
+
+def pair_files(ref_dir: str, test_dir: str, pattern: str = "*.graphml"):
+    """Pair files across two directory trees by model name.
+
+    Returns ``(pairs, ref_only, test_only)`` where ``pairs`` is a sorted list of
+    ``(model, ref_path, test_path)``.
+    """
+    ref_root, test_root = Path(ref_dir), Path(test_dir)
+    ref_files = {model_key(p, ref_root): p for p in ref_root.rglob(pattern) if p.is_file()}
+    test_files = {model_key(p, test_root): p for p in test_root.rglob(pattern) if p.is_file()}
+    pairs = [(key, str(ref_files[key]), str(test_files[key]))
+             for key in sorted(ref_files.keys() & test_files.keys())]
+    ref_only = sorted(str(ref_files[k]) for k in ref_files.keys() - test_files.keys())
+    test_only = sorted(str(test_files[k]) for k in test_files.keys() - ref_files.keys())
+    return pairs, ref_only, test_only
+
+
+def _compare_pair(pair) -> dict:
+    """Pool task: diff one pair and return its JSON record (errors included, never raised)."""
+    model, ref_path, test_path, match, cache_dir, key = pair
+    started = time.perf_counter()
+    try:
+        cache = ResultCache(cache_dir) if cache_dir else None
+        diff = compare_files(ref_path, test_path, match, cache, key)
+        record = diff.to_record()
+        record["cached"] = diff.cached
+    except Exception as exc:  # one malformed pair must not abort the whole batch
+        record = {"ref": ref_path, "test": test_path, "passed": False,
+                  "error": f"{type(exc).__name__}: {exc}"}
+    record["model"] = model
+    record["seconds"] = round(time.perf_counter() - started, 4)
+    return record
+
+
+def run_batch(
+    ref_dir: str, test_dir: str, jobs: Optional[int] = None, pattern: str = "*.graphml",
+    match: str = "structure", cache_dir: Optional[str] = None,
+) -> dict:
+    """Compare every paired file of two directories in a process pool.
+
+    With ``cache_dir``, cached pairs are answered in this process and only
+    pairs whose bytes changed are dispatched to the pool, together with the
+    cache key computed here so each file is hashed once.
+    """
+    pairs, ref_only, test_only = pair_files(ref_dir, test_dir, pattern)
+    tasks = []
+    done = {}
+    cache = ResultCache(cache_dir) if cache_dir else None
+    for model, ref_path, test_path in pairs:
+        key = None
+        if cache is not None:
+            try:
+                key = cache.key(ref_path, test_path, match)
+            except OSError:
+                pass  # unreadable file: let the worker report it
+            record = cache.get(key) if key is not None else None
+            if record is not None:
+                done[model] = {**record, "ref": ref_path, "test": test_path, "cached": True,
+                               "model": model, "seconds": 0.0}
+                continue
+        tasks.append((model, ref_path, test_path, match, cache_dir, key))
+    if jobs == 1 or len(tasks) <= 1:
+        computed = [_compare_pair(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            computed = list(pool.map(_compare_pair, tasks))
+    done.update((r["model"], r) for r in computed)
+    records = [done[model] for model, _, _ in pairs]
+
+    failed = [r["model"] for r in records if not r["passed"]]
+    scored = [r for r in records if "edit_distance" in r]
+    ranking = sorted(scored, key=lambda r: (-r["edit_distance"]["normalized"], r["model"]))
+    summary = {
+        "ref_dir": ref_dir,
+        "test_dir": test_dir,
+        "pairs": len(records),
+        "passed": len(records) - len(failed),
+        "failed": len(failed),
+        "errors": sum("error" in r for r in records),
+        "cache_hits": sum(bool(r.get("cached")) for r in records),
+        "failed_models": failed,
+        "ranking": [
+            {"model": r["model"], "ged": r["edit_distance"]["total"], "normalized": r["edit_distance"]["normalized"]}
+            for r in ranking if not r["passed"]
+        ],
+        "ref_only": ref_only,
+        "test_only": test_only,
+    }
+    return {"summary": summary, "results": records}
+
+
+def print_batch_summary(report: dict):
+    """One line per pair plus the aggregate pass/fail counts."""
+    summary = report["summary"]
+    print("=" * 72)
+    print("BATCH GRAPHML COMPARISON")
+    print(f"  Reference : {summary['ref_dir']}")
+    print(f"  Test      : {summary['test_dir']}")
+    print("=" * 72)
+    for r in report["results"]:
+        if "error" in r:
+            print(f"  ✗ {r['model']}: {r['error']}")
+            continue
+        topo = r["topology"]
+        status = "✓" if r["passed"] else "✗"
+        print(f"  {status} {r['model']}: nodes {topo['ref_nodes']}/{topo['test_nodes']} "
+              f"edges {topo['ref_edges']}/{topo['test_edges']}  "
+              f"-{len(r['missing_nodes'])}/+{len(r['extra_nodes'])}/~{len(r['renamed_nodes'])} nodes  "
+              f"-{len(r['missing_edges'])}/+{len(r['extra_edges'])} edges  "
+              f"{len(r['node_attribute_diffs']) + len(r['edge_attribute_diffs'])} attr diffs  "
+              f"ged={r['edit_distance']['total']:.2f} ({r['edit_distance']['normalized']:.4f})")
+    for path in summary["ref_only"]:
+        print(f"  ? no test file for {path}")
+    for path in summary["test_only"]:
+        print(f"  ? no reference file for {path}")
+    if summary["ranking"]:
+        print("\n  Furthest from reference (normalized edit distance):")
+        for entry in summary["ranking"][:10]:
+            print(f"    {entry['normalized']:.4f}  ged={entry['ged']:8.2f}  {entry['model']}")
+    print("\n" + "=" * 72)
+    print(f"PASSED {summary['passed']}/{summary['pairs']}  "
+          f"(failed {summary['failed']}, errors {summary['errors']}, "
+          f"unpaired {len(summary['ref_only']) + len(summary['test_only'])}, "
+          f"cached {summary['cache_hits']})")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Structural comparison of BNG2.pl vs Playground GraphML exports.",
+        epilog="Exit status: single-pair mode returns 0 once the report is printed; "
+               "--batch returns 1 if any pair differs or a reference file is unpaired.",
+    )
+    parser.add_argument("ref", help="Reference (BNG2.pl) GraphML file, or directory with --batch")
+    parser.add_argument("test", help="Test (Playground) GraphML file, or directory with --batch")
+    parser.add_argument("--batch", action="store_true",
+                        help="Treat ref/test as directories and compare files paired by model name")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Worker processes for --batch (default: CPU count)")
+    parser.add_argument("--pattern", default="*.graphml", help="File glob for --batch (default: *.graphml)")
+    parser.add_argument("--match", choices=MATCH_MODES, default="structure",
+                        help="Node matching: WL structural hashes before labels, or labels only (default: structure)")
+    parser.add_argument("--cache-dir", metavar="DIR",
+                        help="Reuse diff results for pairs whose file contents are unchanged (default: off)")
+    parser.add_argument("--json", metavar="PATH",
+                        help="Write the diff record (batch: per-pair records plus summary) as JSON")
+    args = parser.parse_args(argv)
+
+    if args.batch:
+        report = run_batch(args.ref, args.test, args.jobs, args.pattern, args.match, args.cache_dir)
+        print_batch_summary(report)
+        # A reference model without a Playground export counts as a failure.
+        ok = report["summary"]["failed"] == 0 and not report["summary"]["ref_only"]
+    else:
+        diff = compare(args.ref, args.test, args.match, ResultCache(args.cache_dir) if args.cache_dir else None)
+        report = diff.to_record()
+        ok = True  # single-pair mode only reports; use --batch for a pass/fail exit code
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    return 0 if ok else 1
+
+
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print(f"Usage: {sys.argv[0]} <ref.graphml> <test.graphml>")
-        sys.exit(1)
-    compare(sys.argv[1], sys.argv[2])
+    sys.exit(main())
@@ -0,0 +1,344 @@
+"""
+Batch Fisher Information Matrix checks over a corpus of SBML exports.
+
+Wraps `FIMSession` from `check_mm_fim_roadrunner.py` and schedules one model per
+task across a pool of long-lived worker processes, so each model only pays for
+its own RoadRunner compile instead of a fresh interpreter and import. Workers
+that exceed the per-model timeout are killed and replaced.
+
+One JSON object per model is streamed as soon as it finishes (eigenvalues,
+condition numbers, identifiable sets and per-phase timings), followed by a
+summary table.
+
+Usage examples::
+
+    # Every *.xml under a directory, 8 workers, 10 minutes per model
+    python scripts/fim_batch_roadrunner.py exports/ --jobs 8 --timeout 600 \
+        --output fim_results.jsonl
+
+    # Glob patterns and explicit files can be mixed
+    python scripts/fim_batch_roadrunner.py 'published/**/*.sbml' extra/model.xml
+
+Requirements:
+    pip install libroadrunner numpy
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import hashlib
+import json
+import math
+import multiprocessing as mp
+import os
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass, replace
+from multiprocessing.connection import Connection, wait
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Sequence, TextIO
+
+from check_mm_fim_roadrunner import (
+    CompiledModelCache,
+    FIMSession,
+    JacobianOptions,
+    SimulationConfig,
+    analyse_identifiability,
+    compute_fim,
+)
+
+
+SBML_SUFFIXES = ('.xml', '.sbml')
+
+
+@dataclass
+class _BatchWorker:
+    process: mp.process.BaseProcess
+    conn: Connection
+    model: Path | None = None
+    started: float = 0.0
+
+
+def _finite_or_none(value: float) -> float | None:
+    return float(value) if math.isfinite(value) else None
+
+
+def discover_models(inputs: Sequence[str]) -> List[Path]:
+    """Expand directories (recursively), glob patterns and plain files into SBML paths."""
+    found: Dict[Path, None] = {}
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            candidates = sorted(p for p in path.rglob('*') if p.suffix.lower() in SBML_SUFFIXES)
+        elif path.is_file():
+            candidates = [path]
+        else:
+            candidates = sorted(Path(p) for p in glob.glob(item, recursive=True))
+        for candidate in candidates:
+            if candidate.is_file():
+                found.setdefault(candidate.resolve(), None)
+    return list(found)
+
+
+def checkpoint_path(root: Path, sbml_path: Path) -> Path:
+    """Per-model checkpoint directory; the path hash keeps same-named models apart."""
+    tag = hashlib.sha256(str(sbml_path.resolve()).encode('utf-8')).hexdigest()[:8]
+    return root / f'{sbml_path.stem}-{tag}'
+
+
+def run_model(
+    sbml_path: Path,
+    config: SimulationConfig,
+    options: JacobianOptions,
+    parameters: Sequence[str] | None,
+    model_cache: CompiledModelCache | None = None,
+    checkpoint_root: Path | None = None,
+    resume: bool = False,
+) -> Dict[str, Any]:
+    """Compute the FIM for one model and return a JSON-ready record (never raises)."""
+    record: Dict[str, Any] = {'model': sbml_path.stem, 'path': str(sbml_path), 'status': 'ok'}
+    timings: Dict[str, float] = {}
+    record['timings'] = timings
+    t_start = time.perf_counter()
+    try:
+        t0 = time.perf_counter()
+        session = FIMSession(sbml_path, config, parameters=parameters, model_cache=model_cache)
+        timings['load'] = time.perf_counter() - t0
+        param_names = list(session.param_names)
+
+        t0 = time.perf_counter()
+        checkpoint_dir = checkpoint_path(checkpoint_root, sbml_path) if checkpoint_root is not None else None
+        J = session.jacobian(param_names, options, checkpoint_dir=checkpoint_dir, resume=resume)
+        timings['jacobian'] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        fim_stats = compute_fim(J)
+        ident_stats = analyse_identifiability(fim_stats.eigenvalues, fim_stats.eigenvectors, param_names)
+        timings['decomposition'] = time.perf_counter() - t0
+    except Exception as exc:  # report per-model failures without stopping the batch
+        record['status'] = 'error'
+        record['error'] = f'{type(exc).__name__}: {exc}'
+    else:
+        record.update(
+            parameters=param_names,
+            observables=list(session.observables),
+            eigenvalues=[float(val) for val in fim_stats.eigenvalues],
+            condition_number=_finite_or_none(fim_stats.condition_number),
+            regularized_condition=_finite_or_none(fim_stats.regularized_condition),
+            identifiable=ident_stats.identifiable_params,
+            unidentifiable=ident_stats.unidentifiable_params,
+            nullspace=[
+                {'eigenvalue': combo.eigenvalue, 'components': dict(combo.components)}
+                for combo in ident_stats.nullspace_combinations
+            ],
+        )
+    timings['total'] = time.perf_counter() - t_start
+    return record
+
+
+def _worker_loop(
+    conn: Connection,
+    config: SimulationConfig,
+    options: JacobianOptions,
+    parameters: Sequence[str] | None,
+    model_cache: CompiledModelCache | None,
+    checkpoint_root: Path | None,
+    resume: bool,
+) -> None:
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        conn.send(run_model(Path(task), config, options, parameters, model_cache, checkpoint_root, resume))
+
+
+def run_batch(
+    models: Sequence[Path],
+    config: SimulationConfig,
+    options: JacobianOptions,
+    parameters: Sequence[str] | None = None,
+    jobs: int = 1,
+    timeout: float | None = None,
+    model_cache: CompiledModelCache | None = None,
+    checkpoint_root: Path | None = None,
+    resume: bool = False,
+) -> Iterator[Dict[str, Any]]:
+    """Yield one record per model, in completion order.
+
+    Each worker process handles many models in turn; a worker that overruns
+    `timeout` seconds (or dies) is replaced and its model reported accordingly.
+    With `checkpoint_root`, finished perturbation columns survive such kills and
+    `resume` picks them up on the next run.
+    """
+    # Models run serially inside each worker; the batch pool supplies the parallelism.
+    options = replace(options, workers=1)
+    ctx = mp.get_context()
+    pending: Deque[Path] = deque(models)
+
+    def spawn() -> _BatchWorker:
+        parent_conn, child_conn = ctx.Pipe()
+        process = ctx.Process(
+            target=_worker_loop,
+            args=(child_conn, config, options, parameters, model_cache, checkpoint_root, resume),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        return _BatchWorker(process, parent_conn)
+
+    def retire(worker: _BatchWorker) -> None:
+        worker.process.kill()
+        worker.process.join()
+        worker.conn.close()
+
+    def failure(worker: _BatchWorker, status: str, message: str) -> Dict[str, Any]:
+        assert worker.model is not None
+        return {
+            'model': worker.model.stem,
+            'path': str(worker.model),
+            'status': status,
+            'error': message,
+            'timings': {'total': time.perf_counter() - worker.started},
+        }
+
+    workers = [spawn() for _ in range(max(1, min(jobs, len(models))))]
+    try:
+        while True:
+            for worker in workers:
+                if worker.model is None and pending:
+                    worker.model = pending.popleft()
+                    worker.started = time.perf_counter()
+                    worker.conn.send(str(worker.model))
+            busy = [worker for worker in workers if worker.model is not None]
+            if not busy:
+                break
+
+            wait([worker.conn for worker in busy], timeout=1.0)
+            now = time.perf_counter()
+            for idx, worker in enumerate(workers):
+                if worker.model is None:
+                    continue
+                if worker.conn.poll():
+                    try:
+                        record = worker.conn.recv()
+                    except EOFError:
+                        record = failure(worker, 'error', f'worker exited with code {worker.process.exitcode}')
+                        retire(worker)
+                        workers[idx] = spawn()
+                    else:
+                        worker.model = None
+                    yield record
+                elif not worker.process.is_alive():
+                    yield failure(worker, 'error', f'worker exited with code {worker.process.exitcode}')
+                    retire(worker)
+                    workers[idx] = spawn()
+                elif timeout is not None and now - worker.started > timeout:
+                    yield failure(worker, 'timeout', f'exceeded {timeout:g} s')
+                    retire(worker)
+                    workers[idx] = spawn()
+    finally:
+        for worker in workers:
+            try:
+                worker.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for worker in workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.kill()
+                worker.process.join()
+
+
+def print_summary(records: Sequence[Dict[str, Any]], stream: TextIO) -> None:
+    name_width = max([len('Model'), *(len(rec['model']) for rec in records)])
+    header = f"{'Model':<{name_width}}  {'Status':<7}  {'p':>4}  {'Ident.':>6}  {'Condition':>12}  {'Time [s]':>9}"
+    print(header, file=stream)
+    print('-' * len(header), file=stream)
+    for rec in records:
+        params = rec.get('parameters') or []
+        identifiable = rec.get('identifiable') or []
+        cond = rec.get('condition_number')
+        cond_text = f'{cond:.3e}' if cond is not None else ('inf' if rec['status'] == 'ok' else '-')
+        ident_text = f'{len(identifiable)}/{len(params)}' if rec['status'] == 'ok' else '-'
+        print(
+            f"{rec['model']:<{name_width}}  {rec['status']:<7}  {len(params) or '-':>4}  "
+            f"{ident_text:>6}  {cond_text:>12}  {rec['timings']['total']:>9.2f}",
+            file=stream,
+        )
+    counts = {status: sum(rec['status'] == status for rec in records) for status in ('ok', 'error', 'timeout')}
+    print(
+        f"\n{len(records)} models: {counts['ok']} ok, {counts['error']} failed, {counts['timeout']} timed out",
+        file=stream,
+    )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Run RoadRunner FIM checks over many SBML models.')
+    parser.add_argument('inputs', nargs='+', help='SBML files, directories (searched recursively) or glob patterns.')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='Worker processes (default: all cores).')
+    parser.add_argument('--timeout', type=float, help='Per-model wall-clock limit in seconds (default: none).')
+    parser.add_argument('--output', type=Path, help='Write JSON lines here instead of stdout.')
+    parser.add_argument('--parameters', nargs='+', help='Parameter IDs for every model (default: k_-prefixed params per model).')
+    parser.add_argument('--model-cache-dir', type=Path, help='Directory for compiled RoadRunner model states shared across runs.')
+    parser.add_argument('--model-cache-max-mb', type=float, default=2048.0, help='Compiled-model cache size cap in MiB (default: 2048).')
+    parser.add_argument('--method', choices=('fd', 'sensitivities'), default='fd', help='Jacobian source (default: fd).')
+    parser.add_argument('--checkpoint-dir', type=Path, help='Record finished fd columns per model under this directory.')
+    parser.add_argument('--resume', action='store_true', help='With --checkpoint-dir, skip columns completed by an earlier run.')
+    parser.add_argument('--screen-threshold', type=float, default=0.0, help='Relative one-sided sensitivity below which fd skips the central difference (default: 0 = off).')
+    parser.add_argument('--steps', type=int, default=500, help='Number of uniform integration steps (default: 500).')
+    parser.add_argument('--t-end', type=float, default=50.0, help='Simulation end time (default: 50).')
+    parser.add_argument('--rel-eps', type=float, default=1e-4, help='Relative perturbation size for finite differences (default: 1e-4).')
+    parser.add_argument('--abs-tol', type=float, default=1e-12, help='CVODE absolute tolerance (default: 1e-12).')
+    parser.add_argument('--rel-tol', type=float, default=1e-10, help='CVODE relative tolerance (default: 1e-10).')
+    parser.add_argument('--integrator', type=str, default='cvode', help="RoadRunner integrator to use (e.g. 'cvode', 'rk4').")
+    args = parser.parse_args()
+    if args.checkpoint_dir is not None and args.method != 'fd':
+        parser.error('--checkpoint-dir records finite-difference columns; it cannot be used with --method sensitivities')
+    return args
+
+
+def main() -> int:
+    args = parse_args()
+    models = discover_models(args.inputs)
+    if not models:
+        print('No SBML files matched the given inputs.', file=sys.stderr)
+        return 1
+
+    config = SimulationConfig(
+        end=args.t_end,
+        steps=args.steps,
+        rel_tol=args.rel_tol,
+        abs_tol=args.abs_tol,
+        integrator=args.integrator,
+    )
+    options = JacobianOptions(method=args.method, rel_eps=args.rel_eps, screen_threshold=args.screen_threshold)
+    model_cache = None
+    if args.model_cache_dir is not None:
+        model_cache = CompiledModelCache(args.model_cache_dir, int(args.model_cache_max_mb * 1024 * 1024))
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    records: List[Dict[str, Any]] = []
+    try:
+        for record in run_batch(
+            models, config, options, args.parameters, args.jobs, args.timeout, model_cache,
+            args.checkpoint_dir, args.resume,
+        ):
+            records.append(record)
+            out.write(json.dumps(record) + '\n')
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    # Keep stdout parseable as JSON lines when it carries the records.
+    print_summary(records, sys.stderr if out is sys.stdout else sys.stdout)
+    return 0 if all(rec['status'] == 'ok' for rec in records) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
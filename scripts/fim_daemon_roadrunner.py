@@ -0,0 +1,510 @@
+"""
+Long-running local FIM service that keeps compiled RoadRunner models warm.
+
+The web app computes the FIM in the browser (`services/fim.ts`); this daemon
+offers the RoadRunner path over JSON-RPC 2.0 on localhost HTTP or a Unix
+socket, so interactive queries skip SBML parsing and LLVM compilation:
+
+- Models are registered once (SBML body) and then referenced by their SHA-256
+  hash. Sessions (`FIMSession`, pooled compiled instances) are kept per model,
+  simulation config, parameter set and observable set, with LRU eviction.
+- Requests run on a thread pool. Identical in-flight requests are coalesced
+  onto one computation, and recent results are memoised.
+- Results mirror the `FIMResult` shape of `services/fim.ts` (camelCase keys,
+  eigenvectors as matrix columns, non-finite numbers as null).
+
+Methods: ``register`` {sbml} -> {sbmlHash}; ``fim`` {sbml | sbmlHash, parameters?,
+observables?, config?, method?, relEps?, screenThreshold?}; ``stats``; ``ping``.
+
+Usage examples::
+
+    # HTTP on 127.0.0.1:8765 (CORS allowed for the Vite dev server)
+    python scripts/fim_daemon_roadrunner.py --port 8765 --workers 4
+
+    # Unix socket instead of TCP
+    python scripts/fim_daemon_roadrunner.py --unix-socket /tmp/fim.sock
+
+    # Query
+    curl -s localhost:8765 -d '{"jsonrpc": "2.0", "id": 1, "method": "fim",
+        "params": {"sbmlHash": "<hash>", "parameters": ["k_on", "k_cat"], "config": {"steps": 200}}}'
+
+Requirements:
+    pip install libroadrunner numpy
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import signal
+import socketserver
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from check_mm_fim_roadrunner import (
+    CompiledModelCache,
+    FIMDecomposition,
+    FIMSession,
+    IdentifiabilitySummary,
+    JacobianOptions,
+    SimulationConfig,
+    analyse_identifiability,
+    top_correlated_pairs,
+)
+
+
+# JSON-RPC 2.0 error codes.
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+SERVER_ERROR = -32000
+
+MAX_BODY_BYTES = 64 * 1024 * 1024
+MAX_BATCH = 256
+
+CONFIG_FIELDS = {f.name for f in fields(SimulationConfig)}
+
+
+class RPCError(Exception):
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+
+
+@dataclass(frozen=True)
+class FIMRequest:
+    sbml_hash: str
+    config: SimulationConfig
+    parameters: Tuple[str, ...] | None
+    observables: Tuple[str, ...] | None
+    options: JacobianOptions
+
+    def session_key(self) -> str:
+        return _digest([self.sbml_hash, asdict(self.config), self.parameters, self.observables])
+
+    def result_key(self) -> str:
+        return _digest([self.session_key(), asdict(self.options)])
+
+
+def _digest(payload: Any) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _json_number(value: float) -> float | None:
+    return float(value) if math.isfinite(value) else None
+
+
+def _json_matrix(matrix: np.ndarray) -> List[List[float | None]]:
+    return [[_json_number(v) for v in row] for row in np.asarray(matrix, dtype=float)]
+
+
+def fim_result(
+    decomposition: FIMDecomposition,
+    ident: IdentifiabilitySummary,
+    param_names: Sequence[str],
+    observables: Sequence[str],
+) -> Dict[str, Any]:
+    """JSON payload shaped like `FIMResult` in `services/fim.ts`."""
+    eigenvalues = decomposition.eigenvalues
+    pairs = top_correlated_pairs(decomposition.correlations, param_names)
+    index = {pname: i for i, pname in enumerate(param_names)}
+    return {
+        'paramNames': list(param_names),
+        'observables': list(observables),
+        'eigenvalues': [_json_number(v) for v in eigenvalues],
+        'eigenvectors': _json_matrix(decomposition.eigenvectors),
+        'conditionNumber': _json_number(decomposition.condition_number),
+        'regularizedConditionNumber': _json_number(decomposition.regularized_condition),
+        'maxEigenvalue': _json_number(eigenvalues[0]),
+        'minEigenvalue': _json_number(eigenvalues[-1]),
+        'covarianceMatrix': _json_matrix(decomposition.covariance),
+        'correlations': _json_matrix(decomposition.correlations),
+        'fimMatrix': _json_matrix(decomposition.fim_matrix),
+        'identifiableParams': ident.identifiable_params,
+        'unidentifiableParams': ident.unidentifiable_params,
+        'nullspaceCombinations': [
+            {
+                'eigenvalue': _json_number(combo.eigenvalue),
+                'components': [{'name': name, 'loading': loading} for name, loading in combo.components],
+            }
+            for combo in ident.nullspace_combinations
+        ],
+        'topCorrelatedPairs': [
+            {
+                'i': index[pair.names[0]],
+                'j': index[pair.names[1]],
+                'names': list(pair.names),
+                'corr': _json_number(pair.corr),
+            }
+            for pair in pairs
+        ],
+    }
+
+
+class FIMService:
+    """Registry of warm sessions plus request coalescing; transport-agnostic."""
+
+    def __init__(
+        self,
+        state_dir: Path,
+        workers: int = 4,
+        pool_size: int = 2,
+        max_sessions: int = 16,
+        max_results: int = 128,
+    ) -> None:
+        self.models_dir = state_dir / 'models'
+        self.models_dir.mkdir(parents=True, exist_ok=True)
+        self.model_cache = CompiledModelCache(state_dir / 'compiled', 2 << 30)
+        self.workers = workers
+        self.pool_size = pool_size
+        self.max_sessions = max_sessions
+        self.max_results = max_results
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fim')
+        self._lock = threading.Lock()
+        self._sessions: OrderedDict[str, Future] = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._results: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self._counters = {'requests': 0, 'computed': 0, 'coalesced': 0, 'memoised': 0, 'sessions_created': 0}
+
+    def register(self, sbml: str) -> str:
+        data = sbml.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.models_dir / f'{digest}.xml'
+        if not path.exists():
+            tmp = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        return digest
+
+    def parse_request(self, params: Dict[str, Any]) -> FIMRequest:
+        if 'sbml' in params:
+            sbml_hash = self.register(_string_param(params, 'sbml'))
+        elif 'sbmlHash' in params:
+            sbml_hash = _string_param(params, 'sbmlHash').lower()
+            if len(sbml_hash) != 64 or any(ch not in '0123456789abcdef' for ch in sbml_hash):
+                raise RPCError(INVALID_PARAMS, 'sbmlHash must be a SHA-256 hex digest.')
+            if not (self.models_dir / f'{sbml_hash}.xml').exists():
+                raise RPCError(INVALID_PARAMS, f'Unknown sbmlHash {sbml_hash}; call register first.')
+        else:
+            raise RPCError(INVALID_PARAMS, 'Provide either sbml or sbmlHash.')
+
+        raw_config = params.get('config') or {}
+        if not isinstance(raw_config, dict):
+            raise RPCError(INVALID_PARAMS, 'config must be an object')
+        raw_config = dict(raw_config)
+        unknown = sorted(set(raw_config) - CONFIG_FIELDS)
+        if unknown:
+            raise RPCError(INVALID_PARAMS, f'Unknown config fields: {", ".join(unknown)}')
+        times = raw_config.get('times')
+        if times is not None and not isinstance(times, list):
+            raise RPCError(INVALID_PARAMS, 'config.times must be an array of numbers')
+        try:
+            if times is not None:
+                raw_config['times'] = tuple(float(t) for t in times)
+            config = SimulationConfig(**raw_config)
+            options = JacobianOptions(
+                method=_string_param(params, 'method', 'fd'),
+                rel_eps=float(params.get('relEps', 1e-4)),
+                screen_threshold=float(params.get('screenThreshold', 0.0)),
+            )
+        except (TypeError, ValueError) as exc:
+            raise RPCError(INVALID_PARAMS, str(exc)) from exc
+        if options.method not in ('fd', 'sensitivities', 'steady_state'):
+            raise RPCError(INVALID_PARAMS, f'Unknown method: {options.method}')
+
+        return FIMRequest(
+            sbml_hash=sbml_hash,
+            config=config,
+            parameters=_string_list_param(params, 'parameters'),
+            observables=_string_list_param(params, 'observables'),
+            options=options,
+        )
+
+    def _session(self, request: FIMRequest) -> FIMSession:
+        key = request.session_key()
+        with self._lock:
+            future = self._sessions.get(key)
+            owner = future is None
+            if owner:
+                # Reserve the slot so concurrent requests for a new session compile it once.
+                future = Future()
+                self._sessions[key] = future
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(key)
+        if not owner:
+            return future.result()
+        try:
+            session = FIMSession(
+                self.models_dir / f'{request.sbml_hash}.xml',
+                request.config,
+                parameters=request.parameters,
+                pool_size=self.pool_size,
+                model_cache=self.model_cache,
+                observables=request.observables,
+            )
+        except BaseException as exc:
+            with self._lock:
+                self._sessions.pop(key, None)
+            future.set_exception(exc)
+            raise
+        with self._lock:
+            self._counters['sessions_created'] += 1
+        future.set_result(session)
+        return session
+
+    def _compute(self, request: FIMRequest) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        session = self._session(request)
+        t1 = time.perf_counter()
+        decomposition = session.fim(options=request.options)
+        param_names = list(session.param_names)
+        ident = analyse_identifiability(decomposition.eigenvalues, decomposition.eigenvectors, param_names)
+        result = fim_result(decomposition, ident, param_names, session.observables)
+        result['sbmlHash'] = request.sbml_hash
+        result['benchmark'] = {'prepareModelMs': (t1 - t0) * 1e3, 'totalMs': (time.perf_counter() - t0) * 1e3}
+        return result
+
+    def fim(self, request: FIMRequest) -> Dict[str, Any]:
+        key = request.result_key()
+        with self._lock:
+            self._counters['requests'] += 1
+            memo = self._results.get(key)
+            if memo is not None:
+                self._results.move_to_end(key)
+                self._counters['memoised'] += 1
+                return {**memo, 'daemon': {'source': 'memo'}}
+            future = self._inflight.get(key)
+            source = 'coalesced'
+            if future is None:
+                future = self._executor.submit(self._compute, request)
+                self._inflight[key] = future
+                future.add_done_callback(lambda done: self._finish(key, done))
+                source = 'computed'
+            self._counters[source] += 1
+        try:
+            result = future.result()
+        except RPCError:
+            raise
+        except Exception as exc:
+            raise RPCError(SERVER_ERROR, f'{type(exc).__name__}: {exc}') from exc
+        return {**result, 'daemon': {'source': source}}
+
+    def _finish(self, key: str, future: Future) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+            if future.exception() is None:
+                self._results[key] = future.result()
+                while len(self._results) > self.max_results:
+                    self._results.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._counters,
+                'sessions': len(self._sessions),
+                'inflight': len(self._inflight),
+                'memoisedResults': len(self._results),
+            }
+
+    def dispatch(self, method: str, params: Dict[str, Any]) -> Any:
+        handlers: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+            'ping': lambda _: 'pong',
+            'stats': lambda _: self.stats(),
+            'register': lambda p: {'sbmlHash': self.register(_string_param(p, 'sbml'))} if 'sbml' in p else _missing('sbml'),
+            'fim': lambda p: self.fim(self.parse_request(p)),
+        }
+        handler = handlers.get(method)
+        if handler is None:
+            raise RPCError(METHOD_NOT_FOUND, f'Unknown method: {method}')
+        return handler(params)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _missing(name: str) -> Any:
+    raise RPCError(INVALID_PARAMS, f'Missing parameter: {name}')
+
+
+def _string_param(params: Dict[str, Any], name: str, default: str | None = None) -> str:
+    value = params.get(name, default)
+    if not isinstance(value, str):
+        raise RPCError(INVALID_PARAMS, f'{name} must be a string')
+    return value
+
+
+def _string_list_param(params: Dict[str, Any], name: str) -> Tuple[str, ...] | None:
+    value = params.get(name)
+    if value is None:
+        return None
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise RPCError(INVALID_PARAMS, f'{name} must be an array of strings')
+    return tuple(value) or None
+
+
+def handle_rpc(service: FIMService, payload: Any) -> Dict[str, Any] | None:
+    """Evaluate one JSON-RPC request object; returns None for notifications."""
+    if not isinstance(payload, dict) or payload.get('jsonrpc') != '2.0' or not isinstance(payload.get('method'), str):
+        return {'jsonrpc': '2.0', 'id': None, 'error': {'code': INVALID_REQUEST, 'message': 'Invalid request'}}
+    request_id = payload.get('id')
+    params = payload.get('params') or {}
+    try:
+        if not isinstance(params, dict):
+            raise RPCError(INVALID_PARAMS, 'params must be an object')
+        result = service.dispatch(payload['method'], params)
+    except RPCError as exc:
+        response: Dict[str, Any] = {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': exc.code, 'message': str(exc)}}
+    except Exception as exc:
+        message = f'Internal error: {type(exc).__name__}: {exc}'
+        response = {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': INTERNAL_ERROR, 'message': message}}
+    else:
+        response = {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+    return response if 'id' in payload else None
+
+
+def make_handler(
+    service: FIMService,
+    allow_origins: Sequence[str],
+    quiet: bool = False,
+    max_body_bytes: int = MAX_BODY_BYTES,
+    max_batch: int = MAX_BATCH,
+) -> type:
+    class RPCHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def address_string(self) -> str:
+            # Unix-socket peers have no (host, port) pair.
+            return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+        def _cors(self) -> None:
+            origin = self.headers.get('Origin')
+            if origin and (origin in allow_origins or '*' in allow_origins):
+                self.send_header('Access-Control-Allow-Origin', origin)
+                self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+                self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
+                self.send_header('Vary', 'Origin')
+
+        def _send(self, status: int, body: bytes) -> None:
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self._cors()
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_OPTIONS(self) -> None:
+            self.send_response(204)
+            self.send_header('Content-Length', '0')
+            self._cors()
+            self.end_headers()
+
+        def do_POST(self) -> None:
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+            except ValueError:
+                length = -1
+            if not 0 <= length <= max_body_bytes:
+                # The body is left unread, so the connection cannot be reused.
+                self.close_connection = True
+                message = f'Content-Length must be between 0 and {max_body_bytes} bytes'
+                error = {'jsonrpc': '2.0', 'id': None, 'error': {'code': INVALID_REQUEST, 'message': message}}
+                self._send(413 if length > max_body_bytes else 400, json.dumps(error).encode('utf-8'))
+                return
+            try:
+                payload = json.loads(self.rfile.read(length) or b'null')
+            except ValueError:
+                response: Any = {'jsonrpc': '2.0', 'id': None, 'error': {'code': PARSE_ERROR, 'message': 'Parse error'}}
+            else:
+                if isinstance(payload, list):
+                    if not payload:
+                        response = {'jsonrpc': '2.0', 'id': None, 'error': {'code': INVALID_REQUEST, 'message': 'Empty batch'}}
+                    elif len(payload) > max_batch:
+                        message = f'Batch of {len(payload)} requests exceeds the limit of {max_batch}'
+                        response = {'jsonrpc': '2.0', 'id': None, 'error': {'code': INVALID_REQUEST, 'message': message}}
+                    else:
+                        # Batch entries run concurrently so each one can be coalesced or memoised independently;
+                        # more threads than service workers would only queue on the service executor.
+                        with ThreadPoolExecutor(max_workers=max(1, min(len(payload), service.workers))) as batch:
+                            replies = list(batch.map(lambda item: handle_rpc(service, item), payload))
+                        response = [reply for reply in replies if reply is not None]
+                else:
+                    response = handle_rpc(service, payload)
+            if response is None or response == []:
+                self._send(204, b'')
+                return
+            self._send(200, json.dumps(response, allow_nan=False).encode('utf-8'))
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - BaseHTTPRequestHandler signature
+            if not quiet:
+                super().log_message(format, *args)
+
+    return RPCHandler
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Serve warm RoadRunner FIM computations over JSON-RPC.')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind (default: 127.0.0.1).')
+    parser.add_argument('--port', type=int, default=8765, help='TCP port (default: 8765).')
+    parser.add_argument('--unix-socket', type=Path, help='Serve on this Unix socket instead of TCP.')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent FIM computations (default: 4).')
+    parser.add_argument('--pool-size', type=int, default=2, help='Compiled RoadRunner instances per session (default: 2).')
+    parser.add_argument('--max-sessions', type=int, default=16, help='Warm sessions kept before LRU eviction (default: 16).')
+    parser.add_argument('--max-results', type=int, default=128, help='Memoised results kept (default: 128; 0 = off).')
+    parser.add_argument('--state-dir', type=Path, help='Directory for registered SBML and compiled model states (default: temporary).')
+    parser.add_argument('--max-body-mb', type=float, default=MAX_BODY_BYTES / (1024 * 1024), help='Largest request body accepted, in MiB (default: 64).')
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH, help='Most requests accepted in one JSON-RPC batch (default: 256).')
+    parser.add_argument('--quiet', action='store_true', help='Do not log each request to stderr.')
+    parser.add_argument('--allow-origin', nargs='*', default=['http://localhost:3000'], help="Browser origins allowed via CORS (default: http://localhost:3000; '*' for any).")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    with tempfile.TemporaryDirectory(prefix='fim-daemon-') as tmp_dir:
+        state_dir = args.state_dir or Path(tmp_dir)
+        service = FIMService(state_dir, args.workers, args.pool_size, args.max_sessions, args.max_results)
+        handler = make_handler(service, args.allow_origin or [], args.quiet, int(args.max_body_mb * 1024 * 1024), args.max_batch)
+        server: socketserver.BaseServer
+        if args.unix_socket is not None:
+            args.unix_socket.unlink(missing_ok=True)
+            server = ThreadingUnixHTTPServer(str(args.unix_socket), handler)
+            where = f'unix:{args.unix_socket}'
+        else:
+            server = ThreadingHTTPServer((args.host, args.port), handler)
+            where = f'http://{args.host}:{args.port}'
+        print(f'FIM daemon listening on {where} (state: {state_dir})', flush=True)
+        # serve_forever must be stopped from another thread; SIGTERM then cleans up like Ctrl-C.
+        signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown, daemon=True).start())
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            service.shutdown()
+            if args.unix_socket is not None:
+                args.unix_socket.unlink(missing_ok=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,393 @@
+"""
+Greedy optimal sampling-time (or observable) design from RoadRunner sensitivities.
+
+The Jacobian assembled by `check_mm_fim_roadrunner.py` is time-major: row
+``t * O + o`` holds the sensitivities of observable ``o`` at time point ``t``.
+This script keeps that structure as a sensitivity tensor ``S[T, O, p]`` and picks
+the ``k`` candidates that maximise the information gained:
+
+- D-optimal: maximise ``log det F``. Candidate gains come from the matrix
+  determinant lemma, ``log det(I + W^T W)`` with ``W = L^{-1} G^T``, so scoring all
+  candidates costs one triangular solve against the current Cholesky factor L.
+- E-optimal: maximise the smallest eigenvalue of F (while it is a repeated
+  eigenvalue no candidate can lift, the smallest one it can). In the eigenbasis
+  of F each candidate is a rank-m update ``D + H^T H``; interlacing bounds skip
+  candidates that cannot beat the best one found so far, and an inertia test on
+  an m×m matrix (instead of a p×p eigensolve) rejects or bisects the rest.
+
+After each pick, F and L are updated with rank-one Cholesky updates, one per
+row of the chosen candidate, rather than refactorised; the E path re-diagonalises
+the p×p F once per pick. The tensor S is cached
+on disk, keyed by model hash, simulation settings and parameters, so repeated
+designs (different k, criterion or candidate type) skip the simulations.
+
+Usage examples::
+
+    # 10 most informative time points (all observables measured at each)
+    python scripts/fim_design_roadrunner.py model.xml --select 10
+
+    # E-optimal choice of single (time, observable) measurements on a fine grid
+    python scripts/fim_design_roadrunner.py model.xml --steps 5000 --candidates measurements \
+        --criterion E --select 25 --cache-dir .fim_design_cache
+
+Requirements:
+    pip install libroadrunner numpy
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from check_mm_fim_roadrunner import (
+    FIMSession,
+    JacobianOptions,
+    SimulationConfig,
+    file_digest,
+    load_observation_times,
+)
+
+
+CANDIDATE_KINDS = ('times', 'observables', 'measurements')
+
+
+@dataclass(frozen=True)
+class DesignStep:
+    candidate: int
+    label: str
+    gain: float
+    criterion: float
+
+
+def sensitivity_tensor(
+    session: FIMSession,
+    param_names: Sequence[str],
+    options: JacobianOptions,
+    cache_dir: Path | None = None,
+) -> np.ndarray:
+    """Return S[T, O, p] for the session's time grid, memory-mapped from cache when possible."""
+    shape = (session.config.points, len(session.observables), len(param_names))
+    cache_path = None
+    if cache_dir is not None:
+        payload = json.dumps(
+            {
+                'sbml': file_digest(session.sbml_path),
+                'config': asdict(session.config),
+                'parameters': list(param_names),
+                'observables': list(session.observables),
+                'method': options.method,
+                'rel_eps': options.rel_eps,
+            },
+            sort_keys=True,
+        )
+        cache_path = Path(cache_dir) / f"{hashlib.sha256(payload.encode('utf-8')).hexdigest()}.npy"
+        if cache_path.exists():
+            cached = np.load(cache_path, mmap_mode='r')
+            if cached.shape == shape:
+                return cached
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+    if cache_path is None:
+        return np.asarray(session.jacobian(param_names, options)).reshape(shape)
+    # Build into side files and publish atomically so interrupted runs never look cached.
+    # J comes back as a Fortran-order (T*O, p) memmap; it is copied column by column
+    # into a C-order (T, O, p) tensor so later hits map it without reshaping.
+    partial = cache_path.with_name(f'{cache_path.stem}.{os.getpid()}.partial.npy')
+    jacobian_path = cache_path.with_name(f'{cache_path.stem}.{os.getpid()}.jacobian.npy')
+    try:
+        J = session.jacobian(param_names, options, out_path=jacobian_path)
+        S = np.lib.format.open_memmap(partial, mode='w+', dtype=np.float64, shape=shape)
+        for col in range(shape[2]):
+            S[:, :, col] = np.asarray(J[:, col]).reshape(shape[0], shape[1])
+        S.flush()
+        del S, J
+        os.replace(partial, cache_path)
+    finally:
+        for leftover in (partial, jacobian_path):
+            leftover.unlink(missing_ok=True)
+    return np.load(cache_path, mmap_mode='r')
+
+
+def candidate_blocks(S: np.ndarray, kind: str) -> np.ndarray:
+    """Group the rows of S into candidates, shape (C, rows_per_candidate, p)."""
+    T, O, p = S.shape
+    if kind == 'times':
+        return np.asarray(S)
+    if kind == 'observables':
+        return np.asarray(S).transpose(1, 0, 2)
+    if kind == 'measurements':
+        return np.asarray(S).reshape(T * O, 1, p)
+    raise ValueError(f'Unknown candidate kind: {kind}')
+
+
+def candidate_labels(times: np.ndarray, observables: Sequence[str], kind: str) -> List[str]:
+    if kind == 'times':
+        return [f't={t:g}' for t in times]
+    if kind == 'observables':
+        return list(observables)
+    return [f'{obs}@t={t:g}' for t in times for obs in observables]
+
+
+def cholesky_update(L: np.ndarray, x: np.ndarray) -> None:
+    """In-place rank-one update so that L L^T becomes L L^T + x x^T."""
+    x = np.array(x, dtype=float)
+    for k in range(L.shape[0]):
+        r = math.hypot(L[k, k], x[k])
+        c = r / L[k, k]
+        s = x[k] / L[k, k]
+        L[k, k] = r
+        if k + 1 < L.shape[0]:
+            L[k + 1:, k] = (L[k + 1:, k] + s * x[k + 1:]) / c
+            x[k + 1:] = c * x[k + 1:] - s * L[k + 1:, k]
+
+
+def _lower_solve(L: np.ndarray, B: np.ndarray) -> np.ndarray:
+    # Forward substitution, vectorised over the columns of B.
+    X = np.empty_like(B, dtype=float)
+    for i in range(L.shape[0]):
+        X[i] = (B[i] - L[i, :i] @ X[:i]) / L[i, i]
+    return X
+
+
+def d_optimal_gains(L: np.ndarray, blocks: np.ndarray) -> np.ndarray:
+    """log det(F + G_c^T G_c) - log det F for every candidate block G_c."""
+    C, m, p = blocks.shape
+    W = _lower_solve(L, blocks.reshape(C * m, p).T).T.reshape(C, m, p)
+    if m == 1:
+        return np.log1p(np.einsum('cmp,cmp->c', W, W))
+    if m <= p:
+        gram = np.einsum('cip,cjp->cij', W, W) + np.eye(m)
+    else:
+        gram = np.einsum('cmi,cmj->cij', W, W) + np.eye(p)
+    return np.linalg.slogdet(gram)[1]
+
+
+def _count_below(d: np.ndarray, H: np.ndarray, mu: np.ndarray) -> np.ndarray:
+    """Eigenvalues of ``diag(d) + H_c^T H_c`` below ``mu_c``, for every candidate c.
+
+    Haynsworth inertia additivity on ``[[D - mu, H^T], [H, -I]]`` gives
+    ``#(d < mu) - #(eigenvalues of K <= 0)`` with ``K = I + H (D - mu)^{-1} H^T``,
+    so each test costs an m×m rather than a p×p eigenvalue problem.
+    """
+    with np.errstate(divide='ignore'):
+        inv = 1.0 / (d[None, :] - mu[:, None])
+    if H.shape[1] == 1:
+        K = 1.0 + np.einsum('cp,cp->c', H[:, 0] * inv, H[:, 0])
+        nonpositive = (K <= 0).astype(int)
+    else:
+        K = np.einsum('cip,cp,cjp->cij', H, inv, H) + np.eye(H.shape[1])
+        nonpositive = np.count_nonzero(np.linalg.eigvalsh(K) <= 0, axis=1)
+    return np.count_nonzero(d[None, :] < mu[:, None], axis=1) - nonpositive
+
+
+def e_optimal_best(
+    d: np.ndarray,
+    V: np.ndarray,
+    blocks: np.ndarray,
+    available: np.ndarray,
+    rtol: float = 1e-14,
+    chunk: int = 1024,
+) -> Tuple[int, float]:
+    """Greedy E-optimal pick given F = V diag(d) V^T (d ascending); returns (candidate, new lambda_min).
+
+    A candidate of rank r cannot lift lambda_min while it has multiplicity k > r
+    (e.g. the isotropic prior), so candidates are ranked by the eigenvalue
+    ``lambda_j`` of ``F + G_c^T G_c`` with ``j = max(0, k - r)``: the smallest one
+    they can still raise. That is plain lambda_min once F has full rank.
+
+    ``lambda_j`` lies between ``d_j`` (Weyl) and ``min(d_j + |G_c V_{:j+1}|_F^2,
+    d_{j+r})`` (Courant–Fischer, interlacing). Candidates are visited by
+    decreasing upper bound; once an incumbent exists, one inertia test discards
+    every candidate below it and only the survivors are bisected. Scores within
+    ``rtol`` of the matrix norm are ties, broken by the information |G_c|_F^2.
+    """
+    C, m, p = blocks.shape
+    atol = rtol * max(abs(float(d[-1])), np.finfo(float).tiny)
+    # Directions a candidate can lift measurably: sigma^2 above the precision of the
+    # updated F. Often well below min(m, p), e.g. rows tied by conservation laws.
+    sigma2 = np.linalg.svd(blocks[available], compute_uv=False) ** 2
+    lifted = sigma2 > rtol * (abs(float(d[-1])) + sigma2[:, :1])
+    rank = max(1, int(np.max(np.count_nonzero(lifted, axis=1), initial=0)))
+    j = max(0, int(np.count_nonzero(d <= d[0] + atol)) - rank)
+    along = blocks @ V[:, :j + 1]
+    bound = d[j] + np.einsum('cmk,cmk->c', along, along)
+    if j + rank < p:
+        bound = np.minimum(bound, d[j + rank])
+    bound[~available] = -np.inf
+
+    scores = np.full(C, -np.inf)
+    flat = available & (bound <= d[j] + atol)  # cannot lift lambda_j measurably
+    scores[flat] = d[j]
+    best_score = float(d[j]) if flat.any() else -np.inf
+    rest = np.flatnonzero(available & ~flat)
+    rest = rest[np.argsort(-bound[rest], kind='stable')]
+    for start in range(0, rest.size, chunk):
+        idx = rest[start:start + chunk]
+        idx = idx[bound[idx] >= best_score - atol]
+        if idx.size == 0:
+            break
+        H = blocks[idx] @ V
+        if m > p:
+            # Only H^T H matters; its R factor is p×p.
+            H = np.linalg.qr(H, mode='r')
+        if best_score > d[j] + atol:
+            keep = _count_below(d, H, np.full(idx.size, best_score - atol)) <= j
+            idx, H = idx[keep], H[keep]
+            if idx.size == 0:
+                continue
+        lo = np.full(idx.size, float(d[j]))
+        hi = bound[idx].copy()
+        # hi bounds the scale of the updated spectrum and keeps tol above one ulp.
+        tol = np.maximum(atol, rtol * hi)
+        pending = np.flatnonzero(hi - lo > tol)
+        while pending.size:
+            mid = 0.5 * (lo[pending] + hi[pending])
+            below = _count_below(d, H[pending], mid) > j
+            hi[pending[below]] = mid[below]
+            lo[pending[~below]] = mid[~below]
+            pending = pending[hi[pending] - lo[pending] > tol[pending]]
+        scores[idx] = lo
+        best_score = max(best_score, float(lo.max()))
+        atol = max(atol, rtol * best_score)
+
+    energy = np.einsum('cmp,cmp->c', blocks, blocks)
+    best = int(np.argmax(np.where(scores >= best_score - atol, energy, -np.inf)))
+    value = float(scores[best]) if j == 0 else float(d[0])
+    return best, value
+
+
+def design_prior(blocks: np.ndarray, ridge: float) -> float:
+    """Ridge added to F so it is positive definite before the first pick."""
+    p = blocks.shape[2]
+    return ridge * (float(np.einsum('cmp,cmp->', blocks, blocks)) / p or 1.0)
+
+
+def greedy_design(
+    blocks: np.ndarray,
+    labels: Sequence[str],
+    select: int,
+    criterion: str = 'D',
+    ridge: float = 1e-8,
+) -> Tuple[List[DesignStep], np.ndarray]:
+    """Pick `select` candidates greedily; returns the steps and the final (regularised) F.
+
+    F starts at ``design_prior(blocks, ridge) * I``.
+    """
+    C, m, p = blocks.shape
+    prior = design_prior(blocks, ridge)
+    F = prior * np.eye(p)
+    L = math.sqrt(prior) * np.eye(p)
+    available = np.ones(C, dtype=bool)
+    steps: List[DesignStep] = []
+
+    if criterion not in ('D', 'E'):
+        raise ValueError(f'Unknown design criterion: {criterion}')
+
+    for _ in range(min(select, C)):
+        if criterion == 'D':
+            scores = d_optimal_gains(L, blocks)
+            scores[~available] = -np.inf
+            best = int(np.argmax(scores))
+        else:
+            best, best_value = e_optimal_best(*np.linalg.eigh(F), blocks, available)
+        available[best] = False
+
+        for row in blocks[best]:
+            F += np.outer(row, row)
+            cholesky_update(L, row)
+
+        if criterion == 'D':
+            value = 2.0 * float(np.sum(np.log(np.diag(L))))
+            gain = float(scores[best])
+        else:
+            value = best_value
+            gain = value - (steps[-1].criterion if steps else prior)
+        steps.append(DesignStep(best, labels[best], gain, value))
+    return steps, F
+
+
+def design_efficiency(F_design: np.ndarray, F_full: np.ndarray, criterion: str) -> float:
+    """D-efficiency (det ratio ** 1/p) or E-efficiency (lambda_min ratio) versus all candidates."""
+    if criterion == 'D':
+        p = F_full.shape[0]
+        return float(np.exp((np.linalg.slogdet(F_design)[1] - np.linalg.slogdet(F_full)[1]) / p))
+    return float(np.linalg.eigvalsh(F_design)[0] / np.linalg.eigvalsh(F_full)[0])
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Greedy D-/E-optimal sampling design from RoadRunner sensitivities.')
+    parser.add_argument('sbml_file', type=Path, help='Path to SBML model exported from BioNetGen.')
+    parser.add_argument('--select', type=int, default=10, help='Number of candidates to pick (default: 10).')
+    parser.add_argument('--criterion', choices=('D', 'E'), default='D', help='Optimality criterion (default: D).')
+    parser.add_argument('--candidates', choices=CANDIDATE_KINDS, default='times', help='What a candidate is: a time point (all observables), an observable (all times) or a single measurement (default: times).')
+    parser.add_argument('--ridge', type=float, default=1e-8, help='Prior F = ridge * mean diagonal information * I (default: 1e-8).')
+    parser.add_argument('--parameters', nargs='+', help='Parameter IDs to differentiate (default: kinetic params detected).')
+    parser.add_argument('--method', choices=('fd', 'sensitivities'), default='fd', help='Jacobian source (default: fd).')
+    parser.add_argument('--steps', type=int, default=500, help='Number of uniform integration steps (default: 500).')
+    parser.add_argument('--t-end', type=float, default=50.0, help='Simulation end time (default: 50).')
+    parser.add_argument('--times-csv', type=Path, help='Candidate sampling times from a CSV instead of the uniform grid.')
+    parser.add_argument('--observables', nargs='+', help='Observable IDs that can be measured (default: every obs_ parameter).')
+    parser.add_argument('--rel-eps', type=float, default=1e-4, help='Relative perturbation size for finite differences (default: 1e-4).')
+    parser.add_argument('--abs-tol', type=float, default=1e-12, help='CVODE absolute tolerance (default: 1e-12).')
+    parser.add_argument('--rel-tol', type=float, default=1e-10, help='CVODE relative tolerance (default: 1e-10).')
+    parser.add_argument('--integrator', type=str, default='cvode', help="RoadRunner integrator to use (e.g. 'cvode', 'rk4').")
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes for perturbation runs (default: 1).')
+    parser.add_argument('--cache-dir', type=Path, help='Directory for cached sensitivity tensors (default: disabled).')
+    parser.add_argument('--out', type=Path, help='Write the selected design to this JSON file.')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    config = SimulationConfig(
+        end=args.t_end,
+        steps=args.steps,
+        rel_tol=args.rel_tol,
+        abs_tol=args.abs_tol,
+        integrator=args.integrator,
+        times=load_observation_times(args.times_csv) if args.times_csv is not None else None,
+    )
+    options = JacobianOptions(method=args.method, rel_eps=args.rel_eps, workers=args.workers)
+    session = FIMSession(args.sbml_file, config, parameters=args.parameters, observables=args.observables)
+    param_names = list(session.param_names)
+
+    S = sensitivity_tensor(session, param_names, options, args.cache_dir)
+    times = config.observation_times
+    blocks = candidate_blocks(S, args.candidates)
+    labels = candidate_labels(times, session.observables, args.candidates)
+
+    steps, F_design = greedy_design(blocks, labels, args.select, args.criterion, args.ridge)
+    flat = np.asarray(S).reshape(-1, len(param_names))
+    F_full = flat.T @ flat + design_prior(blocks, args.ridge) * np.eye(len(param_names))
+    efficiency = design_efficiency(F_design, F_full, args.criterion)
+
+    print(f'{args.criterion}-optimal design: {len(steps)} of {len(labels)} {args.candidates}, parameters: {", ".join(param_names)}\n')
+    value_name = 'log det F' if args.criterion == 'D' else 'lambda_min'
+    print(f"  {'#':>3}  {'candidate':<28} {'gain':>12} {value_name:>14}")
+    for idx, step in enumerate(steps, start=1):
+        print(f'  {idx:>3}  {step.label:<28} {step.gain:>12.4g} {step.criterion:>14.6g}')
+    print(f'\n{args.criterion}-efficiency relative to all candidates: {efficiency:.4f}')
+
+    if args.out:
+        result: Dict[str, Any] = {
+            'sbml': str(args.sbml_file),
+            'criterion': args.criterion,
+            'candidates': args.candidates,
+            'parameters': param_names,
+            'observables': list(session.observables),
+            'selected': [asdict(step) for step in steps],
+            'efficiency': efficiency,
+        }
+        args.out.write_text(json.dumps(result, indent=2), encoding='utf-8')
+        print(f'Design written to: {args.out}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+/**
+ * Run the production FIM service (`services/fim.ts`) on a BNGL model from Node and print the
+ * same text report as `check_mm_fim_roadrunner.py`, so `bench_fim_engines.py` can compare the
+ * two engines line by line.
+ *
+ * `services/bnglService.ts` talks to `services/bnglWorker.ts` through a browser `Worker`; Node
+ * has none, so a small shim backed by `node:worker_threads` is installed before the service is
+ * imported. The worker thread inherits the tsx loader from `process.execArgv`.
+ *
+ * Usage:
+ *   npx tsx scripts/fim_service_report.ts example-models/michaelis-menten-kinetics.bngl \
+ *     --parameters k_on k_off k_cat --t-end 50 --steps 500
+ *
+ *   # Only write the expanded network as SBML (used to feed the RoadRunner engine)
+ *   npx tsx scripts/fim_service_report.ts example-models/michaelis-menten-kinetics.bngl \
+ *     --export-sbml artifacts/temp/michaelis-menten-kinetics.xml --no-fim
+ */
+import fs from 'node:fs/promises';
+import path from 'node:path';
+import { Worker as ThreadWorker } from 'node:worker_threads';
+
+import { parseBNGLStrict } from '../src/parser/BNGLParserWrapper';
+import { generateExpandedNetwork } from '../services/simulation/NetworkExpansion';
+import type { BNGLModel } from '../types';
+
+// libsbmljs expects a browser-like global scope.
+if (typeof self === 'undefined') (globalThis as any).self = globalThis;
+
+// Runs inside the worker thread: expose `self.postMessage` / `self.addEventListener('message')`
+// on top of `parentPort`, then load the real worker module.
+const WORKER_BOOTSTRAP = `
+const { parentPort, workerData } = require('node:worker_threads');
+globalThis.self = globalThis;
+globalThis.postMessage = (data) => parentPort.postMessage(data);
+globalThis.addEventListener = (type, listener) => {
+  if (type === 'message') parentPort.on('message', (data) => listener({ data }));
+};
+globalThis.removeEventListener = () => undefined;
+import(workerData.url).catch((err) => {
+  console.error('[fim_service_report] Worker failed to load:', err);
+  process.exit(1);
+});
+`;
+
+type Listener = (event: any) => void;
+
+class NodeWorker {
+  private readonly thread: ThreadWorker;
+  private readonly wrapped = new Map<Listener, (value: any) => void>();
+
+  constructor(url: URL | string) {
+    this.thread = new ThreadWorker(WORKER_BOOTSTRAP, { eval: true, workerData: { url: String(url) } });
+  }
+
+  addEventListener(type: string, listener: Listener) {
+    const handler =
+      type === 'message'
+        ? (data: unknown) => listener({ data })
+        : (err: Error) => listener({ message: err?.message, error: err });
+    this.wrapped.set(listener, handler);
+    this.thread.on(type === 'messageerror' ? 'messageerror' : type === 'error' ? 'error' : 'message', handler);
+  }
+
+  removeEventListener(type: string, listener: Listener) {
+    const handler = this.wrapped.get(listener);
+    if (handler) this.thread.off(type, handler);
+    this.wrapped.delete(listener);
+  }
+
+  postMessage(data: unknown) {
+    this.thread.postMessage(data);
+  }
+
+  terminate() {
+    void this.thread.terminate();
+  }
+}
+
+type Args = {
+  bnglPath: string;
+  parameters: string[];
+  tEnd: number;
+  steps: number;
+  exportSbml?: string;
+  runFim: boolean;
+};
+
+function parseArgs(argv: string[]): Args {
+  const args: Args = { bnglPath: '', parameters: [], tEnd: 50, steps: 500, runFim: true };
+  for (let i = 0; i < argv.length; i++) {
+    const arg = argv[i];
+    if (arg === '--parameters') {
+      while (i + 1 < argv.length && !argv[i + 1].startsWith('--')) args.parameters.push(argv[++i]);
+    } else if (arg === '--t-end') {
+      args.tEnd = Number(argv[++i]);
+    } else if (arg === '--steps') {
+      args.steps = Number(argv[++i]);
+    } else if (arg === '--export-sbml') {
+      args.exportSbml = argv[++i];
+    } else if (arg === '--no-fim') {
+      args.runFim = false;
+    } else if (!args.bnglPath) {
+      args.bnglPath = arg;
+    } else {
+      throw new Error(`Unexpected argument: ${arg}`);
+    }
+  }
+  if (!args.bnglPath) throw new Error('Usage: fim_service_report.ts <model.bngl> [--parameters p...] [--t-end T] [--steps N] [--export-sbml out.xml] [--no-fim]');
+  if (!Number.isFinite(args.tEnd) || !Number.isInteger(args.steps) || args.steps <= 0) {
+    throw new Error('--t-end must be a number and --steps a positive integer');
+  }
+  return args;
+}
+
+function printMatrix(matrix: number[][]): string {
+  return matrix
+    .map((row) =>
+      row
+        .map((value) => value.toExponential(3).padStart(12))
+        .join(' ')
+    )
+    .join('\n');
+}
+
+async function main() {
+  const args = parseArgs(process.argv.slice(2));
+
+  const source = await fs.readFile(args.bnglPath, 'utf8');
+  let model: BNGLModel = parseBNGLStrict(source);
+  if (model.reactionRules.length > 0) {
+    model = await generateExpandedNetwork(model, () => undefined, () => undefined);
+  }
+
+  if (args.exportSbml) {
+    const { exportToSBML } = await import('../services/exportSBML');
+    await fs.mkdir(path.dirname(path.resolve(args.exportSbml)), { recursive: true });
+    await fs.writeFile(args.exportSbml, await exportToSBML(model), 'utf8');
+    console.error(`[fim_service_report] SBML written to ${args.exportSbml}`);
+  }
+  if (!args.runFim) return;
+
+  // The service constructs its worker at import time, so the shim must be in place first.
+  if (typeof (globalThis as any).Worker === 'undefined') (globalThis as any).Worker = NodeWorker;
+  const { computeFIM } = await import('../services/fim');
+  const { bnglService } = await import('../services/bnglService');
+
+  const parameters = args.parameters.length > 0 ? args.parameters : Object.keys(model.parameters);
+  try {
+    const result = await computeFIM(model, parameters, { method: 'ode', t_end: args.tEnd, n_steps: args.steps });
+
+    console.log('FIM eigenvalues (descending):');
+    result.eigenvalues.forEach((val, idx) => {
+      console.log(`  λ${idx + 1}: ${val.toExponential(6)}`);
+    });
+    console.log();
+
+    console.log('Condition number (raw / regularized):');
+    console.log(
+      `  ${result.conditionNumber.toExponential(6)} / ${result.regularizedConditionNumber.toExponential(6)}`
+    );
+    console.log();
+
+    console.log('Identifiable parameters:', (result.identifiableParams ?? []).join(', ') || '(none)');
+    console.log('Unidentifiable parameters:', (result.unidentifiableParams ?? []).join(', ') || '(none)');
+    console.log();
+
+    console.log('Correlation matrix:');
+    console.log(printMatrix(result.correlations));
+    console.log();
+
+    console.log('FIM matrix:');
+    console.log(printMatrix(result.fimMatrix));
+  } finally {
+    bnglService.terminate('FIM report finished');
+  }
+}
+
+main().catch((err) => {
+  console.error('[fim_service_report] Fatal:', err);
+  process.exit(1);
+});
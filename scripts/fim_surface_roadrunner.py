@@ -0,0 +1,345 @@
+"""
+Fisher Information Matrix surface over a design of base parameter sets.
+
+`check_mm_fim_roadrunner.py` answers "is the model identifiable at the nominal
+point?". This script repeats the FIM at every point of a Latin hypercube, a full
+factorial grid or a user-supplied CSV of parameter sets, to show how
+identifiability changes across the plausible parameter box:
+
+- Points are evaluated on a process pool; each worker holds one compiled model
+  (`FIMSession`) for its whole life.
+- Results are streamed to a columnar directory of memory-mapped ``.npy`` files
+  (one file per quantity, first axis = design point) plus ``meta.json``, so
+  partial runs stay readable and large designs never sit in memory.
+- Eigen-decompositions are batched with NumPy's stacked ``eigh`` as results
+  arrive.
+
+Output columns: ``points`` (N, p), ``fim`` (N, p, p), ``eigenvalues`` (N, p,
+descending), ``eigenvectors`` (N, p, p), ``condition`` (N,), ``identifiable``
+(N, p) and ``status`` (N,; 0 = ok, 1 = failed, -1 = not run).
+
+Usage examples::
+
+    # 200-point Latin hypercube over nominal/10 .. nominal*10 for every k_ parameter
+    python scripts/fim_surface_roadrunner.py model.xml --lhs 200 --workers 8 --out surface/
+
+    # 5-level grid over explicit bounds, forward sensitivities
+    python scripts/fim_surface_roadrunner.py model.xml --grid 5 --bounds k_on=0.1:10 k_off=0.01:1 \
+        --parameters k_on k_off --method sensitivities --out grid/
+
+    # Points from a CSV whose header names the parameters
+    python scripts/fim_surface_roadrunner.py model.xml --points-csv points.csv --out custom/
+
+    # Reload later
+    python -c "import numpy as np; c = np.load('surface/condition.npy', mmap_mode='r'); print(np.median(c))"
+
+Requirements:
+    pip install libroadrunner numpy
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from dataclasses import asdict, replace
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from check_mm_fim_roadrunner import CompiledModelCache, FIMSession, JacobianOptions, SimulationConfig
+from gsa_roadrunner import parse_bounds, resolve_bounds, scale_to_bounds
+
+
+SURFACE_COLUMNS = ('points', 'fim', 'eigenvalues', 'eigenvectors', 'condition', 'identifiable', 'status')
+
+# Per-process session for pool workers (see `_init_surface_worker`).
+_SURFACE_SESSION: FIMSession | None = None
+
+
+def latin_hypercube(n: int, dims: int, seed: int = 0) -> np.ndarray:
+    """One sample per stratum in every dimension, strata paired at random."""
+    rng = np.random.default_rng(seed)
+    strata = np.argsort(rng.random((dims, n)), axis=1).T
+    return (strata + rng.random((n, dims))) / n
+
+
+def grid_design(levels: int, dims: int) -> np.ndarray:
+    """Full factorial grid with `levels` points per dimension (cell centres for levels == 1)."""
+    axis = np.linspace(0.0, 1.0, levels) if levels > 1 else np.array([0.5])
+    mesh = np.meshgrid(*([axis] * dims), indexing='ij')
+    return np.stack([m.ravel() for m in mesh], axis=1)
+
+
+def load_points(path: Path, param_names: Sequence[str]) -> np.ndarray:
+    table = np.genfromtxt(path, delimiter=',', names=True, dtype=float, encoding='utf-8')
+    missing = [pname for pname in param_names if pname not in (table.dtype.names or ())]
+    if missing:
+        raise ValueError(f'{path} has no column for: {", ".join(missing)}')
+    return np.column_stack([np.atleast_1d(table[pname]) for pname in param_names])
+
+
+def open_surface_columns(root: Path, n: int, p: int) -> Dict[str, np.ndarray]:
+    """Create the memory-mapped output columns for `n` design points and `p` parameters."""
+    root.mkdir(parents=True, exist_ok=True)
+    specs: Dict[str, Tuple[Tuple[int, ...], Any]] = {
+        'points': ((n, p), np.float64),
+        'fim': ((n, p, p), np.float64),
+        'eigenvalues': ((n, p), np.float64),
+        'eigenvectors': ((n, p, p), np.float64),
+        'condition': ((n,), np.float64),
+        'identifiable': ((n, p), np.bool_),
+        'status': ((n,), np.int8),
+    }
+    columns = {
+        name: np.lib.format.open_memmap(root / f'{name}.npy', mode='w+', dtype=dtype, shape=shape)
+        for name, (shape, dtype) in specs.items()
+    }
+    for name in ('fim', 'eigenvalues', 'eigenvectors', 'condition'):
+        columns[name][:] = np.nan
+    columns['status'][:] = -1
+    return columns
+
+
+def batched_spectra(F: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Stacked `eigh` of F[B, p, p] with the conventions of `analyse_identifiability`.
+
+    Returns descending eigenvalues, sign-normalised eigenvectors (largest loading
+    positive), condition numbers and the per-parameter identifiability mask.
+    """
+    eigenvalues, eigenvectors = np.linalg.eigh(F)
+    eigenvalues = eigenvalues[:, ::-1]
+    eigenvectors = eigenvectors[:, :, ::-1]
+    pivots = np.argmax(np.abs(eigenvectors), axis=1)
+    pivot_values = np.take_along_axis(eigenvectors, pivots[:, None, :], axis=1)[:, 0, :]
+    eigenvectors = eigenvectors * np.where(pivot_values < 0, -1.0, 1.0)[:, None, :]
+
+    max_eig = eigenvalues[:, 0]
+    min_eig = eigenvalues[:, -1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        condition = np.where(min_eig > 0, max_eig / min_eig, np.inf)
+    eig_threshold = np.maximum(1e-12, max_eig * 1e-12)
+    kept = np.where(eigenvalues > eig_threshold[:, None], eigenvalues, 0.0)
+    contributions = np.einsum('bij,bj->bi', eigenvectors ** 2, kept)
+    identifiable = contributions > (max_eig * 1e-6)[:, None]
+    return eigenvalues, eigenvectors, condition, identifiable
+
+
+def point_fim(
+    session: FIMSession,
+    param_names: Sequence[str],
+    point: Dict[str, float],
+    options: JacobianOptions,
+) -> np.ndarray:
+    J = np.asarray(session.jacobian(param_names, options, base_params=point))
+    return J.T @ J
+
+
+def _init_surface_worker(
+    sbml_path: Path,
+    config: SimulationConfig,
+    param_names: Sequence[str],
+    model_cache: CompiledModelCache | None,
+) -> None:
+    global _SURFACE_SESSION
+    _SURFACE_SESSION = FIMSession(sbml_path, config, parameters=param_names, model_cache=model_cache)
+
+
+def _surface_task(
+    index: int,
+    param_names: Sequence[str],
+    point: Dict[str, float],
+    options: JacobianOptions,
+) -> Tuple[int, np.ndarray | None, str | None]:
+    if _SURFACE_SESSION is None:
+        raise RuntimeError('Surface worker used before initialisation.')
+    return _evaluate_point(_SURFACE_SESSION, index, param_names, point, options)
+
+
+def _evaluate_point(
+    session: FIMSession,
+    index: int,
+    param_names: Sequence[str],
+    point: Dict[str, float],
+    options: JacobianOptions,
+) -> Tuple[int, np.ndarray | None, str | None]:
+    try:
+        return index, point_fim(session, param_names, point, options), None
+    except Exception as exc:  # one failed point should not end the sweep
+        return index, None, f'{type(exc).__name__}: {exc}'
+
+
+def evaluate_surface(
+    session: FIMSession,
+    param_names: Sequence[str],
+    points: np.ndarray,
+    options: JacobianOptions,
+    workers: int = 1,
+    model_cache: CompiledModelCache | None = None,
+) -> Iterator[Tuple[int, np.ndarray | None, str | None]]:
+    """Yield ``(index, F, error)`` per design point, in completion order."""
+    # Points supply the parallelism; each Jacobian runs serially inside its worker.
+    options = replace(options, workers=1)
+    tasks = [(idx, dict(zip(param_names, map(float, row)))) for idx, row in enumerate(points)]
+    if workers <= 1:
+        for idx, point in tasks:
+            yield _evaluate_point(session, idx, param_names, point, options)
+        return
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(tasks)),
+        initializer=_init_surface_worker,
+        initargs=(session.sbml_path, session.config, list(param_names), model_cache),
+    ) as pool:
+        futures: List[Future] = [
+            pool.submit(_surface_task, idx, list(param_names), point, options) for idx, point in tasks
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def run_surface(
+    session: FIMSession,
+    param_names: Sequence[str],
+    points: np.ndarray,
+    options: JacobianOptions,
+    out_dir: Path,
+    workers: int = 1,
+    eig_batch: int = 256,
+    model_cache: CompiledModelCache | None = None,
+) -> Tuple[Dict[str, np.ndarray], Dict[int, str]]:
+    """Evaluate every design point, streaming F and its batched spectra to `out_dir`."""
+    n, p = points.shape
+    columns = open_surface_columns(out_dir, n, p)
+    columns['points'][:] = points
+    errors: Dict[int, str] = {}
+    pending: List[int] = []
+
+    def flush_spectra() -> None:
+        if pending:
+            idx = np.array(sorted(pending))
+            eigenvalues, eigenvectors, condition, identifiable = batched_spectra(np.asarray(columns['fim'][idx]))
+            columns['eigenvalues'][idx] = eigenvalues
+            columns['eigenvectors'][idx] = eigenvectors
+            columns['condition'][idx] = condition
+            columns['identifiable'][idx] = identifiable
+            columns['status'][idx] = 0
+            pending.clear()
+        for column in columns.values():
+            column.flush()
+
+    for index, F, error in evaluate_surface(session, param_names, points, options, workers, model_cache):
+        if F is None:
+            errors[index] = error or 'unknown error'
+            columns['status'][index] = 1
+            continue
+        columns['fim'][index] = F
+        pending.append(index)
+        if len(pending) >= eig_batch:
+            flush_spectra()
+    flush_spectra()
+    return columns, errors
+
+
+def print_surface_summary(columns: Dict[str, np.ndarray], param_names: Sequence[str]) -> None:
+    status = np.asarray(columns['status'])
+    ok = status == 0
+    print(f'Design points: {status.size} ({int(ok.sum())} ok, {int((status == 1).sum())} failed)\n')
+    if not ok.any():
+        return
+
+    condition = np.asarray(columns['condition'])[ok]
+    finite = condition[np.isfinite(condition)]
+    print('Condition number across the design:')
+    if finite.size:
+        q05, q50, q95 = np.percentile(finite, [5, 50, 95])
+        print(f'  5% / median / 95%: {q05:.3e} / {q50:.3e} / {q95:.3e}')
+    print(f'  singular (infinite): {int(condition.size - finite.size)} of {condition.size}')
+    print()
+
+    identifiable = np.asarray(columns['identifiable'])[ok]
+    # Loading of each parameter in the weakest direction (smallest eigenvalue).
+    weakest = np.abs(np.asarray(columns['eigenvectors'])[ok][:, :, -1])
+    print(f"  {'parameter':<20} {'identifiable':>12} {'|weakest loading|':>18}")
+    for i, pname in enumerate(param_names):
+        print(f'  {pname:<20} {identifiable[:, i].mean():>11.1%} {weakest[:, i].mean():>18.3f}')
+    print()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Evaluate the RoadRunner FIM over a design of base parameter sets.')
+    parser.add_argument('sbml_file', type=Path, help='Path to SBML model exported from BioNetGen.')
+    design = parser.add_mutually_exclusive_group(required=True)
+    design.add_argument('--lhs', type=int, metavar='N', help='Latin hypercube with N points inside the bounds.')
+    design.add_argument('--grid', type=int, metavar='LEVELS', help='Full factorial grid with LEVELS points per parameter.')
+    design.add_argument('--points-csv', type=Path, help='CSV of base parameter sets; the header names the parameters.')
+    parser.add_argument('--out', type=Path, required=True, help='Output directory for the columnar .npy files and meta.json.')
+    parser.add_argument('--parameters', nargs='+', help='Parameter IDs to vary and differentiate (default: kinetic params detected).')
+    parser.add_argument('--bounds', nargs='+', metavar='NAME=LOW:HIGH', help='Explicit ranges for individual parameters.')
+    parser.add_argument('--spread', type=float, default=10.0, help='Default range nominal/spread .. nominal*spread (default: 10).')
+    parser.add_argument('--linear', action='store_true', help='Space the design uniformly instead of log-uniformly.')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the Latin hypercube (default: 0).')
+    parser.add_argument('--method', choices=('fd', 'sensitivities'), default='fd', help='Jacobian source (default: fd).')
+    parser.add_argument('--steps', type=int, default=500, help='Number of uniform integration steps (default: 500).')
+    parser.add_argument('--t-end', type=float, default=50.0, help='Simulation end time (default: 50).')
+    parser.add_argument('--rel-eps', type=float, default=1e-4, help='Relative perturbation size for finite differences (default: 1e-4).')
+    parser.add_argument('--abs-tol', type=float, default=1e-12, help='CVODE absolute tolerance (default: 1e-12).')
+    parser.add_argument('--rel-tol', type=float, default=1e-10, help='CVODE relative tolerance (default: 1e-10).')
+    parser.add_argument('--integrator', type=str, default='cvode', help="RoadRunner integrator to use (e.g. 'cvode', 'rk4').")
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes, one compiled model each (default: 1).')
+    parser.add_argument('--eig-batch', type=int, default=256, help='FIMs per stacked eigen-decomposition (default: 256).')
+    parser.add_argument('--model-cache-dir', type=Path, help='Directory for compiled RoadRunner model states.')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    config = SimulationConfig(
+        end=args.t_end,
+        steps=args.steps,
+        rel_tol=args.rel_tol,
+        abs_tol=args.abs_tol,
+        integrator=args.integrator,
+    )
+    options = JacobianOptions(method=args.method, rel_eps=args.rel_eps)
+    model_cache = CompiledModelCache(args.model_cache_dir, 2 << 30) if args.model_cache_dir else None
+    session = FIMSession(args.sbml_file, config, parameters=args.parameters, model_cache=model_cache)
+    param_names = list(session.param_names)
+    log_scale = not args.linear
+
+    if args.points_csv is not None:
+        points = load_points(args.points_csv, param_names)
+        design = 'csv'
+    else:
+        bounds = resolve_bounds(param_names, session.base_params, parse_bounds(args.bounds), args.spread, log_scale)
+        if args.lhs is not None:
+            unit, design = latin_hypercube(args.lhs, len(param_names), args.seed), 'lhs'
+        else:
+            unit, design = grid_design(args.grid, len(param_names)), 'grid'
+        points = scale_to_bounds(unit, bounds, log_scale)
+
+    meta: Dict[str, Any] = {
+        'sbml': str(args.sbml_file),
+        'design': design,
+        'parameters': param_names,
+        'observables': list(session.observables),
+        'config': asdict(config),
+        'options': asdict(options),
+        'columns': list(SURFACE_COLUMNS),
+    }
+    args.out.mkdir(parents=True, exist_ok=True)
+    (args.out / 'meta.json').write_text(json.dumps(meta, indent=2), encoding='utf-8')
+
+    print(f'FIM surface: {points.shape[0]} {design} points over {", ".join(param_names)}\n')
+    columns, errors = run_surface(
+        session, param_names, points, options, args.out, args.workers, args.eig_batch, model_cache
+    )
+    meta['errors'] = {str(idx): message for idx, message in sorted(errors.items())}
+    (args.out / 'meta.json').write_text(json.dumps(meta, indent=2), encoding='utf-8')
+
+    print_surface_summary(columns, param_names)
+    print(f'Results written to: {args.out}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,355 @@
+"""
+Global sensitivity screening (Morris elementary effects, Saltelli/Sobol indices)
+on top of the RoadRunner FIM setup in `check_mm_fim_roadrunner.py`.
+
+Where the FIM is a local analysis around the nominal parameters, this script
+samples the whole parameter box:
+
+- Design points come from a scrambled Sobol sequence (SciPy's `qmc` when
+  installed) or a randomly shifted Halton sequence otherwise.
+- Parameter sets are evaluated in batches on a process pool; every worker holds
+  one `FIMSession`, so the model is compiled once per worker (or loaded from
+  ``--model-cache-dir``).
+- Each simulation is reduced to one scalar per observable (``--statistic``) and
+  the Morris / Sobol estimators are evaluated with vectorised NumPy.
+
+Usage examples::
+
+    # Morris screening: 20 trajectories on a 4-level grid, 8 workers
+    python scripts/gsa_roadrunner.py model.xml morris --trajectories 20 --workers 8
+
+    # Sobol indices from 1024 base samples, explicit bounds for two parameters
+    python scripts/gsa_roadrunner.py model.xml sobol --samples 1024 \
+        --bounds k_on=0.1:10 k_cat=0.01:1 --out sobol.json
+
+Requirements:
+    pip install libroadrunner numpy   (scipy optional, for Sobol sequences)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from check_mm_fim_roadrunner import CompiledModelCache, FIMSession, SimulationConfig
+
+try:
+    from scipy.stats import qmc
+except ImportError:  # fall back to Halton points
+    qmc = None  # type: ignore[assignment]
+
+
+STATISTICS = ('final', 'mean', 'max')
+
+# Per-process session for pool workers (see `_init_gsa_worker`).
+_GSA_SESSION: FIMSession | None = None
+
+
+def _first_primes(count: int) -> List[int]:
+    primes: List[int] = []
+    candidate = 2
+    while len(primes) < count:
+        if all(candidate % prime for prime in primes if prime * prime <= candidate):
+            primes.append(candidate)
+        candidate += 1
+    return primes
+
+
+def halton(n: int, dims: int, seed: int = 0) -> np.ndarray:
+    """Randomly shifted (Cranley–Patterson) Halton points in [0, 1)^dims."""
+    points = np.zeros((n, dims))
+    for d, base in enumerate(_first_primes(dims)):
+        index = np.arange(1, n + 1)
+        fraction = 1.0
+        while np.any(index > 0):
+            fraction /= base
+            points[:, d] += fraction * (index % base)
+            index //= base
+    shift = np.random.default_rng(seed).random(dims)
+    return (points + shift) % 1.0
+
+
+def quasi_random(n: int, dims: int, seed: int = 0) -> np.ndarray:
+    if qmc is not None:
+        return qmc.Sobol(dims, scramble=True, seed=seed).random(n)
+    return halton(n, dims, seed)
+
+
+def scale_to_bounds(unit: np.ndarray, bounds: np.ndarray, log_scale: bool) -> np.ndarray:
+    lower, upper = bounds[:, 0], bounds[:, 1]
+    if log_scale:
+        return lower * (upper / lower) ** unit
+    return lower + unit * (upper - lower)
+
+
+def summarise_trajectories(data: np.ndarray, obs_columns: Sequence[int], statistic: str) -> np.ndarray:
+    values = np.asarray(data, dtype=float)[:, obs_columns]
+    if statistic == 'final':
+        return values[-1]
+    if statistic == 'mean':
+        return values.mean(axis=0)
+    if statistic == 'max':
+        return values.max(axis=0)
+    raise ValueError(f'Unknown statistic: {statistic}')
+
+
+def _evaluate_rows(
+    session: FIMSession,
+    param_names: Sequence[str],
+    rows: np.ndarray,
+    statistic: str,
+) -> np.ndarray:
+    obs_columns = [session.context.selections.index(name) for name in session.observables]
+    outputs = np.full((rows.shape[0], len(obs_columns)), np.nan)
+    for idx, row in enumerate(rows):
+        overrides = dict(zip(param_names, (float(value) for value in row)))
+        try:
+            outputs[idx] = summarise_trajectories(session.simulate(overrides), obs_columns, statistic)
+        except RuntimeError:
+            continue  # failed integrations stay NaN and are skipped by the estimators
+    return outputs
+
+
+def _init_gsa_worker(
+    sbml_path: Path,
+    config: SimulationConfig,
+    param_names: Sequence[str],
+    model_cache: CompiledModelCache | None,
+) -> None:
+    global _GSA_SESSION
+    _GSA_SESSION = FIMSession(sbml_path, config, parameters=param_names, model_cache=model_cache)
+
+
+def _evaluate_batch(param_names: Sequence[str], rows: np.ndarray, statistic: str) -> np.ndarray:
+    if _GSA_SESSION is None:
+        raise RuntimeError('GSA worker used before initialisation.')
+    return _evaluate_rows(_GSA_SESSION, param_names, rows, statistic)
+
+
+def evaluate_parameter_sets(
+    session: FIMSession,
+    param_names: Sequence[str],
+    samples: np.ndarray,
+    statistic: str,
+    workers: int = 1,
+    batch_size: int = 64,
+    model_cache: CompiledModelCache | None = None,
+) -> np.ndarray:
+    """Simulate every row of `samples`, returning one scalar per observable and row."""
+    if workers <= 1:
+        return _evaluate_rows(session, param_names, samples, statistic)
+    batches = [samples[start:start + batch_size] for start in range(0, samples.shape[0], max(1, batch_size))]
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(batches)),
+        initializer=_init_gsa_worker,
+        initargs=(session.sbml_path, session.config, list(param_names), model_cache),
+    ) as pool:
+        futures = [pool.submit(_evaluate_batch, list(param_names), batch, statistic) for batch in batches]
+        return np.vstack([future.result() for future in futures])
+
+
+def morris_design(k: int, trajectories: int, levels: int, seed: int = 0) -> np.ndarray:
+    """Morris (1991) trajectories in the unit cube, shape (r, k + 1, k)."""
+    rng = np.random.default_rng(seed)
+    delta = levels / (2.0 * (levels - 1))
+    # Base points on the grid {0, 1/(L-1), ..., 1 - delta}, spread with a quasi-random sequence.
+    base_index = np.floor(quasi_random(trajectories, k, seed) * (levels // 2))
+    base = base_index / (levels - 1)
+    steps = np.tril(np.ones((k + 1, k)), -1)
+    signs = rng.choice((-1.0, 1.0), size=(trajectories, k))
+    order = np.argsort(rng.random((trajectories, k)), axis=1)
+
+    # x* + (delta / 2) * ((2B - 1) D + 1), then permute factor order.
+    moves = (delta / 2.0) * ((2.0 * steps[None] - 1.0) * signs[:, None, :] + 1.0)
+    design = base[:, None, :] + moves
+    permuted = np.empty_like(design)
+    rows = np.arange(trajectories)[:, None]
+    for step in range(k + 1):
+        permuted[:, step, :][rows, order] = design[:, step, :]
+    return permuted
+
+
+def morris_indices(design: np.ndarray, outputs: np.ndarray) -> Dict[str, np.ndarray]:
+    """mu, mu* and sigma of the elementary effects, each shaped (k, num_obs)."""
+    r, steps, k = design.shape
+    Y = outputs.reshape(r, steps, -1)
+    moves = np.diff(design, axis=1)  # (r, k, k): one non-zero factor per step
+    factor = np.argmax(np.abs(moves), axis=2)
+    step_size = np.take_along_axis(moves, factor[..., None], axis=2)[..., 0]
+    effects = np.full((r, k, Y.shape[2]), np.nan)
+    effects[np.arange(r)[:, None], factor] = np.diff(Y, axis=1) / step_size[..., None]
+    return {
+        'mu': np.nanmean(effects, axis=0),
+        'mu_star': np.nanmean(np.abs(effects), axis=0),
+        'sigma': np.nanstd(effects, axis=0, ddof=1) if r > 1 else np.zeros((k, Y.shape[2])),
+    }
+
+
+def saltelli_design(k: int, samples: int, seed: int = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """A, B and the k mixed matrices AB_i (A with column i taken from B)."""
+    unit = quasi_random(samples, 2 * k, seed)
+    A, B = unit[:, :k], unit[:, k:]
+    AB = np.repeat(A[None], k, axis=0)
+    idx = np.arange(k)
+    AB[idx, :, idx] = B[:, idx].T
+    return A, B, AB
+
+
+def sobol_indices(fA: np.ndarray, fB: np.ndarray, fAB: np.ndarray) -> Dict[str, np.ndarray]:
+    """First-order (Saltelli 2010) and total (Jansen) indices, each shaped (k, num_obs)."""
+    pooled = np.concatenate([fA, fB])
+    variance = np.nanvar(pooled, axis=0)
+    # Outputs that do not vary beyond round-off (e.g. conserved totals) have no defined indices.
+    variance[variance <= (1e-12 * np.nanmax(np.abs(pooled), axis=0)) ** 2] = np.nan
+    with np.errstate(divide='ignore', invalid='ignore'):
+        first = np.nanmean(fB[None] * (fAB - fA[None]), axis=1) / variance
+        total = 0.5 * np.nanmean((fA[None] - fAB) ** 2, axis=1) / variance
+    return {'S1': first, 'ST': total}
+
+
+def resolve_bounds(
+    param_names: Sequence[str],
+    nominal: Dict[str, float],
+    overrides: Dict[str, Tuple[float, float]],
+    spread: float,
+    log_scale: bool,
+) -> np.ndarray:
+    bounds = np.array([
+        overrides.get(pname, (nominal[pname] / spread, nominal[pname] * spread)) for pname in param_names
+    ], dtype=float)
+    bounds.sort(axis=1)
+    if log_scale and np.any(bounds <= 0):
+        bad = [pname for pname, row in zip(param_names, bounds) if row[0] <= 0]
+        raise ValueError(f'Log-scale sampling needs positive bounds; set --bounds or --linear for: {", ".join(bad)}')
+    return bounds
+
+
+def parse_bounds(items: Sequence[str] | None) -> Dict[str, Tuple[float, float]]:
+    parsed: Dict[str, Tuple[float, float]] = {}
+    for item in items or ():
+        name, _, span = item.partition('=')
+        low, _, high = span.partition(':')
+        parsed[name] = (float(low), float(high))
+    return parsed
+
+
+def print_indices(
+    title: str,
+    columns: Sequence[str],
+    indices: Dict[str, np.ndarray],
+    param_names: Sequence[str],
+    observables: Sequence[str],
+) -> None:
+    for o, obs_name in enumerate(observables):
+        print(f'{title} for {obs_name}:')
+        print(f"  {'parameter':<20} " + ' '.join(f'{col:>11}' for col in columns))
+        order = np.argsort(-np.nan_to_num(indices[columns[0]][:, o]))
+        for i in order:
+            values = ' '.join(f'{indices[col][i, o]:>11.4g}' for col in columns)
+            print(f'  {param_names[i]:<20} {values}')
+        print()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Morris / Sobol global sensitivity analysis with libRoadRunner.')
+    parser.add_argument('sbml_file', type=Path, help='Path to SBML model exported from BioNetGen.')
+    sub = parser.add_subparsers(dest='method', required=True)
+    morris = sub.add_parser('morris', help='Morris elementary-effects screening.')
+    morris.add_argument('--trajectories', type=int, default=20, help='Number of Morris trajectories (default: 20).')
+    morris.add_argument('--levels', type=int, default=4, help='Grid levels per factor; must be even (default: 4).')
+    sobol = sub.add_parser('sobol', help='Saltelli estimation of first-order and total Sobol indices.')
+    sobol.add_argument('--samples', type=int, default=512, help='Base samples N; runs = N * (k + 2) (default: 512).')
+
+    for sp in (morris, sobol):
+        sp.add_argument('--parameters', nargs='+', help='Parameter IDs to vary (default: kinetic params detected).')
+        sp.add_argument('--bounds', nargs='+', metavar='NAME=LOW:HIGH', help='Explicit ranges for individual parameters.')
+        sp.add_argument('--spread', type=float, default=10.0, help='Default range nominal/spread .. nominal*spread (default: 10).')
+        sp.add_argument('--linear', action='store_true', help='Sample uniformly instead of log-uniformly.')
+        sp.add_argument('--statistic', choices=STATISTICS, default='final', help='Scalar taken from each observable trajectory (default: final).')
+        sp.add_argument('--steps', type=int, default=500, help='Number of uniform integration steps (default: 500).')
+        sp.add_argument('--t-end', type=float, default=50.0, help='Simulation end time (default: 50).')
+        sp.add_argument('--abs-tol', type=float, default=1e-12, help='CVODE absolute tolerance (default: 1e-12).')
+        sp.add_argument('--rel-tol', type=float, default=1e-10, help='CVODE relative tolerance (default: 1e-10).')
+        sp.add_argument('--integrator', type=str, default='cvode', help="RoadRunner integrator to use (e.g. 'cvode', 'rk4').")
+        sp.add_argument('--workers', type=int, default=1, help='Worker processes (default: 1).')
+        sp.add_argument('--batch-size', type=int, default=64, help='Parameter sets per worker task (default: 64).')
+        sp.add_argument('--seed', type=int, default=0, help='Seed for the sample design (default: 0).')
+        sp.add_argument('--model-cache-dir', type=Path, help='Directory for compiled RoadRunner model states.')
+        sp.add_argument('--out', type=Path, help='Write indices and run metadata to this JSON file.')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    config = SimulationConfig(
+        end=args.t_end,
+        steps=args.steps,
+        rel_tol=args.rel_tol,
+        abs_tol=args.abs_tol,
+        integrator=args.integrator,
+    )
+    model_cache = CompiledModelCache(args.model_cache_dir, 2 << 30) if args.model_cache_dir else None
+    session = FIMSession(args.sbml_file, config, parameters=args.parameters, model_cache=model_cache)
+    param_names = list(session.param_names)
+    observables = list(session.observables)
+    log_scale = not args.linear
+    bounds = resolve_bounds(param_names, session.base_params, parse_bounds(args.bounds), args.spread, log_scale)
+    k = len(param_names)
+
+    def evaluate(unit: np.ndarray) -> np.ndarray:
+        samples = scale_to_bounds(unit, bounds, log_scale)
+        return evaluate_parameter_sets(
+            session, param_names, samples, args.statistic, args.workers, args.batch_size, model_cache
+        )
+
+    if args.method == 'morris':
+        if args.levels < 2 or args.levels % 2:
+            raise ValueError('--levels must be an even number >= 2.')
+        design = morris_design(k, args.trajectories, args.levels, args.seed)
+        outputs = evaluate(design.reshape(-1, k))
+        indices = morris_indices(design, outputs)
+        columns = ['mu_star', 'mu', 'sigma']
+        title = 'Morris elementary effects'
+    else:
+        A, B, AB = saltelli_design(k, args.samples, args.seed)
+        outputs = evaluate(np.vstack([A, B, AB.reshape(-1, k)]))
+        n = args.samples
+        indices = sobol_indices(outputs[:n], outputs[n:2 * n], outputs[2 * n:].reshape(k, n, -1))
+        columns = ['ST', 'S1']
+        title = 'Sobol indices'
+
+    failed = int(np.isnan(outputs).any(axis=1).sum())
+    print(f'{title}: {outputs.shape[0]} simulations ({failed} failed), statistic = {args.statistic}\n')
+    print_indices(title, columns, indices, param_names, observables)
+
+    if args.out:
+        result: Dict[str, Any] = {
+            'method': args.method,
+            'sbml': str(args.sbml_file),
+            'statistic': args.statistic,
+            'parameters': param_names,
+            'observables': observables,
+            'bounds': {pname: list(row) for pname, row in zip(param_names, bounds.tolist())},
+            'log_scale': log_scale,
+            'simulations': int(outputs.shape[0]),
+            'failed_simulations': failed,
+            'sequence': 'sobol' if qmc is not None else 'halton',
+            'indices': {
+                obs_name: {
+                    pname: {col: float(indices[col][i, o]) for col in columns}
+                    for i, pname in enumerate(param_names)
+                }
+                for o, obs_name in enumerate(observables)
+            },
+        }
+        args.out.write_text(json.dumps(result, indent=2), encoding='utf-8')
+        print(f'Results written to: {args.out}')
+
+
+if __name__ == '__main__':
+    main()